@@ -6,6 +6,7 @@ from PyQt5.QtCore import QCommandLineParser, QCoreApplication
 # Built-in Modules
 import sys
 import numpy
+import multiprocessing
 import tinydb
 
 # User-defined Modules
@@ -13,6 +14,7 @@ from fantasycreator.mainWindow import MainWindow
 
 # execute the code
 def main():
+    multiprocessing.freeze_support() # layout workers in bundled builds
     # if sys.platform.startswith('darwin'): 
     #     try:
     #         from Foundation import NSBundle # Method requires pyobj-c
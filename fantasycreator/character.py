@@ -3,11 +3,14 @@
 from PyQt5 import QtWidgets as qtw
 from PyQt5 import QtGui as qtg
 from PyQt5 import QtCore as qtc
+from PyQt5 import sip
 
 # Built-in Modules
 import re
 import uuid
 import datetime
+import weakref
+from collections import OrderedDict
 
 # User-defined Modules
 from flags import TREE_ICON_DISPLAY, EVENT_TYPE
@@ -17,6 +20,120 @@ from storyTime import Time, DateLineEdit
 import resources
 
 
+class PixmapCache:
+
+    # Rendered pixmaps shared between characters, keyed by whatever they were
+    # rendered from. Once they add up to more than `limit` bytes the least
+    # recently used are dropped, to be built again when next painted (see
+    # LazyPixmap). Alongside them it keeps the average colour of up to 
+    # COLORS pixmaps, for drawing characters as glyphs when zoomed out.
+
+    LIMIT = 64 * 2**20
+    COLORS = 4096
+    SAMPLE_SIZE = 8
+
+    def __init__(self, limit=LIMIT):
+        self.limit = limit
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.pixmaps = OrderedDict()
+        self.colors = OrderedDict()
+
+    def get(self, key, build):
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(key)
+            self.hits += 1
+            return pixmap
+        self.misses += 1
+        pixmap = self.pixmaps[key] = build()
+        self.size += self.cost(pixmap)
+        while self.size > self.limit and len(self.pixmaps) > 1:
+            _, old = self.pixmaps.popitem(last=False)
+            self.size -= self.cost(old)
+        return pixmap
+
+    def color(self, key, sample):
+        # Worked out from a few pixels of `sample`, the pixmap's source, so 
+        # the pixmap itself needn't be built
+        color = self.colors.get(key)
+        if color is not None:
+            self.colors.move_to_end(key)
+            return color
+        image = sample().scaled(self.SAMPLE_SIZE, self.SAMPLE_SIZE, 
+                                    qtc.Qt.IgnoreAspectRatio, qtc.Qt.FastTransformation)
+        if isinstance(image, qtg.QPixmap):
+            image = image.toImage()
+        color = self.colors[key] = image.scaled(1, 1, qtc.Qt.IgnoreAspectRatio, 
+                                                    qtc.Qt.SmoothTransformation).pixelColor(0, 0)
+        color.setAlpha(255)
+        if len(self.colors) > self.COLORS:
+            self.colors.popitem(last=False)
+        return color
+
+    def setLimit(self, limit):
+        self.limit = limit
+        while self.size > self.limit and self.pixmaps:
+            _, old = self.pixmaps.popitem(last=False)
+            self.size -= self.cost(old)
+
+    def clear(self):
+        self.pixmaps.clear()
+        self.colors.clear()
+        self.size = 0
+
+    @staticmethod
+    def cost(pixmap):
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+class LazyPixmap:
+
+    # What a character shows: the size of the pixmap and how to build it.
+    # The pixmap itself lives in a PixmapCache, built the first time it is
+    # painted and again whenever the cache has since dropped it, so only the
+    # characters on screen cost a pixmap. Made through make(), so characters
+    # showing the same pixmap share one LazyPixmap (and can compare by `is`),
+    # and only the first of them has to measure it. `sample` gives what the
+    # pixmap is built from when that is cheaper to read than the pixmap.
+
+    lazy_pixmaps = weakref.WeakValueDictionary()
+
+    def __init__(self, cache, key, width, height, build, sample=None):
+        self.cache = cache
+        self.key = key
+        self._width = int(width)
+        self._height = int(height)
+        self.build = build
+        self.sample = sample
+
+    @classmethod
+    def make(cls, cache, key, measure, build, sample=None):
+        lazy = cls.lazy_pixmaps.get(key)
+        if lazy is None:
+            lazy = cls.lazy_pixmaps[key] = cls(cache, key, *measure(), build, sample)
+        return lazy
+
+    def get(self):
+        return self.cache.get(self.key, self.build)
+
+    def color(self):
+        return self.cache.color(self.key, self.sample or self.get)
+
+    def width(self):
+        return self._width
+
+    def height(self):
+        return self._height
+
+    def size(self):
+        return qtc.QSize(self._width, self._height)
+
+    def rect(self):
+        return qtc.QRect(0, 0, self._width, self._height)
+
+
 # Create Character class
 class Character(qtw.QGraphicsWidget):
 
@@ -27,122 +144,28 @@ class Character(qtw.QGraphicsWidget):
     RULER_PIC_PATH = ':/dflt-tree-images/crown.png'
     BUTTON_WIDTH = 35
 
+    hover_controls = None # HoverControls shared by every character, made on first hover
+    pixmap_cache = PixmapCache() # portraits, names and crowns of every character
+    pixmap_version = 0 # bumped whenever any character's pixmap may have changed size
+
     item_moved = qtc.pyqtSignal(qtc.QPointF)
 
     def __init__(self, char_dict=None, char_id=None, x_pos=0, y_pos=0, parent=None):
         super(Character, self).__init__(parent)
         self.setX(x_pos)
         self.setY(y_pos)
+        # Drawn by its Family (see Family.paint), the item itself is only 
+        # there for selection and hovering
         self.setFlags(qtw.QGraphicsItem.ItemIsFocusable | 
                         qtw.QGraphicsItem.ItemIsSelectable | 
-                        qtw.QGraphicsItem.ItemClipsToShape)
+                        qtw.QGraphicsItem.ItemClipsToShape |
+                        qtw.QGraphicsItem.ItemHasNoContents)
         # self.setFlag(qtw.QGraphicsItem.ItemSendsGeometryChanges)
         # self.setFlag(qtw.QGraphicsItem.ItemIsMovable)
-        self.setCacheMode(qtw.QGraphicsItem.ItemCoordinateCache)
         self.setAcceptHoverEvents(True)
         self.setCursor(qtc.Qt.PointingHandCursor)
         self.setZValue(2)
 
-        self.add_desc = qtw.QPushButton(
-            '+',
-            clicked=lambda: self.parent().add_descendant.emit(self.uniq_id)
-        )
-        # self.add_btn.setFixedSize(self.BUTTON_WIDTH, self.BUTTON_HEIGHT)
-        self.add_desc.setStyleSheet("""
-                        QPushButton { 
-                            border-width: 3px;
-                            border-color: green;
-                            border-style: outset;
-                            border-radius: 3px;
-                            color: green;
-                            font: bold 26px;
-                            background-color: rgba(66, 245, 117, 40);
-                        }
-                        QPushButton:pressed { 
-                            background-color: rgba(66, 245, 117, 70);
-                            border-style: inset;
-                        }""")
-
-        self.del_desc = qtw.QPushButton(
-            '-',
-            clicked=lambda: self.parent().remove_character.emit(self.uniq_id)
-        )
-        # self.del_btn.setFixedSize(self.BUTTON_WIDTH, self.BUTTON_HEIGHT)
-        self.del_desc.setStyleSheet("""
-                        QPushButton { 
-                            border-width: 3px;
-                            border-color: red;
-                            border-style: outset;
-                            border-radius: 3px;
-                            color: red;
-                            font: bold 32px;
-                            background-color: rgba(245, 66, 66, 40);
-                        }
-                        QPushButton:pressed { 
-                            background-color: rgba(245, 66, 66, 70);
-                            border-style: inset;
-                        }""")
-        
-        self.add_partner = qtw.QPushButton(
-            '+',
-            clicked=lambda: self.parent().add_partner.emit(self.uniq_id)
-        )
-        # self.partner_btn.setFixedSize(self.BUTTON_HEIGHT, self.BUTTON_WIDTH)
-        self.add_partner.setStyleSheet("""
-                        QPushButton { 
-                            border-width: 3px;
-                            border-color: blue;
-                            border-style: outset;
-                            border-radius: 3px;
-                            color: blue;
-                            font: bold 26px;
-                            background-color: rgba(66, 197, 245, 40);
-                        }
-                        QPushButton:pressed { 
-                            background-color: rgba(66, 197, 245, 70);
-                            border-style: inset;
-                        }""")
-        
-        self.del_partner = qtw.QPushButton(
-            '-',
-            clicked=lambda: self.parent().remove_partnership[uuid.UUID].emit(self.uniq_id)
-        )
-        # self.partner_btn.setFixedSize(self.BUTTON_HEIGHT, self.BUTTON_WIDTH)
-        self.del_partner.setStyleSheet("""
-                        QPushButton { 
-                            border-width: 3px;
-                            border-color: yellow;
-                            border-style: outset;
-                            border-radius: 3px;
-                            color: yellow;
-                            font: bold 28px;
-                            background-color: rgba(245, 218, 66, 40);
-                        }
-                        QPushButton:pressed { 
-                            background-color: rgba(245, 218, 66, 70);
-                            border-style: inset;
-                        }""")
-
-        self.add_desc_btn = qtw.QGraphicsProxyWidget(self)
-        self.add_desc_btn.setWidget(self.add_desc)
-        self.add_desc_btn.setToolTip("Add Descendant")
-        self.add_desc_btn.setVisible(False)
-
-        self.del_desc_btn = qtw.QGraphicsProxyWidget(self)
-        self.del_desc_btn.setWidget(self.del_desc)
-        self.del_desc_btn.setToolTip("Delete Character")
-        self.del_desc_btn.setVisible(False)
-
-        self.add_partner_btn = qtw.QGraphicsProxyWidget(self)
-        self.add_partner_btn.setWidget(self.add_partner)
-        self.add_partner_btn.setToolTip("Add Partner")
-        self.add_partner_btn.setVisible(False)
-
-        self.del_partner_btn = qtw.QGraphicsProxyWidget(self)
-        self.del_partner_btn.setWidget(self.del_partner)
-        self.del_partner_btn.setToolTip("Remove Partner")
-        self.del_partner_btn.setVisible(False)
-
         # Character properties
         self.uniq_id = char_id 
         # self.clone_num = 0       
@@ -162,11 +185,12 @@ class Character(qtw.QGraphicsWidget):
         self.current_display_mode = TREE_ICON_DISPLAY.IMAGE
 
         # self.pixmap = qtw.QGraphicsPixmapItem()
-        self.pixmap = None
+        self.pixmap = None      # LazyPixmap's, see PixmapCache
         self.img = None
         self.img_ruler_pixmap = None
         self.name_ruler_pixmap = None
         self.offset = (0, 0)
+        self._bounds = (None, None)     # ((LazyPixmap key, offset), boundingRect)
 
         if char_dict is not None:
             self.parseDict(char_dict)
@@ -192,10 +216,13 @@ class Character(qtw.QGraphicsWidget):
         self.tree_pos = dictionary.get('tree_pos', self.tree_pos)
         if img := dictionary.get('__IMG__', None):
             # print('Using img')
-            if isinstance(img, qtg.QImage):
-                self.pixmap = qtg.QPixmap.fromImage(img)
-            else: # Assume instance of QPixmap
-                self.pixmap = img
+            if not isinstance(img, qtg.QImage): # Assume instance of QPixmap
+                # Only the image is held on to, so the cache can drop the pixmap
+                img = img.toImage()
+            # Clones share their original's image, and so its pixmap
+            self.pixmap = LazyPixmap.make(self.pixmap_cache, ('image', img.cacheKey()), 
+                                            lambda: (img.width(), img.height()), 
+                                            lambda: qtg.QPixmap.fromImage(img), lambda: img)
 
             self.current_pixmap = self.pixmap
             self.updatePixmapImage()
@@ -210,7 +237,7 @@ class Character(qtw.QGraphicsWidget):
             if self.ruler_display_flag:
                 self.showRuler(self.ruler)
         self.setToolTip(self.name)
-        self.updateButtons()
+        self.pixmapChanged()
 
     def toDict(self):
         char_dict = {}
@@ -240,83 +267,90 @@ class Character(qtw.QGraphicsWidget):
         
         if self.ruler_display_flag:
             self.showRuler(self.ruler)
-        self.updateButtons()
+        self.pixmapChanged()
     
     def setNameDisplay(self):
+        key = ('name', self.name, self.display_font.key(), self.ICON_HEIGHT)
+        # The builders hold on to what they need, not to the character
+        name, font, height = self.name, qtg.QFont(self.display_font), self.ICON_HEIGHT
+        render = self.renderName
+        build = lambda: render(name, font, height)
+        self.current_pixmap = LazyPixmap.make(self.pixmap_cache, key, 
+                                lambda: (qtg.QFontMetrics(font).horizontalAdvance(name), height/2),
+                                build, build)
+        self.offset = (-self.current_pixmap.width() / 2, -self.ICON_HEIGHT / 4)
+
+    @staticmethod
+    def renderName(name, font, height):
         # size = qtc.QSize(self.pixmap.pixmap().width(), self.pixmap.pixmap().height())
-        font_metric = qtg.QFontMetrics(self.display_font)
-        text_width = font_metric.horizontalAdvance(self.name)
+        font_metric = qtg.QFontMetrics(font)
+        text_width = font_metric.horizontalAdvance(name)
 
-        size = qtc.QSize(text_width, self.ICON_HEIGHT/2)
+        size = qtc.QSize(text_width, height/2)
 
 
         result_px = qtg.QPixmap(size)
         result_px.fill(qtc.Qt.transparent)
         painter = qtg.QPainter(result_px)
-        bounding_rect = qtc.QRect(0, 0, text_width, self.ICON_HEIGHT/2)
-        painter.setFont(self.display_font)
-        painter.drawText(bounding_rect, qtc.Qt.AlignCenter, self.name)
+        bounding_rect = qtc.QRect(0, 0, text_width, height/2)
+        painter.setFont(font)
+        painter.drawText(bounding_rect, qtc.Qt.AlignCenter, name)
         painter.end()
-        # self.pixmap.setPixmap(result_px)
-        # self.pixmap.setOffset(-text_width / 2, -self.ICON_HEIGHT / 4)
-        # self.pixmap.setShapeMode(qtw.QGraphicsPixmapItem.BoundingRectShape)
-        self.current_pixmap = result_px
-        self.offset = (-text_width / 2, -self.ICON_HEIGHT / 4)
-    
+        return result_px
 
     def buildNameRulerPix(self):
-        img = qtg.QImage(self.RULER_PIC_PATH)
-        img.convertTo(qtg.QImage.Format_ARGB32_Premultiplied)
-        crown_px = qtg.QPixmap.fromImage(img)
-
-        crown_px = crown_px.scaledToHeight(self.CROWN_HEIGHT)
-        crown_point = qtc.QPoint((self.pixmap.width()-crown_px.width())/2, 0)
-        
-        size = qtc.QSize(self.current_pixmap.width(), self.current_pixmap.height() + self.CROWN_HEIGHT)
-        char_rect = qtc.QRect(0, self.CROWN_HEIGHT, self.current_pixmap.width(), self.current_pixmap.height())
-        result_px = qtg.QPixmap(size)
-        result_px.fill(qtc.Qt.transparent)
-        painter = qtg.QPainter(result_px)
-        painter.setRenderHint(qtg.QPainter.TextAntialiasing)
-        painter.setRenderHint(qtg.QPainter.SmoothPixmapTransform)
-        painter.drawPixmap(char_rect, self.current_pixmap)
-        painter.drawPixmap(crown_point, crown_px)
-        painter.end()
-        self.name_ruler_pixmap = result_px
+        self.name_ruler_pixmap = self.crowned('name_ruler', self.current_pixmap)
 
     def buildImgRulerPix(self):
-        img = qtg.QImage(self.RULER_PIC_PATH)
-        img.convertTo(qtg.QImage.Format_ARGB32_Premultiplied)
-        crown_px = qtg.QPixmap.fromImage(img)
-
-        crown_px = crown_px.scaledToHeight(self.CROWN_HEIGHT)
-        crown_point = qtc.QPoint((self.pixmap.width()-crown_px.width())/2, 0)
+        self.img_ruler_pixmap = self.crowned('img_ruler', self.pixmap)
+
+    def crowned(self, kind, lazy):
+        # Keyed by everything the result is drawn from; the key of the pixmap 
+        # being crowned already covers what that was built from
+        icon_width, crown_height = self.pixmap.width(), self.CROWN_HEIGHT
+        key = (kind, lazy.key, icon_width, crown_height, self.RULER_PIC_PATH)
+        add_crown = self.addCrown
+        return LazyPixmap.make(self.pixmap_cache, key, 
+                                lambda: (lazy.width(), lazy.height() + crown_height), 
+                                lambda: add_crown(lazy.get(), icon_width, crown_height), 
+                                lazy.sample or lazy.get)
+
+    @classmethod
+    def addCrown(cls, pixmap, icon_width, crown_height):
+        crown_px = cls.crownPixmap(crown_height)
+        crown_point = qtc.QPoint((icon_width-crown_px.width())/2, 0)
         
-        size = qtc.QSize(self.pixmap.width(), self.pixmap.height() + self.CROWN_HEIGHT)
-        char_rect = qtc.QRect(0, self.CROWN_HEIGHT, self.pixmap.width(), self.pixmap.height())
+        size = qtc.QSize(pixmap.width(), pixmap.height() + crown_height)
+        char_rect = qtc.QRect(0, crown_height, pixmap.width(), pixmap.height())
         result_px = qtg.QPixmap(size)
         result_px.fill(qtc.Qt.transparent)
         painter = qtg.QPainter(result_px)
         painter.setRenderHint(qtg.QPainter.TextAntialiasing)
         painter.setRenderHint(qtg.QPainter.SmoothPixmapTransform)
-        painter.drawPixmap(char_rect, self.pixmap)
+        painter.drawPixmap(char_rect, pixmap)
         painter.drawPixmap(crown_point, crown_px)
         painter.end()
-        self.img_ruler_pixmap = result_px
+        return result_px
+
+    @classmethod
+    def crownPixmap(cls, height):
+        def load():
+            img = qtg.QImage(cls.RULER_PIC_PATH)
+            img.convertTo(qtg.QImage.Format_ARGB32_Premultiplied)
+            return qtg.QPixmap.fromImage(img).scaledToHeight(height)
+        return cls.pixmap_cache.get(('crown', cls.RULER_PIC_PATH, height), load)
 
     def showRuler(self, ruler_state):
         if ruler_state:
             if self.current_display_mode == TREE_ICON_DISPLAY.IMAGE:
-                if not self.img_ruler_pixmap:
-                    self.buildImgRulerPix()
+                self.buildImgRulerPix()
                 self.prepareGeometryChange()
                 self.current_pixmap = self.img_ruler_pixmap
                 self.offset = (-self.current_pixmap.width() / 2, -self.current_pixmap.height() / 2 - self.CROWN_HEIGHT/2)
 
             elif self.current_display_mode == TREE_ICON_DISPLAY.NAME:
                 self.setNameDisplay()
-                if not self.name_ruler_pixmap:
-                    self.buildNameRulerPix()
+                self.buildNameRulerPix()
                 self.prepareGeometryChange()
                 self.current_pixmap = self.name_ruler_pixmap
                 self.offset = (-self.current_pixmap.width() / 2, -self.current_pixmap.height() / 2 - self.CROWN_HEIGHT/2)
@@ -333,37 +367,21 @@ class Character(qtw.QGraphicsWidget):
         else:
             self.current_pixmap = self.pixmap
             self.showRuler(False)
-        self.updateButtons()
+        self.pixmapChanged()
     
     def updatePixmapImage(self, pix=None):
         self.current_pixmap = self.pixmap
         self.offset = (-self.current_pixmap.width() / 2, -self.current_pixmap.height() / 2)
         
         
+    def pixmapChanged(self):
+        Character.pixmap_version += 1
+        self.updateButtons()
+
     def updateButtons(self):
-        pix_height = self.current_pixmap.height()
-        pix_width = self.current_pixmap.width()
-
-        self.add_desc_btn.resize(pix_width + 70, self.BUTTON_WIDTH)
-        self.del_desc_btn.resize(pix_width + 70, self.BUTTON_WIDTH)
-        self.add_partner_btn.resize(self.BUTTON_WIDTH, pix_height)
-        self.del_partner_btn.resize(self.BUTTON_WIDTH, pix_height)
-
-        if self.ruler and self.ruler_display_flag:
-            self.add_desc_btn.setPos(-pix_width/2 - self.BUTTON_WIDTH, 
-                                        pix_height/2 - self.CROWN_HEIGHT/2)
-            self.del_desc_btn.setPos(-pix_width/2 - self.BUTTON_WIDTH, 
-                        -pix_height/2 - self.CROWN_HEIGHT/2 - self.BUTTON_WIDTH - 9)
-            self.add_partner_btn.setPos(pix_width/2, -pix_height/2 - self.CROWN_HEIGHT/2)
-            self.del_partner_btn.setPos(-pix_width/2 - self.BUTTON_WIDTH, 
-                                        -pix_height/2 - self.CROWN_HEIGHT/2)
-        else:
-            self.add_desc_btn.setPos(-pix_width/2 - self.BUTTON_WIDTH, pix_height/2)
-            self.del_desc_btn.setPos(-pix_width/2 - self.BUTTON_WIDTH, 
-                                                -pix_height/2 - self.BUTTON_WIDTH - 9)
-            self.add_partner_btn.setPos(pix_width/2, -pix_height/2)
-            self.del_partner_btn.setPos(-pix_width/2 - self.BUTTON_WIDTH, -pix_height/2)
-        
+        controls = Character.hover_controls
+        if controls is not None and controls.target is self:
+            controls.place(self)
 
 
     ## Accessors and Mutators ##
@@ -402,6 +420,12 @@ class Character(qtw.QGraphicsWidget):
     
     def getHeight(self):
         return self.current_pixmap.height()
+
+    def paintedRect(self):
+        # Where paint() draws, in the parent's coordinates
+        x = self.x() + self.offset[0]
+        y = self.y() + self.offset[1]
+        return (x, y, x + self.current_pixmap.width(), y + self.current_pixmap.height())
     
     def addXOffset(self, offset):
         self.setX(self.x() + offset)
@@ -413,13 +437,27 @@ class Character(qtw.QGraphicsWidget):
 
     def paint(self, painter, option, widget):
         # self.pixmap.paint(painter, option, widget)
-        painter.drawPixmap(self.x() + self.offset[0], self.y() + self.offset[1], self.current_pixmap)
+        painter.drawPixmap(self.x() + self.offset[0], self.y() + self.offset[1], self.current_pixmap.get())
+
+    def glyph(self):
+        # Rect and colour to fill in place of paint() when zoomed too far out
+        # to make out the pixmap
+        x1, y1, x2, y2 = self.paintedRect()
+        return qtc.QRectF(x1, y1, x2 - x1, y2 - y1), self.glyphColor()
+
+    def glyphColor(self):
+        return self.current_pixmap.color()
 
     def boundingRect(self):
-        bounding_rect = self.current_pixmap.rect()
-        bounding_rect.translate(self.offset[0], self.offset[1])
-        bounding_rect.adjust(-35, -35, 35, 35)
-        return qtc.QRectF(bounding_rect)
+        # Asked for every character whenever its family is painted, so it is
+        # only worked out again once the pixmap or offset has changed
+        key = (self.current_pixmap.key, self.offset)
+        if self._bounds[0] != key:
+            bounding_rect = self.current_pixmap.rect()
+            bounding_rect.translate(self.offset[0], self.offset[1])
+            bounding_rect.adjust(-35, -35, 35, 35)
+            self._bounds = (key, qtc.QRectF(bounding_rect))
+        return self._bounds[1]
     
     def shape(self):
         path = qtg.QPainterPath()
@@ -439,6 +477,12 @@ class Character(qtw.QGraphicsWidget):
         # rem_parent_act = menu.addAction("Add parent")
         add_desc_act = menu.addAction("Add descendant")
         rem_char_act = menu.addAction("Delete character")
+        menu.addSeparator()
+        focus_act = menu.addAction("Focus on character")
+        collapse_act = None
+        if self.parent().hasDescendants(self):
+            collapsed = self.parent().isCollapsed(self)
+            collapse_act = menu.addAction("Expand descendants" if collapsed else "Collapse descendants")
         selected_act = menu.exec(event.screenPos())
         if selected_act == edit_act:
             self.parent().edit_char.emit(self.uniq_id)
@@ -454,6 +498,10 @@ class Character(qtw.QGraphicsWidget):
             self.parent().add_descendant.emit(self.uniq_id)
         elif selected_act == rem_char_act:
             self.parent().remove_character.emit(self.uniq_id)
+        elif selected_act == focus_act:
+            self.parent().focus_char.emit(self.uniq_id)
+        elif selected_act is not None and selected_act == collapse_act:
+            self.parent().collapse_char.emit(self.uniq_id)
         event.accept()
         # super(Character, self).contextMenuEvent(event)
         self.setCursor(qtc.Qt.PointingHandCursor)
@@ -461,19 +509,29 @@ class Character(qtw.QGraphicsWidget):
 
 
     def hoverEnterEvent(self, event):
-        self.add_desc_btn.setVisible(True)
-        self.del_desc_btn.setVisible(True)
-        self.add_partner_btn.setVisible(True)
-        self.del_partner_btn.setVisible(True)
+        Character.hoverControls().attach(self)
         super(Character, self).hoverEnterEvent(event)
     
     def hoverLeaveEvent(self, event):
-        self.add_desc_btn.setVisible(False)
-        self.del_desc_btn.setVisible(False)
-        self.add_partner_btn.setVisible(False)
-        self.del_partner_btn.setVisible(False)
+        if Character.hover_controls is not None and not self.isSelected():
+            Character.hover_controls.detach(self)
         super(Character, self).hoverLeaveEvent(event)
 
+    def itemChange(self, change, value):
+        # A selected character keeps the controls until it is deselected
+        if change == qtw.QGraphicsItem.ItemSelectedHasChanged:
+            if value:
+                Character.hoverControls().attach(self)
+            elif Character.hover_controls is not None and not self.isUnderMouse():
+                Character.hover_controls.detach(self)
+        return super(Character, self).itemChange(change, value)
+
+    @classmethod
+    def hoverControls(cls):
+        if cls.hover_controls is None or cls.hover_controls.isDeleted():
+            cls.hover_controls = HoverControls()
+        return cls.hover_controls
+
 
     ## Operator Overloads ##
 
@@ -489,12 +547,145 @@ class Character(qtw.QGraphicsWidget):
     def __eq__(self, other):
         if isinstance(other, uuid.UUID):
             return self.uniq_id == other
-        elif isinstance(other, Character):
-            return self.uniq_id == other.uniq_id
+        elif isinstance(other, (Character, FoldedCharacter)):
+            return self.uniq_id == other.getID()
         else:
             return self is other
 
 
+class FoldedCharacter:
+
+    # Stands in for a Character in a family's tree while it is folded away 
+    # under a collapsed ancestor: only the record it is built from once 
+    # that is expanded (see Family.setCollapsed), so no graphics item or 
+    # pixmaps are held for it. Equal to the Character with the same id
+
+    def __init__(self, char_dict, tree_id=None):
+        self._record = char_dict
+        self._tree_id = tree_id
+
+    def getID(self):
+        return self._record['char_id']
+
+    def getTreeID(self):
+        return self._tree_id
+
+    def setTreeID(self, tree_id):
+        self._tree_id = tree_id
+
+    def toDict(self):
+        return self._record
+
+    def __hash__(self):
+        return hash(self.getID())
+
+    def __eq__(self, other):
+        if isinstance(other, uuid.UUID):
+            return self.getID() == other
+        elif isinstance(other, (Character, FoldedCharacter)):
+            return self.getID() == other.getID()
+        else:
+            return self is other
+
+
+class HoverControls:
+
+    # One set of add/remove buttons, moved onto whichever Character is hovered
+    # or selected instead of every Character carrying its own four
+
+    BUTTON_STYLE = """
+                        QPushButton {{ 
+                            border-width: 3px;
+                            border-color: {color};
+                            border-style: outset;
+                            border-radius: 3px;
+                            color: {color};
+                            font: bold {font_size}px;
+                            background-color: rgba({rgb}, 40);
+                        }}
+                        QPushButton:pressed {{ 
+                            background-color: rgba({rgb}, 70);
+                            border-style: inset;
+                        }}"""
+
+    def __init__(self):
+        self.target = None
+        self.add_desc_btn = self.makeButton('+', "Add Descendant", 'green', '66, 245, 117', 26,
+                                lambda char: char.parent().add_descendant.emit(char.uniq_id))
+        self.del_desc_btn = self.makeButton('-', "Delete Character", 'red', '245, 66, 66', 32,
+                                lambda char: char.parent().remove_character.emit(char.uniq_id))
+        self.add_partner_btn = self.makeButton('+', "Add Partner", 'blue', '66, 197, 245', 26,
+                                lambda char: char.parent().add_partner.emit(char.uniq_id))
+        self.del_partner_btn = self.makeButton('-', "Remove Partner", 'yellow', '245, 218, 66', 28,
+                                lambda char: char.parent().remove_partnership[uuid.UUID].emit(char.uniq_id))
+        self.buttons = (self.add_desc_btn, self.del_desc_btn, self.add_partner_btn, self.del_partner_btn)
+
+    def makeButton(self, text, tip, color, rgb, font_size, action):
+        button = qtw.QPushButton(text)
+        button.setStyleSheet(self.BUTTON_STYLE.format(color=color, rgb=rgb, font_size=font_size))
+        button.clicked.connect(lambda: self.trigger(action))
+        proxy = qtw.QGraphicsProxyWidget()
+        proxy.setWidget(button)
+        proxy.setToolTip(tip)
+        proxy.setVisible(False)
+        return proxy
+
+    def trigger(self, action):
+        char = self.target
+        if char is not None:
+            # Let go first: the action may delete the character, and its child items with it
+            self.detach(char)
+            action(char)
+
+    def attach(self, char):
+        if self.target is not char:
+            self.target = char
+            for proxy in self.buttons:
+                proxy.setParentItem(char)
+        self.place(char)
+        for proxy in self.buttons:
+            proxy.setVisible(True)
+
+    def detach(self, char):
+        if self.target is not char:
+            return
+        self.target = None
+        for proxy in self.buttons:
+            proxy.setVisible(False)
+            proxy.setParentItem(None)
+            if proxy.scene():
+                proxy.scene().removeItem(proxy)
+
+    def isDeleted(self):
+        return sip.isdeleted(self.add_desc_btn)
+
+    def place(self, char):
+        pix_height = char.current_pixmap.height()
+        pix_width = char.current_pixmap.width()
+        button_width = Character.BUTTON_WIDTH
+        crown_height = Character.CROWN_HEIGHT
+
+        self.add_desc_btn.resize(pix_width + 70, button_width)
+        self.del_desc_btn.resize(pix_width + 70, button_width)
+        self.add_partner_btn.resize(button_width, pix_height)
+        self.del_partner_btn.resize(button_width, pix_height)
+
+        if char.ruler and char.ruler_display_flag:
+            self.add_desc_btn.setPos(-pix_width/2 - button_width, 
+                                        pix_height/2 - crown_height/2)
+            self.del_desc_btn.setPos(-pix_width/2 - button_width, 
+                        -pix_height/2 - crown_height/2 - button_width - 9)
+            self.add_partner_btn.setPos(pix_width/2, -pix_height/2 - crown_height/2)
+            self.del_partner_btn.setPos(-pix_width/2 - button_width, 
+                                        -pix_height/2 - crown_height/2)
+        else:
+            self.add_desc_btn.setPos(-pix_width/2 - button_width, pix_height/2)
+            self.del_desc_btn.setPos(-pix_width/2 - button_width, 
+                                                -pix_height/2 - button_width - 9)
+            self.add_partner_btn.setPos(pix_width/2, -pix_height/2)
+            self.del_partner_btn.setPos(-pix_width/2 - button_width, -pix_height/2)
+
+
 class CharacterView(qtw.QGraphicsWidget):
 
     closed = qtc.pyqtSignal()
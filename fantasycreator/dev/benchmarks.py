@@ -0,0 +1,1281 @@
+'''
+Micro-benchmarks for the tree/timeline data structures.
+
+Usage: python dev/benchmarks.py [benchmark ...]   (runs all when none given)
+'''
+
+# Built-in Modules
+import os
+import sys
+import time
+import uuid
+import random
+from itertools import groupby
+from collections import defaultdict
+
+# 3rd Party
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# User-defined Modules
+from hashList import HashList, InstanceMap
+from familyLayout import FamilyLayout, LayoutConfig
+from layoutPool import LayoutPool
+from worldPacking import ShelfPacker
+from treeStruct import Tree
+from family import Family
+from treeGraphics import TreeView
+from graphStruct import Graph   # dev/, next to this file
+
+BENCHMARKS = {}
+
+def benchmark(fn):
+    BENCHMARKS[fn.__name__] = fn
+    return fn
+
+FAILURES = [] # (benchmark, label) of every timing that raised, see report
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            fn(*args)
+        except Exception as err:
+            return err
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def report(name, results):
+    print(name)
+    for label, seconds in results:
+        if isinstance(seconds, Exception):
+            FAILURES.append((name, label))
+            print(f'    {label:<40}{"failed: " + repr(seconds):>12}')
+        else:
+            print(f'    {label:<40}{seconds * 1000:>12.3f} ms')
+
+
+class FakeInstance:
+    # Hashes and compares by id like Character / TimelineEntry
+
+    def __init__(self, _id):
+        self._id = _id
+
+    def getID(self):
+        return self._id
+
+    def __hash__(self):
+        return hash(self._id)
+
+    def __eq__(self, other):
+        if isinstance(other, uuid.UUID):
+            return self._id == other
+        elif isinstance(other, FakeInstance):
+            return self._id == other._id
+        return self is other
+
+
+@benchmark
+def instance_tracking(sizes=(500, 2000, 8000)):
+    random.seed(0)
+    for num_chars in sizes:
+        ids = [uuid.uuid4() for _ in range(num_chars)]
+        # Originals plus up to two mate clones each
+        instances = [FakeInstance(_id) for _id in ids for _ in range(random.randint(1, 3))]
+        # HashList.remove loses track of an id's other instances, so removal is 
+        # timed over originals only
+        originals = [FakeInstance(_id) for _id in ids]
+        removal_order = random.sample(originals, len(originals))
+        results = []
+        for container_type in (HashList, InstanceMap):
+            def fill():
+                container = container_type()
+                for instance in instances:
+                    container.add(instance)
+                return container
+
+            def search(container):
+                for _id in ids:
+                    container.search(_id)
+
+            def contains(container):
+                for instance in instances:
+                    instance in container
+
+            def remove():
+                container = container_type()
+                container.add(*originals)
+                for instance in removal_order:
+                    container.remove(instance)
+
+            filled = fill()
+            label = container_type.__name__
+            results.append((f'{label}.add', timed(fill)))
+            results.append((f'{label}.search', timed(search, filled)))
+            results.append((f'{label}.__contains__', timed(contains, filled)))
+            results.append((f'{label}.remove originals (+add)', timed(remove)))
+        report(f'instance_tracking: {num_chars} ids / {len(instances)} instances', results)
+
+
+class RosterFamily:
+    # Family's membership getters over plain instances
+
+    getAllMembers = Family.getAllMembers
+    getPartners = Family.getPartners
+    getMembersAndPartners = Family.getMembersAndPartners
+
+    def __init__(self, num_members):
+        self.members = InstanceMap()
+        self.partners = InstanceMap()
+        self.members.add(*(FakeInstance(uuid.uuid4()) for _ in range(num_members)))
+        self.partners.add(*(FakeInstance(uuid.uuid4()) for _ in range(num_members // 5)))
+        self._first_gen = [self.members.instances()[0], FakeInstance(uuid.uuid4())]
+        self._member_cache = (-1, [])
+        self._partner_cache = (-1, [])
+        self._roster_cache = (None, [])
+
+
+@benchmark
+def family_roster(sizes=(100, 1000, 10000), lookups=100):
+    # Flag toggles ask every family for its characters; edits in between are rare
+    for num_members in sizes:
+        family = RosterFamily(num_members)
+
+        def rebuilt():
+            for _ in range(lookups):
+                family.members.instances() + family.partners.instances() + [family._first_gen[1]]
+
+        def cached():
+            for _ in range(lookups):
+                family.getMembersAndPartners()
+
+        def cached_with_edits():
+            for _ in range(lookups):
+                family.partners.add(family._first_gen[1])
+                family.getMembersAndPartners()
+                family.partners.remove(family._first_gen[1])
+
+        report(f'family_roster: {num_members} members, {lookups} lookups', 
+                [('rebuilt lists', timed(rebuilt)),
+                 ('getMembersAndPartners', timed(cached)),
+                 ('getMembersAndPartners, edited between', timed(cached_with_edits))])
+
+
+class FakeCharacter:
+    # Just the parts of Character that Family's layout touches
+
+    def __init__(self, width=100):
+        self._id = uuid.uuid4()
+        self._width = width
+        self.current_pixmap = None
+        self._x = 0
+        self._y = 0
+
+    def getID(self):
+        return self._id
+
+    def getWidth(self):
+        return self._width
+
+    def x(self):
+        return self._x
+
+    def y(self):
+        return self._y
+
+    def setX(self, x):
+        self._x = x
+
+    def setY(self, y):
+        self._y = y
+
+    def setPos(self, x, y=None):
+        if y is None:   # QPointF
+            x, y = x.x(), x.y()
+        self._x = x
+        self._y = y
+
+    def addXOffset(self, offset):
+        self._x += offset
+
+    def addYOffset(self, offset):
+        self._y += offset
+
+    def setTreePos(self, pos):
+        pass
+
+    def setParentID(self, parent_id):
+        pass
+
+
+class LayoutFamily:
+    # Family's layout methods without the QGraphicsObject around them
+
+    FIXED_X = Family.FIXED_X
+    FIXED_Y = Family.FIXED_Y
+    DESC_DROPDOWN = Family.DESC_DROPDOWN
+    PARTNER_SPACING = Family.PARTNER_SPACING
+    EXPAND_CONSTANT = 20 # used to stretch tree horizontally
+    OFFSET_CONSTANT = 12 # used to streth each level based on number of sibs + height
+
+    set_grid = Family.set_grid
+    layout_job = Family.layout_job
+    receive_layout = Family.receive_layout
+    restore_layout = Family.restore_layout
+    layoutRecord = Family.layoutRecord
+    setSavedLayout = Family.setSavedLayout
+    finish_layout = Family.finish_layout
+    layout_changed = Family.layout_changed
+    forgetNode = Family.forgetNode
+    measureNode = Family.measureNode
+    layoutChildren = Family.layoutChildren
+    layoutScope = Family.layoutScope
+    rescope = Family.rescope
+    shownMates = Family.shownMates
+    apply_layout = Family.apply_layout
+
+    def __init__(self, num_members, explode=False):
+        from PyQt5.QtCore import QPointF
+
+        root = FakeCharacter()
+        self.tree = Tree(root)
+        self.graph = Graph()
+        self._id = uuid.uuid4()
+        self._tree_loc = QPointF(Family.ROOT_ANCHOR)
+        self._explode = explode
+        self._display_root_partner = False
+        self._first_gen = [root, None]
+        self._layout = None
+        self._layout_job = None
+        self._saved_layout = None
+        self._collapsed = set()
+        self._collapse_changed = set()
+        self._neighbourhood = None
+        self._layout_scope = None
+        self._scope = (None, -1, None)
+        self._unscoped = None
+        self._segments = np.zeros((0, 3, 4))
+        self._line_slots = []
+
+        nodes = [self.tree.getRoot()]
+        while len(nodes) < num_members:
+            parent = random.choice(nodes)
+            child = FakeCharacter(random.choice((100, 100, 160)))
+            self.tree.addNode(child, parent)
+            nodes.append(self.tree.getNode(child))
+            if explode and random.random() < 0.2:
+                self.tree.addMate(FakeCharacter(), uuid.uuid4(), nodes[-1])
+        self._size = len(nodes)
+
+    # Family's heuristic placement from before the tidy tree engine (familyLayout.py), 
+    # kept here to compare against
+    def set_grid_legacy(self):
+        from PyQt5 import QtCore as qtc
+
+        self.graph.clear()
+        q = [] 
+        fork_counter = 0
+        char_pos = 0    # counter to store traversal order: needed for save/open
+
+        bottom_x_pos = 0     
+        current_x = 0
+        current_height = 0
+        current_x_spacer = 0
+        root_relationship_node = False
+        offset_col = []
+
+        root_node = self.tree.getRoot()
+        root_char = root_node.getData()
+        root_char.setPos(self._tree_loc)
+        root_char.addYOffset(self.DESC_DROPDOWN)
+        root_id = root_char.getID()
+        root_char.setTreePos(char_pos)
+
+        # root relationships with no parent family
+        if self._display_root_partner and self._first_gen[1]: 
+            
+            num_partners = len(root_node.getMates())
+
+            start_x = int(-(0.5 * (num_partners) * self.PARTNER_SPACING))
+            midpoint = ((num_partners) * self.PARTNER_SPACING)/2
+            
+            # Add node to graph and queue
+            root_char.addXOffset(start_x)
+            self.graph.add_vertex(root_id, root_char)
+            q.insert(0, root_node)
+
+            # Create fork and add to graph
+            current_fork = f'fork{fork_counter}'
+            loc = qtc.QPointF()
+            loc.setX(root_char.x())
+            loc.setY(root_char.y() + self.DESC_DROPDOWN)
+            forkNode = Tree.Node(loc, current_height)
+            self.graph.add_vertex(current_fork, loc, False)
+            q.insert(0, forkNode)
+            # print(f'Fork0 at {loc}')
+
+            self.graph.add_edge(root_id, current_fork, self.DESC_DROPDOWN)
+            char_pos += 1
+            
+            bottom_x_pos = root_char.x() + midpoint
+            # Midpoint fork
+            middle_fork = self._id
+            loc = qtc.QPointF()
+            loc.setX(bottom_x_pos)
+            loc.setY(root_char.y() + self.DESC_DROPDOWN)
+            forkNode = Tree.Node(loc, current_height)
+            self.graph.add_vertex(middle_fork, loc, False)
+            q.insert(0, forkNode)
+            # print(f'Midpoint at {loc}')
+
+            self.graph.add_edge(middle_fork, f'fork{fork_counter}', self.FIXED_X)
+            fork_counter += 1
+
+            for index, char in enumerate(root_node.getMates()):
+                offset = ((index + 1) * self.PARTNER_SPACING)
+
+                # Add node to graph and queue
+                char.getData().setX(root_char.x() + offset)
+                char.getData().setY(root_char.y())
+                self.graph.add_vertex(char.getData().getID(), char.getData())
+
+
+                # Create fork and add to graph
+                current_fork = f'fork{fork_counter}'
+                loc = qtc.QPointF()
+                loc.setX(char.getData().x())
+                loc.setY(char.getData().y() + self.DESC_DROPDOWN)
+                forkNode = Tree.Node(loc, current_height)
+                self.graph.add_vertex(current_fork, loc, False)
+                q.insert(0, forkNode)
+                # print(f'Fork1 at {loc}')
+                self.graph.add_edge(char.getData().getID(), current_fork, self.DESC_DROPDOWN)
+                self.graph.add_edge(middle_fork, current_fork, self.FIXED_X)
+                fork_counter += 1
+                root_relationship_node = True
+
+        elif self._explode and self._first_gen[1]:
+            self.graph.add_vertex(self._id, root_char)
+            q.insert(0, self.tree.getRoot())
+            root_relationship_node = True
+
+        else:
+            self.graph.add_vertex(root_id, root_char)
+            q.insert(0, self.tree.getRoot())
+
+
+        char_pos += 1 
+        # current_height += 1
+
+        while q != []: 
+            count = len(q) 
+            while count != 0: 
+                count -= 1
+                temp_node = q[-1] 
+
+                # print(f'{q.pop()}')
+                q.pop()
+
+                if isinstance(temp_node.getData(), FakeCharacter):
+                    offset_col.append(temp_node)
+                
+                if temp_node.getChildren() != []:
+                    parent_char = temp_node.getData()
+                    
+                    if temp_node is root_node and root_relationship_node:
+                        parent_id = self._id
+                        parent_x = self.graph.get_vertex(parent_id).get_data().x()
+
+                    
+                    elif self._explode and temp_node.mates:
+                        # TODO: Only processes first partnership
+                        parent_id = temp_node.getPartnerships()[0][1]
+                        parent_x = self.graph.get_vertex(parent_id).get_data().x()
+                        # print(f'Parent: {parent_id} @ {parent_x}')
+                    
+                    
+                    else:
+                        parent_id = parent_char.getID()
+                        parent_x = parent_char.x()
+    
+                    
+                    
+                    num_children = len(temp_node.getChildren()) 
+                    current_height = temp_node.getHeight() + 1
+                    
+                    ratio_mult = - ((0.5) * (num_children - 1))
+
+                    # Create fork for current descendants
+                    current_fork = f'fork{fork_counter}'
+                    loc = qtc.QPointF()
+                    loc.setY(current_height * self.FIXED_Y + self._tree_loc.y())
+
+                    forkNode = Tree.Node(loc, current_height)
+                    self.graph.add_vertex(current_fork, loc, False)
+
+                    self.graph.add_edge(parent_id, current_fork, self.FIXED_Y)
+                    loc.setX(parent_x)
+                    q.insert(0, forkNode)
+                    fork_counter += 1
+
+                    current_x_spacer = self.calcXSpacer(current_height, num_children)
+
+                    for index, child_node in enumerate(temp_node.getChildren()):
+                        newFork = f'fork{fork_counter}'
+                        loc = qtc.QPointF()
+                        
+                        current_x = (ratio_mult * current_x_spacer) + parent_x
+
+
+                        loc.setY(current_height * self.FIXED_Y + self._tree_loc.y())
+                        loc.setX(current_x)
+                    
+                        # Create Fork node and add to grid
+                        forkNode = Tree.Node(loc, current_height)
+                        self.graph.add_vertex(newFork, loc, False)
+                        q.insert(0, forkNode)
+                        previous_fork = f'fork{fork_counter-1}'
+                        fork_counter += 1
+
+                        # Set child and add to grid
+                        child_char = child_node.getData()
+                        self.graph.add_vertex(child_char.getID(), child_char)
+                        child_char.setX(current_x)
+                        child_char.setY((current_height * self.FIXED_Y) + self._tree_loc.y())
+                        child_char.addYOffset(self.DESC_DROPDOWN)
+                        q.insert(0, child_node)
+
+                        # Connect child to fork
+                        self.graph.add_edge(newFork, child_char.getID(), self.DESC_DROPDOWN)
+                        child_char.setTreePos(char_pos)
+                        child_char.setParentID(parent_id)
+
+                        if num_children % 2 != 0 and index == num_children // 2:
+                            self.graph.add_edge(current_fork, newFork, self.FIXED_Y)
+                            
+                        else:
+                            if index == num_children / 2 - 1:
+                                # ratio_mult += 1  # "skipping" 0 
+                                self.graph.add_edge(newFork, current_fork, self.DESC_DROPDOWN)
+                            
+                            elif index == num_children / 2:
+                                self.graph.add_edge(newFork, current_fork, self.DESC_DROPDOWN)
+
+                        if index != 0:
+                            self.graph.add_edge(newFork, previous_fork, self.DESC_DROPDOWN)
+                        
+                        ratio_mult += 1
+                        char_pos += 1
+                        
+                    
+                        if self._explode and child_node.getMates() != []:
+                            num_partners = len(child_node.getMates())
+                            start_x = 0
+                            midpoint = ((num_partners) * self.PARTNER_SPACING)/2
+                            bottom_x_pos = child_char.x() + midpoint
+
+                            # Midpoint fork
+                            # TODO: Only processes first partnership
+                            middle_fork = child_node.getPartnerships()[0][1]
+                            loc = qtc.QPointF()
+                            loc.setX(bottom_x_pos)
+                            loc.setY(child_char.y())
+                            # print(f'Middle Fork: {middle_fork} @ {loc}')
+                            forkNode = Tree.Node(loc, current_height)
+                            self.graph.add_vertex(middle_fork, loc, False)
+
+                            q.insert(0, forkNode)
+                            self.graph.add_edge(middle_fork, child_char.getID(), self.PARTNER_SPACING)
+
+                            for index, char in enumerate(child_node.getMates()):
+                                offset = start_x + ((index + 1) * self.PARTNER_SPACING)
+
+                                 # Add node to graph and queue
+                                char.getData().setX(current_x)
+                                char.getData().setY(child_char.y())
+                                char.getData().addXOffset(offset)
+                                self.graph.add_vertex(char.getData().getID(), char.getData())
+                                # q.insert(0, char)
+                                # char_pos += 1
+                                self.graph.add_edge(char.getData().getID(), middle_fork, self.PARTNER_SPACING)
+
+
+        # Only need to offset if large enough fam
+        if self._size > 2:
+            # Preprocess post-order list generated from above
+            offset_col = list(reversed(sorted(offset_col, key=lambda x: x.position, reverse=True)))
+
+            pivots = [i for i in range(1, len(offset_col)) if offset_col[i].height!=offset_col[i-1].height]
+            pivots.insert(0, 0)
+
+            offset_col = [list(reversed(offset_col[pivots[i-1]:pivots[i]])) 
+                                if offset_col[pivots[i]].position==Tree.TreePos.RIGHT 
+                                else offset_col[pivots[i-1]:pivots[i]] for i in range(1, len(pivots))]
+            offset_col = [item for sublist in offset_col for item in sublist]
+
+            # Second walk to calculate offsets
+            offset_dict = defaultdict(lambda: 0)
+            current_orientation = -1 # -1 denotes left side of tree, 1 represents right
+            parent_offset = 0
+            current_height = 0
+            level_offset = 0
+            for parent, sibs_iter in groupby(offset_col, key=lambda x: x.parents[0]):
+                sibs = list(sibs_iter)
+
+                num_sibs = len(sibs)
+                if num_sibs == 1 and sibs[0] == root_node:
+                    continue
+                if parent == root_node:
+                    continue
+
+                calc_offset = (self.calcXOffset(parent.getHeight()+1, num_sibs))
+
+                if current_height != sibs[0].getHeight():
+                    current_height = sibs[0].getHeight()
+                    level_offset = 0
+
+                if sibs[0].position == Tree.TreePos.LEFT:
+                    if current_orientation > 0:
+                        current_orientation = -1
+                        level_offset = 0
+                    calc_offset *= -1
+                
+                else:
+                    if current_orientation < 0:
+                        current_orientation = 1
+                        level_offset = 0
+
+                new_fam = True
+                middle_child = np.ceil(num_sibs / 2) - 1
+                for index, node in enumerate(sibs):
+
+                    if new_fam:
+                        current_offset = level_offset + calc_offset
+                        new_fam = False
+
+                    children_offset = offset_dict[node]
+                    offset_dict[node] += current_offset
+                    
+                    for child in self.tree.getSubTreeNodes(node):
+                        offset_dict[child] += current_offset
+
+                    current_offset += children_offset
+
+                    if index == middle_child:
+                        parent_offset += offset_dict[node]
+
+                if parent and parent != root_node:
+                    offset_dict[parent] = parent_offset
+                parent_offset = 0
+                level_offset = (current_offset - level_offset)
+
+                
+            # Final walk to apply offsets
+            for node, offset in reversed(offset_dict.items()):
+                # print(f'Giving {node} an offset of {offset}')
+                node.getData().addXOffset(offset)
+                for mate in node.getMates():
+                    mate.getData().addXOffset(offset)
+
+            self.offset_grid()
+
+
+    def calcXSpacer(self, height, num_kids): 
+        return int((self.FIXED_X) / (height * num_kids) * self.EXPAND_CONSTANT)
+
+    def calcXOffset(self, height, num_sibs):
+        # return int((8 * descendants + 4 * num_sibs) / np.square(height)) * self.OFFSET_CONSTANT
+        return int(((num_sibs)) * self.OFFSET_CONSTANT) + (self.FIXED_X / height * (num_sibs))
+
+    def offset_grid(self):
+        mid_points = set()
+        root_node = self.tree.getRoot()
+        if root_node.getPartnerships():
+            mid_points.add(self._id)
+        for v in self.graph:
+            if v.is_valid(): # Character
+                for w in v.get_connections():
+                    if not w.is_valid() and w.get_id() not in mid_points: # Line
+                        if (v.get_weight(w) == self.PARTNER_SPACING):
+                            mid = self.calcPartnerMidpoint(w)
+                            w.get_data().setX(mid)
+                            mid_points.add(w.get_id())
+                        else:
+                            w.get_data().setX(v.get_data().x())
+            else: # Line
+                for w in v.get_connections():
+                    if not w.is_valid(): # Line
+                        if isinstance(w.get_id(), uuid.UUID) and w.get_id() not in mid_points:
+                            v.get_data().setX(w.get_data().x())
+                        elif w.get_data().y() != v.get_data().y():
+                            w.get_data().setX(v.get_data().x())
+                        
+
+
+    # WARNING: ONLY CALCS FIRST PARTNERSHIP
+    def calcPartnerMidpoint(self, mid):
+        chars = [x for x in mid.get_connections() if x.is_valid()]
+        char1 = chars[0].get_data()
+        char2 = chars[1].get_data()
+
+        min_x = min(char1.x(), char2.x())
+        del_x = abs(char1.x() - char2.x())
+        return min_x + (del_x / 2)
+
+
+@benchmark
+def tidy_layout(sizes=(100, 1000, 10000, 50000)):
+    for explode in (False, True):
+        random.seed(0)
+        for num_members in sizes:
+            family = LayoutFamily(num_members, explode)
+            def full():
+                family._layout = None
+                family.set_grid()
+
+            results = [('set_grid', timed(full)),
+                       ('set_grid_legacy', timed(family.set_grid_legacy))]
+            report(f'tidy_layout: {num_members} members, explode={explode}', results)
+
+
+@benchmark
+def incremental_layout(sizes=(1000, 10000, 50000), edits=50):
+    for explode in (False, True):
+        random.seed(0)
+        for num_members in sizes:
+            family = LayoutFamily(num_members, explode)
+            family.set_grid()
+            parents = random.sample(family.tree.getAllNodes(), edits)
+
+            def edit(change):
+                times = []
+                for parent in parents:
+                    change(parent)
+                    start = time.perf_counter()
+                    family.set_grid()
+                    times.append(time.perf_counter() - start)
+                times.sort()
+                return times[len(times) // 2], times[-1]
+
+            def full():
+                family._layout = None
+                family.set_grid()
+
+            results = [('full set_grid', timed(full))]
+            for label, change in (('adding a child', 
+                                    lambda parent: family.tree.addNode(FakeCharacter(), parent)),
+                                  ('removing a child', 
+                                    lambda parent: family.tree.removeNode(parent.getChildren()[-1].getData()))):
+                median, worst = edit(change)
+                results.append((f'set_grid after {label} (median)', median))
+                results.append((f'set_grid after {label} (worst)', worst))
+            report(f'incremental_layout: {num_members} members, explode={explode}', results)
+
+
+@benchmark
+def headless_layout(sizes=(1000, 10000, 50000, 200000)):
+    # FamilyLayout alone, on plain lists: no Qt objects involved
+    config = LayoutConfig(Family.FIXED_X, Family.FIXED_Y, Family.DESC_DROPDOWN, 
+                            Family.PARTNER_SPACING, 5000, 150, True, False)
+    random.seed(0)
+    for num_members in sizes:
+        children = [[] for _ in range(num_members)]
+        for v in range(1, num_members):
+            children[random.randrange(v)].append(v)
+        # Renumber breadth first so children are listed after their parents
+        order = [0]
+        for v in order:
+            order.extend(children[v])
+        number = {v: index for index, v in enumerate(order)}
+        children = [[number[w] for w in children[v]] for v in order]
+        width = [random.choice((100, 100, 160)) for _ in range(num_members)]
+        mate_widths = [(100,) if random.random() < 0.2 else () for _ in range(num_members)]
+
+        def build():
+            return FamilyLayout(config).build([list(kids) for kids in children], width, mate_widths)
+
+        layout = build()
+        def add_leaf():
+            parent = random.randrange(num_members)
+            v = layout.addNode(100)
+            layout.setNode(parent, layout.tree.children[parent] + [v])
+            layout.update()
+
+        report(f'headless_layout: {num_members} members', 
+                [('FamilyLayout.build', timed(build)),
+                 ('FamilyLayout.update after adding a child', timed(add_leaf))])
+
+
+@benchmark
+def saved_layout(sizes=(1000, 10000, 50000)):
+    # Opening a story: laying each family out vs reusing the layout saved with it
+    random.seed(0)
+    for num_members in sizes:
+        family = LayoutFamily(num_members, explode=True)
+        family.set_grid()
+        record = family.layoutRecord()
+
+        def full():
+            family._layout = None
+            family.set_grid()
+
+        def restored():
+            family._layout = None
+            family.setSavedLayout(record)
+            family.set_grid()
+
+        report(f'saved_layout: {num_members} members', 
+                [('set_grid', timed(full)),
+                 ('set_grid from a saved layout', timed(restored)),
+                 ('layoutRecord', timed(family.layoutRecord))])
+
+
+class AssemblyView:
+    # TreeView's tree assembly without the view around it
+
+    assembleTrees = TreeView.assembleTrees
+    connectFamilies = TreeView.connectFamilies
+
+    def __init__(self, num_chars, family_size=50):
+        from PyQt5.QtGui import QImage, QColor
+        from database import VolatileDB, DataFormatter
+        picture = QImage(180, 180, QImage.Format_ARGB32)
+        picture.fill(QColor('gray'))
+        database = VolatileDB()
+        self.meta_db = database.table('meta')
+        self.character_db = database.table('characters')
+        self.families_db = database.table('families')
+        self.kingdoms_db = database.table('kingdoms')
+        self.folds_db = database.table('folds')
+        null_id = uuid.uuid4()
+        self.meta_db.insert({'NULL_ID': null_id, 'TERM_ID': uuid.uuid4()})
+
+        # Families of `family_size` descendants, with every fifth character
+        # partnered to someone from another family
+        formatter = DataFormatter()
+        characters = []
+        fam_id = None
+        for index in range(num_chars):
+            if index % family_size == 0:
+                fam_id = uuid.uuid4()
+                self.families_db.insert(formatter.family_entry(f'Family {fam_id.hex[:6]}', 0, fam_id))
+                parent = null_id
+            else:
+                parent = random.choice(characters[-(index % family_size):])['char_id']
+            characters.append(formatter.char_entry({'name': f'Char {index}', 'parent_0': parent, 
+                                                    '__IMG__': picture}, fam_id))
+        singles = [char for char in characters if random.random() < 0.4]
+        for char, mate in zip(singles[::2], singles[1::2]):
+            if char['fam_id'] != mate['fam_id']:
+                rom_id = uuid.uuid4()
+                char['partnerships'] = [formatter.partnership_entry(mate['char_id'], rom_id)]
+                mate['partnerships'] = [formatter.partnership_entry(char['char_id'], rom_id)]
+        self.character_db.insert_multiple(characters)
+
+
+@benchmark
+def assemble_trees(sizes=(500, 2000, 8000)):
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    random.seed(0)
+    for num_chars in sizes:
+        view = AssemblyView(num_chars)
+
+        def assemble():
+            TreeView.MasterFamilies = {}
+            view.assembleTrees()
+
+        total = timed(assemble)
+        report(f'assemble_trees: {num_chars} characters', 
+                [('assembleTrees', total)] + view.assembly_timings)
+    TreeView.MasterFamilies = {}
+
+
+def resident_memory():
+    # Current resident set size in bytes (Linux); 0 where it can't be read
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+
+@benchmark
+def character_construction(sizes=(200, 1000, 4000)):
+    # Building the Characters of a synthetic tree, then hovering over a few of them
+    from PyQt5.QtGui import QImage, QColor
+    from PyQt5.QtWidgets import QApplication, QGraphicsScene
+    from database import DataFormatter
+    from character import Character
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    picture = QImage(180, 180, QImage.Format_ARGB32)
+    picture.fill(QColor('gray'))
+    formatter = DataFormatter()
+    for num_chars in sizes:
+        entries = [formatter.char_entry({'name': f'Char {index}', '__IMG__': picture}, uuid.uuid4())
+                        for index in range(num_chars)]
+        scene = QGraphicsScene()
+        before = resident_memory()
+        start = time.perf_counter()
+        characters = [Character(entry) for entry in entries]
+        built = time.perf_counter() - start
+        for char in characters:
+            scene.addItem(char)
+        grown = resident_memory() - before
+
+        def hover():
+            for char in characters[:100]:
+                Character.hoverControls().attach(char)
+                Character.hover_controls.detach(char)
+
+        report(f'character_construction: {num_chars} characters', 
+                [('Character()', built),
+                 ('attach/detach hover controls x100', timed(hover))])
+        print(f'    memory: {grown / 2**20:.1f} MiB, {grown / num_chars / 1024:.1f} KiB per character')
+        scene.clear()
+        Character.hover_controls = None
+
+
+@benchmark
+def display_toggles(sizes=(200, 1000, 4000)):
+    # Flipping icon mode and DISPLAY_RULERS over every character of a tree
+    from PyQt5.QtGui import QImage, QColor
+    from PyQt5.QtWidgets import QApplication
+    from database import DataFormatter
+    from character import Character
+    from flags import TREE_ICON_DISPLAY
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    random.seed(0)
+    formatter = DataFormatter()
+    names = [f'Name {index}' for index in range(200)]
+    for num_chars in sizes:
+        Character.pixmap_cache.clear()
+        pictures = [QImage(180, 180, QImage.Format_ARGB32) for _ in range(20)]
+        for picture in pictures:
+            picture.fill(QColor(random.randrange(0xffffff)))
+        characters = [Character(formatter.char_entry({'name': random.choice(names), 
+                                                        '__IMG__': random.choice(pictures),
+                                                        'ruler': random.random() < 0.3}, uuid.uuid4()))
+                        for _ in range(num_chars)]
+
+        def toggle():
+            for display_mode in (TREE_ICON_DISPLAY.NAME, TREE_ICON_DISPLAY.IMAGE):
+                for char in characters:
+                    char.setDisplayMode(display_mode)
+                for flag in (False, True):
+                    for char in characters:
+                        char.setRulerDisplay(flag)
+
+        cache = Character.pixmap_cache
+        report(f'display_toggles: {num_chars} characters', [('name/image, rulers off/on', timed(toggle))])
+        print(f'    cache: {len(cache.pixmaps)} pixmaps, {cache.size / 2**20:.1f} MiB, ' 
+                f'{cache.hits} hits, {cache.misses} misses')
+
+
+@benchmark
+def portrait_memory(sizes=(1000, 4000), visible=200):
+    # Characters with portraits of their own: memory taken by building them,
+    # then painting a screenful of them and then every one of them
+    from PyQt5.QtGui import QImage, QColor, QPainter
+    from PyQt5.QtWidgets import QApplication, QStyleOptionGraphicsItem
+    from database import DataFormatter
+    from character import Character
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    random.seed(0)
+    formatter = DataFormatter()
+    canvas = QImage(1600, 1000, QImage.Format_ARGB32_Premultiplied)
+    option = QStyleOptionGraphicsItem()
+    for num_chars in sizes:
+        Character.pixmap_cache.clear()
+        entries = []
+        for index in range(num_chars):
+            picture = QImage(180, 180, QImage.Format_ARGB32)
+            picture.fill(QColor(random.randrange(0xffffff)))
+            entries.append(formatter.char_entry({'name': f'Char {index}', '__IMG__': picture}, uuid.uuid4()))
+        before = resident_memory()
+        start = time.perf_counter()
+        characters = [Character(entry) for entry in entries]
+        built = time.perf_counter() - start
+        grown = resident_memory() - before
+
+        def paint(chars):
+            painter = QPainter(canvas)
+            for char in chars:
+                char.paint(painter, option, None)
+            painter.end()
+
+        first_paint = timed(paint, characters[:visible], repeat=1)
+        repaint = timed(paint, characters[:visible])
+        on_screen = Character.pixmap_cache.size
+        paint_all = timed(paint, characters, repeat=1)
+        report(f'portrait_memory: {num_chars} characters, {visible} on screen',
+                [('Character()', built),
+                 ('first paint of those on screen', first_paint),
+                 ('painting them again', repaint),
+                 ('painting every character', paint_all)])
+        print(f'    memory: {grown / 2**20:.1f} MiB building them, cache {on_screen / 2**20:.1f} MiB '
+                f'after painting those on screen, {Character.pixmap_cache.size / 2**20:.1f} MiB after all')
+        del characters
+    Character.pixmap_cache.clear()
+
+
+@benchmark
+def family_frames(sizes=(1000, 10000), frames=20):
+    # Time to paint one 1600 x 1000 frame of a family: panning across it at
+    # full size, and the whole family zoomed out to fit (as glyphs, and with
+    # level of detail switched off)
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtGui import QPainter
+    from PyQt5.QtWidgets import QApplication, QGraphicsScene, QGraphicsView
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    random.seed(0)
+    for num_chars in sizes:
+        view = AssemblyView(num_chars, family_size=num_chars)
+        TreeView.MasterFamilies = {}
+        view.assembleTrees()
+        family = next(iter(TreeView.MasterFamilies.values()))
+        family.set_grid()
+        family.build_tree()
+        scene = QGraphicsScene()
+        scene.addItem(family)
+        bounds = scene.itemsBoundingRect()
+        graphics_view = QGraphicsView(scene)
+        graphics_view.setRenderHints(QPainter.Antialiasing | QPainter.SmoothPixmapTransform)
+        graphics_view.resize(1600, 1000)
+        graphics_view.viewport().grab()
+
+        def pan():
+            graphics_view.resetTransform()
+            for step in range(frames):
+                graphics_view.centerOn(bounds.left() + bounds.width() * step / frames, bounds.center().y())
+                graphics_view.viewport().grab()
+
+        def whole():
+            graphics_view.fitInView(bounds, Qt.KeepAspectRatio)
+            graphics_view.viewport().grab()
+
+        panned = timed(pan)
+        zoomed_out = timed(whole)
+        detail_lod, Family.DETAIL_LOD = Family.DETAIL_LOD, 0
+        full_detail = timed(whole)
+        Family.DETAIL_LOD = detail_lod
+
+        def reindex():
+            family._paint_index = None
+            family._shape = None
+            family.paint_index()
+            family.shape()
+
+        report(f'family_frames: {num_chars} members', 
+                [('panning, per frame', panned / frames if isinstance(panned, float) else panned),
+                 ('whole family', zoomed_out),
+                 ('whole family, full detail', full_detail),
+                 ('paint index and shape after a layout', timed(reindex))])
+        graphics_view.close()
+        scene.removeItem(family)
+    TreeView.MasterFamilies = {}
+
+
+@benchmark
+def tiled_panning(sizes=(1000, 10000), frames=40):
+    # Per frame cost of panning a 1600 x 1000 TreeView across a family,
+    # painting the scene vs compositing prerendered tiles
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    random.seed(0)
+    for num_chars in sizes:
+        view = AssemblyView(num_chars, family_size=num_chars)
+        TreeView.MasterFamilies = {}
+        view.assembleTrees()
+        family = next(iter(TreeView.MasterFamilies.values()))
+        family.set_grid()
+        family.build_tree()
+        tree_view = TreeView()
+        tree_view.resize(1600, 1000)
+        tree_view.scene.add_family_to_scene(family)
+        scroll_bar = tree_view.horizontalScrollBar()
+        steps = [scroll_bar.minimum() + (scroll_bar.maximum() - scroll_bar.minimum()) * step // frames 
+                    for step in range(frames)]
+
+        def pan():
+            for value in steps:
+                scroll_bar.setValue(value)
+                if tree_view.tile_cache is not None:
+                    tree_view.tile_cache.navigate()
+                tree_view.viewport().grab()
+
+        painted = timed(pan)
+        tree_view.setTileCaching(True)
+        cache = tree_view.tile_cache
+        start = time.perf_counter()
+        for value in steps:
+            scroll_bar.setValue(value)
+            cache.navigate()
+            while cache.pending:
+                cache.render_pending()
+        warm_up = time.perf_counter() - start
+        tiled = timed(pan)
+        report(f'tiled_panning: {num_chars} members, {frames} frames', 
+                [('painting the scene, per frame', painted / frames),
+                 ('from tiles, per frame', tiled / frames),
+                 (f'rendering {len(cache.tiles)} tiles', warm_up)])
+        tree_view.setTileCaching(False)
+        tree_view.scene.removeItem(family)
+        tree_view.layout_pool.shutdown()
+    TreeView.MasterFamilies = {}
+
+
+@benchmark
+def minimap_updates(sizes=(2000, 10000), family_size=500):
+    # Bringing the mini-map up to date after one family changes: rendering
+    # the scene into a new thumbnail, redrawing the whole thumbnail, and only
+    # the part of it under that family
+    from PyQt5.QtGui import QImage, QPainter
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    random.seed(0)
+    for num_chars in sizes:
+        view = AssemblyView(num_chars, family_size=family_size)
+        TreeView.MasterFamilies = {}
+        view.assembleTrees()
+        tree_view = TreeView()
+        tree_view.resize(1600, 1000)
+        for family in TreeView.MasterFamilies.values():
+            family.set_grid()
+            family.build_tree()
+            tree_view.scene.add_family_to_scene(family)
+        tree_view.setTreeSpacing()
+        minimap = tree_view.minimap
+        world = minimap.worldRect()
+        changed = random.choice(tree_view.scene.current_families).sceneBoundingRect()
+
+        def scene_render():
+            image = QImage(minimap.size(), QImage.Format_ARGB32_Premultiplied)
+            painter = QPainter(image)
+            tree_view.scene.render(painter, source=world)
+            painter.end()
+
+        def incremental():
+            minimap.dirty = [changed]
+            minimap.refresh()
+
+        report(f'minimap_updates: {num_chars} members, {len(TreeView.MasterFamilies)} families',
+                [('QGraphicsScene.render', timed(scene_render)),
+                 ('whole thumbnail', timed(minimap.renderAll, world)),
+                 ('one family', timed(incremental))])
+        for family in TreeView.MasterFamilies.values():
+            tree_view.scene.removeItem(family)
+        tree_view.layout_pool.shutdown()
+    TreeView.MasterFamilies = {}
+
+
+@benchmark
+def focus_mode(sizes=(2000, 10000), family_size=500, radius=2):
+    # Scene items and rebuild time with the whole world shown, focused on one
+    # character, focused with the radius grown by one and leaving the focus,
+    # for families of family_size and for all of them in one family
+    from PyQt5.QtCore import QEventLoop
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    def settled(update):
+        # Families big enough for the layout pool are only placed once it is done
+        def run():
+            update()
+            if tree_view.layout_pool.isBusy():
+                loop = QEventLoop()
+                tree_view.layout_pool.all_done.connect(loop.quit)
+                loop.exec_()
+                tree_view.layout_pool.all_done.disconnect(loop.quit)
+        return run
+
+    random.seed(0)
+    for num_chars, size in [(num_chars, size) for num_chars in sizes for size in (family_size, num_chars)]:
+        view = AssemblyView(num_chars, family_size=size)
+        TreeView.MasterFamilies = {}
+        TreeView.CharacterList = InstanceMap()
+        view.assembleTrees()
+        tree_view = TreeView()
+        tree_view.resize(1600, 1000)
+        tree_view.meta_db = view.meta_db
+        tree_view.character_db = view.character_db
+        TreeView.CURRENT_FAMILIES = set(TreeView.MasterFamilies)
+        for family in TreeView.MasterFamilies.values():
+            family.setParent(tree_view)
+            TreeView.CharacterList.add(*family.getMembersAndPartners())
+        settled(tree_view.update_tree)()
+        full_items = len(tree_view.scene.items())
+        full = timed(settled(tree_view.update_tree))
+        char_id = random.choice(view.character_db.all())['char_id']
+
+        def focus():
+            tree_view.focus = None
+            tree_view.setFocusMode(char_id, radius)
+        focused = timed(settled(focus))
+        focus_items = len(tree_view.scene.items())
+
+        def expand():
+            tree_view.setFocusMode(char_id, radius)
+            tree_view.setFocusMode(char_id, radius + 1)
+        expanded = timed(settled(expand))
+        expand_items = len(tree_view.scene.items())
+        settled(tree_view.endFocusMode)()
+
+        def unfocus():
+            tree_view.setFocusMode(char_id, radius)
+            tree_view.endFocusMode()
+        unfocused = timed(settled(unfocus))
+
+        report(f'focus_mode: {num_chars} members, {len(TreeView.MasterFamilies)} families',
+                [(f'whole world ({full_items} items)', full),
+                 (f'focus, radius {radius} ({focus_items} items)', focused),
+                 (f'expand to {radius + 1} ({expand_items} items)', expanded),
+                 ('focus + end focus', unfocused)])
+        for family in TreeView.MasterFamilies.values():
+            tree_view.scene.removeItem(family)
+        tree_view.layout_pool.shutdown()
+    TreeView.MasterFamilies = {}
+    TreeView.CURRENT_FAMILIES = set()
+
+
+@benchmark
+def collapsed_subtrees(sizes=(2000, 10000)):
+    # One large family with the biggest branch under the root collapsed: 
+    # scene items, and the update after collapsing or expanding it next to 
+    # laying the family out from scratch. Then assembling the family with 
+    # the branch saved collapsed, whose characters are not built
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    random.seed(0)
+    for num_chars in sizes:
+        view = AssemblyView(num_chars, family_size=num_chars)
+        TreeView.MasterFamilies = {}
+        TreeView.CharacterList = InstanceMap()
+        view.assembleTrees()
+        tree_view = TreeView()
+        tree_view.resize(1600, 1000)
+        tree_view.character_db = view.character_db
+        tree_view.kingdoms_db = view.kingdoms_db
+        TreeView.CURRENT_FAMILIES = set(TreeView.MasterFamilies)
+        family = next(iter(TreeView.MasterFamilies.values()))
+        family.setParent(tree_view)
+        TreeView.CharacterList.add(*family.getMembersAndPartners())
+        family.set_grid()
+        tree_view.update_tree()
+        full_items = len(tree_view.scene.items())
+        branch = max(family.getRoot().getChildren(), key=lambda node: node.getNumDescendants())
+        char_id = branch.data.getID()
+
+        def relayout():
+            family._layout = None
+            family.set_grid()
+            tree_view.update_tree()
+
+        def toggle():
+            tree_view.toggleCollapse(char_id)
+            tree_view.toggleCollapse(char_id)
+        full = timed(relayout)
+        toggled = timed(toggle)
+        tree_view.toggleCollapse(char_id)
+        folded_items = len(tree_view.scene.items())
+        tree_view.toggleCollapse(char_id)
+        tree_view.scene.removeItem(family)
+        tree_view.layout_pool.shutdown()
+
+        def assemble():
+            TreeView.MasterFamilies = {}
+            view.assembleTrees()
+        assembled = timed(assemble)
+        view.folds_db.insert({'fam_id': family.getID(), 'char_ids': [char_id]})
+        assembled_folded = timed(assemble)
+        built = len(next(iter(TreeView.MasterFamilies.values())).getMembersAndPartners())
+        view.folds_db.truncate()
+
+        report(f'collapsed_subtrees: {num_chars} members, {branch.getNumDescendants() - 1} folded',
+                [(f'full layout ({full_items} items)', full),
+                 (f'collapse + expand ({folded_items} items collapsed)', toggled),
+                 ('assembleTrees', assembled),
+                 (f'assembleTrees, saved collapsed ({built} characters built)', assembled_folded)])
+    TreeView.MasterFamilies = {}
+    TreeView.CURRENT_FAMILIES = set()
+
+
+@benchmark
+def world_packing(sizes=(100, 1000, 10000)):
+    # Family boxes: a few generations tall, widths spread like real families
+    random.seed(0)
+    for num_families in sizes:
+        keys = [uuid.uuid4().hex for _ in range(num_families)]
+        widths = [random.lognormvariate(7, 1) for _ in range(num_families)]
+        heights = [600 + 300 * random.randint(0, 6) for _ in range(num_families)]
+        packer = ShelfPacker(300)
+
+        def alternating():
+            # The placement setTreeSpacing used before: widest first, alternating 
+            # left and right of the origin, all on one row
+            x = [0.0] * num_families
+            x_offset = 0
+            for count, index in enumerate(sorted(range(num_families), key=widths.__getitem__, reverse=True)):
+                x[index] = x_offset
+                x_offset = (-1) ** count * (abs(x_offset) + widths[index] * (2 / 3))
+            return np.asarray(x), np.zeros(num_families)
+
+        def extent(x, y):
+            right = np.asarray(x) + widths
+            bottom = np.asarray(y) + heights
+            return f'{right.max() - min(x):.0f} x {bottom.max() - min(y):.0f}'
+
+        old = alternating()
+        x, y = packer.pack(keys, widths, heights)
+        widths[num_families // 2] *= 1.1
+        moved_x, moved_y = packer.pack(keys, widths, heights)
+        moved = np.count_nonzero((moved_x != x) | (moved_y != y))
+        report(f'world_packing: {num_families} families', 
+                [('alternating rows', timed(alternating)),
+                 ('ShelfPacker.pack', timed(packer.pack, keys, widths, heights))])
+        print(f'    world: alternating {extent(*old)}, shelves {extent(x, y)};' 
+                f' {moved} families moved after widening one by 10%')
+
+
+@benchmark
+def parallel_layout(counts=(50, 200), num_members=1000):
+    # Full layouts of many independent families: on the GUI thread vs a LayoutPool
+    from PyQt5.QtCore import QCoreApplication, QEventLoop
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    pool = LayoutPool()
+    pool.executor().submit(int).result()    # start a worker up front
+    random.seed(0)
+    for num_families in counts:
+        families = [LayoutFamily(num_members, explode=True) for _ in range(num_families)]
+
+        def sequential():
+            for family in families:
+                family._layout = None
+                family.set_grid()
+
+        def pooled():
+            loop = QEventLoop()
+            pool.all_done.connect(loop.quit)
+            pool.layout_ready.connect(lambda job, layout: job.family.receive_layout(job, layout))
+            for family in families:
+                family._layout = None
+                family.set_grid(pool)
+            loop.exec_()
+            pool.all_done.disconnect()
+            pool.layout_ready.disconnect()
+
+        report(f'parallel_layout: {num_families} families of {num_members}', 
+                [('set_grid, one after another', timed(sequential)),
+                 (f'set_grid with a LayoutPool ({pool._workers} workers)', timed(pooled))])
+    pool.shutdown()
+
+
+if __name__ == '__main__':
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        BENCHMARKS[name]()
+    if FAILURES:
+        sys.exit(f'{len(FAILURES)} timing(s) failed: ' 
+                    + ', '.join(f'{name} / {label}' for name, label in FAILURES))
@@ -0,0 +1,213 @@
+"""
+Pure Python implementation of a graph class, which the family placement kept in
+benchmarks.py (LayoutFamily.set_grid_legacy) builds its connectors in
+"""
+from array import array
+
+import numpy as np
+
+class Graph:
+
+    class Vertex:
+
+        __slots__ = ('_id', '_index', 'data', 'valid', '_graph')
+
+        def __init__(self, u_id, index, graph, data=None, valid=False):
+            self._id = u_id
+            self._index = index
+            self._graph = graph
+            self.data = data
+            self.valid = valid  # doesn't necessarily mean empty  (3 children)
+
+        def __str__(self):
+            return (str(self._id) + ' adjacent: ' +
+                str([x._id for x in self.get_connections()]))
+
+        def is_valid(self):
+            return self.valid
+
+        def add_neighbor(self, neighbor, weight=0):
+            self._graph.add_edge(self._id, neighbor.get_id(), weight)
+
+        def get_connections(self):
+            vertices = self._graph.vertices
+            return [vertices[j] for j in self._graph.neighbors(self._index)]
+
+        def get_id(self):
+            return self._id
+
+        def get_index(self):
+            return self._index
+
+        def get_data(self):
+            return self.data
+
+        def get_weight(self, neighbor):
+            return self._graph.get_weight(self._index, neighbor.get_index())
+
+##------------------- Graph Defs -------------------------##
+
+    def __init__(self):
+        self.vert_dict = {}     # id -> Vertex
+        self.vertices = []      # index -> Vertex
+        self.num_vertices = 0
+
+        # Undirected edge list, in insertion order
+        self._src = array('q')
+        self._dst = array('q')
+        self._cost = array('d')
+        self._edge_index = {}
+
+        # Adjacency in CSR form, rebuilt lazily after edges are added
+        self._offsets = None
+        self._targets = None
+
+    def __iter__(self):
+        return iter(self.vert_dict.values())
+
+    def add_vertex(self, id, data=None, valid=True):
+        if (vertex := self.vert_dict.get(id)) is not None:
+            vertex.data = data
+            vertex.valid = valid
+            return vertex
+        new_vertex = self.Vertex(id, self.num_vertices, self, data, valid)
+        self.vert_dict[id] = new_vertex
+        self.vertices.append(new_vertex)
+        self.num_vertices = self.num_vertices + 1
+        self._offsets = None
+        return new_vertex
+
+    def get_vertex(self, n):
+        if n in self.vert_dict:
+            return self.vert_dict[n]
+        else:
+            return None
+
+    def _edge_key(self, u, v):
+        return (u << 32) | v if u <= v else (v << 32) | u
+
+    def add_edge(self, frm, to, cost = 0):
+        if frm not in self.vert_dict:
+            self.add_vertex(frm)
+        if to not in self.vert_dict:
+            self.add_vertex(to)
+
+        u = self.vert_dict[frm].get_index()
+        v = self.vert_dict[to].get_index()
+        key = self._edge_key(u, v)
+        if (edge := self._edge_index.get(key)) is not None:
+            self._cost[edge] = cost
+            return
+        self._edge_index[key] = len(self._src)
+        self._src.append(u)
+        self._dst.append(v)
+        self._cost.append(cost)
+        self._offsets = None
+
+    def get_weight(self, u, v):
+        return self._cost[self._edge_index[self._edge_key(u, v)]]
+
+    def _build_adjacency(self):
+        num_edges = len(self._src)
+        src = np.array(self._src, dtype=np.int64)
+        dst = np.array(self._dst, dtype=np.int64)
+        # Both directions of every edge (a self loop only once), ordered by
+        # vertex and then by when the edge was added
+        loops = src == dst
+        heads = np.concatenate((src, dst[~loops]))
+        tails = np.concatenate((dst, src[~loops]))
+        added = np.concatenate((np.arange(num_edges), np.flatnonzero(~loops)))
+        order = np.lexsort((added, heads))
+        self._targets = tails[order]
+        self._offsets = np.zeros(self.num_vertices + 1, dtype=np.int64)
+        np.cumsum(np.bincount(heads, minlength=self.num_vertices), out=self._offsets[1:])
+
+    def neighbors(self, u):
+        if self._offsets is None:
+            self._build_adjacency()
+        return self._targets[self._offsets[u]:self._offsets[u + 1]]
+
+    def edges(self):
+        return zip(self._src, self._dst)
+
+    def bfs(self, start):
+        if self._offsets is None:
+            self._build_adjacency()
+        offsets = self._offsets.tolist()
+        targets = self._targets.tolist()
+        seen = bytearray(self.num_vertices)
+        seen[start] = 1
+        order = [start]
+        for u in order:
+            for v in targets[offsets[u]:offsets[u + 1]]:
+                if not seen[v]:
+                    seen[v] = 1
+                    order.append(v)
+        return order
+
+    def bfs_edges(self, start):
+        # Every edge reachable from start exactly once, oriented away from
+        # whichever end the search reached first
+        if self._offsets is None:
+            self._build_adjacency()
+        offsets = self._offsets.tolist()
+        targets = self._targets.tolist()
+        rank = [-1] * self.num_vertices
+        rank[start] = 0
+        order = [start]
+        for u in order:
+            u_rank = rank[u]
+            for v in targets[offsets[u]:offsets[u + 1]]:
+                if rank[v] < 0:
+                    rank[v] = len(order)
+                    order.append(v)
+                if rank[v] >= u_rank:
+                    yield u, v
+
+    def get_vertices(self):
+        return self.vert_dict.keys()
+
+    def get_vertices_data(self):
+        return self.vert_dict.values()
+
+    def clear(self):
+        self.vert_dict.clear()
+        self.vertices.clear()
+        self.num_vertices = 0
+        self._src = array('q')
+        self._dst = array('q')
+        self._cost = array('d')
+        self._edge_index.clear()
+        self._offsets = None
+        self._targets = None
+
+# if __name__ == '__main__':
+
+#     g = Graph()
+
+#     g.add_vertex('a')
+#     g.add_vertex('b')
+#     g.add_vertex('c')
+#     g.add_vertex('d')
+#     g.add_vertex('e')
+#     g.add_vertex('f')
+
+#     g.add_edge('a', 'b', 7)  
+#     g.add_edge('a', 'c', 9)
+#     g.add_edge('a', 'f', 14)
+#     g.add_edge('b', 'c', 10)
+#     g.add_edge('b', 'd', 15)
+#     g.add_edge('c', 'd', 11)
+#     g.add_edge('c', 'f', 2)
+#     g.add_edge('d', 'e', 6)
+#     g.add_edge('e', 'f', 9)
+
+#     for v in g:
+#         for w in v.get_connections():
+#             vid = v.get_id()
+#             wid = w.get_id()
+#             print ('( %s , %s, %3d)' % ( vid, wid, v.get_weight(w)))
+
+#     for v in g:
+#         print('g.vert_dict[%s]=%s' %(v.get_id(), g.vert_dict[v.get_id()]))
+   
\ No newline at end of file
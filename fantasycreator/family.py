@@ -6,22 +6,41 @@ from PyQt5 import QtCore as qtc
 
 # Built-in Modules
 import uuid
+import hashlib
 import numpy as np
 from collections import deque 
-from itertools import groupby
-from collections import defaultdict
 
 # 3rd Party
 from tinydb import where
 
 # User-defined Modules
 from treeStruct import Tree
-from graphStruct import Graph
-from hashList import HashList
-from character import Character
+from familyLayout import LayoutConfig, buildLayout
+from hashList import InstanceMap
+from character import Character, FoldedCharacter
+from spatialIndex import GridIndex
 from flags import FAM_TYPE
 
 
+class LayoutJob:
+    # Full layout of a family's tree, numbered as it was when requested
+
+    def __init__(self, family, nodes, index, pixmaps, args):
+        self.family = family
+        self.nodes = nodes      # layout number -> tree node
+        self.index = index      # tree node -> layout number
+        self.pixmaps = pixmaps
+        self.args = args        # for familyLayout.buildLayout
+
+    def structureHash(self):
+        config, children, width, mate_widths = self.args
+        ids = [node.data.getID().hex for node in self.nodes]
+        return hashlib.sha1(repr((ids, children, width, mate_widths)).encode()).hexdigest()
+
+    def prefsHash(self):
+        return hashlib.sha1(repr(tuple(self.args[0])).encode()).hexdigest()
+
+
 class Family(qtw.QGraphicsObject):
 
     edit_char = qtc.pyqtSignal(uuid.UUID)
@@ -34,8 +53,11 @@ class Family(qtw.QGraphicsObject):
     remove_parent = qtc.pyqtSignal(uuid.UUID)
     tree_moved = qtc.pyqtSignal()
     delete_fam = qtc.pyqtSignal(uuid.UUID)
+    focus_char = qtc.pyqtSignal(uuid.UUID)
+    collapse_char = qtc.pyqtSignal(uuid.UUID)
 
     ROOT_ANCHOR = qtc.QPointF(5000, 150) # default "origin point"
+    DETAIL_LOD = 0.25 # screen pixels per scene unit below which characters are drawn as glyphs
 
     def __init__(self, first_gen, family_id, family_type=FAM_TYPE.NULL_TERM, family_name=None, pos=None, parent=None):
         super(Family, self).__init__(parent)
@@ -49,14 +71,43 @@ class Family(qtw.QGraphicsObject):
         self._display_root_partner = False
         self._explode = False
         self.tree = Tree(first_gen[0])
-        self.graph = Graph()
+        self._layout = None             # FamilyLayout of the tree as last placed
+        self._layout_job = None         # full layout waiting on a LayoutPool
+        self._saved_layout = None       # layouts table record to try first
+        self._layout_nodes = []         # layout number -> tree node
+        self._layout_index = {}         # tree node -> layout number
+        self._layout_added = []
+        self._layout_pixmaps = []       # layout number -> pixmap the node was measured on
+        self._layout_scope = None       # tree nodes the layout is limited to, see layoutScope
+        self._scope = (None, -1, None)  # (neighbourhood, tree version, nodes) behind layoutScope
+        self._unscoped = None           # the whole family's layout, put aside while focused
+        self._segments = np.zeros((0, 3, 4))    # connector rows as last turned into lines
+        self._line_slots = []
+        self._lines = []                # QLineFs of the valid connector rows, in row order
+        self._line_array = np.zeros((0, 4))     # the same lines as x1, y1, x2, y2 rows
+        self._line_rows = np.zeros(0, dtype=np.int64)  # their rows in the flattened segments
         self.midpoints = {}
-        self.members = HashList()
-        self.partners = HashList()
-        self.filtered = HashList()
+        self.members = InstanceMap()
+        self.partners = InstanceMap()
+        self._member_cache = (-1, [])   # (members.version, list) behind getAllMembers
+        self._partner_cache = (-1, [])
+        self._roster_cache = (None, [])
+        self.filtered = InstanceMap()
+        self._neighbourhood = None      # ids of the characters left in the scene, see setNeighbourhood
+        self._collapsed = set()         # tree nodes whose descendants are folded away
+        self._collapse_changed = set()  # collapsed or expanded since the last set_grid
+        self._hidden = {}               # id(char) -> character taken out by updateHidden
+        self._hidden_for = (None, 0)    # (neighbourhood, tree version) _hidden was worked out for
+        self._hidden_version = 0
 
         self.current_lines = []
+        self.current_line_array = np.zeros((0, 4))  # current_lines, for the paint index
+        self._shape = None
+        self._paint_index = None        # what paint() draws, indexed by where it is
+        self._glyphs = (None, [])       # low detail stand-ins for the characters in it
         self.linePen = qtg.QPen(qtg.QColor('black'), 3)
+        self.foldBrush = qtg.QBrush(qtg.QColor(252, 221, 160))
+        self.foldFont = qtg.QFont('Didot', 20)
         # self.namePen = qtg.QPen(qtg.QColor('black'), 2)
         self.font = qtg.QFont('Didot', 45, italic=True)
         self.font_metric = qtg.QFontMetrics(self.font)
@@ -66,7 +117,9 @@ class Family(qtw.QGraphicsObject):
         self.name_graphic.setParentItem(self)
         self._name_display = True
 
-        self.setFlags(qtw.QGraphicsItem.ItemIsMovable)
+        # exposedRect is only filled in for paint() with the extended option
+        self.setFlags(qtw.QGraphicsItem.ItemIsMovable | 
+                        qtw.QGraphicsItem.ItemUsesExtendedStyleOption)
 
         self.members.add(self._first_gen[0])
         
@@ -81,9 +134,10 @@ class Family(qtw.QGraphicsObject):
 
     def initFirstGen(self):
         # self._first_gen[0].setZValue(2)
-        self._first_gen[0].setParent(self)
-        self._first_gen[0].setParentItem(self)
-        if self._display_root_partner and self._first_gen[1]:
+        if not self.isHidden(self._first_gen[0]):
+            self._first_gen[0].setParent(self)
+            self._first_gen[0].setParentItem(self)
+        if self._display_root_partner and self._first_gen[1] and not self.isHidden(self._first_gen[1]):
             # self._first_gen[1].setZValue(2)
             self._first_gen[1].setParent(self)
             self._first_gen[1].setParentItem(self)
@@ -92,11 +146,13 @@ class Family(qtw.QGraphicsObject):
 
     def addChild(self, child, parent):
         self.tree.addNode(child, self.tree.getNode(parent))
-        self.members.add(child)
         child.setTreeID(self._id)
+        self._size += 1
+        if isinstance(child, FoldedCharacter):
+            return
+        self.members.add(child)
         child.setParent(self)
         child.setParentItem(self)
-        self._size += 1
 
     def addChildRelationship(self, child, parent):
         self.tree.addNode(child, self.tree.getNode(parent))
@@ -113,9 +169,15 @@ class Family(qtw.QGraphicsObject):
         return False
 
     def addMate(self, mate, r_id, fam_member):
+        node = self.tree.getNode(fam_member)
+        if isinstance(node.data, FoldedCharacter):
+            # folded away with fam_member until its branch is expanded
+            mate_clone = FoldedCharacter(mate.toDict(), self._id)
+            self.tree.addMate(mate_clone, r_id, node)
+            return mate_clone
         mate_clone = Character(mate.toDict())
         mate_clone.setTreeID(self._id)
-        self.tree.addMate(mate_clone, r_id, self.tree.getNode(fam_member))
+        self.tree.addMate(mate_clone, r_id, node)
         if fam_member == self.tree.root.getData() and self._first_gen[1] is None:
             self._first_gen[1] = mate_clone
         else:
@@ -175,14 +237,29 @@ class Family(qtw.QGraphicsObject):
     def getChildren(self, parent):
         return self.tree.getNode(parent).getChildren()
 
+    # The lists below are cached until membership changes: don't modify them
     def getAllMembers(self):
-        return self.members.arr
+        if self._member_cache[0] != self.members.version:
+            self._member_cache = (self.members.version, self.members.instances())
+        return self._member_cache[1]
 
     def getMembersAndPartners(self):
-        if self._first_gen[1]:
-            return self.members.arr + self.partners.arr + [self._first_gen[1]]
-        else:
-            return self.members.arr + self.partners.arr
+        key = (self.members.version, self.partners.version, id(self._first_gen[1]))
+        if self._roster_cache[0] != key:
+            roster = self.getAllMembers() + self.getPartners()
+            if self._first_gen[1]:
+                roster.append(self._first_gen[1])
+            self._roster_cache = (key, roster)
+        return self._roster_cache[1]
+
+    def getFoldedIDs(self):
+        # Ids of the members folded away under collapsed characters, which 
+        # have no Character until expanded (see setCollapsed)
+        return list({node.data.getID() for collapsed in self._collapsed 
+                        for node in collapsed.iterSubTree()})
+
+    def getCollapsedIDs(self):
+        return [node.data.getID() for node in self._collapsed if self.tree.getNode(node.data) is node]
 
     def getMember(self, member):
         return self.tree.getNode(member)
@@ -191,7 +268,9 @@ class Family(qtw.QGraphicsObject):
         return self.tree.getRoot()
     
     def getPartners(self):
-        return self.partners.arr
+        if self._partner_cache[0] != self.partners.version:
+            self._partner_cache = (self.partners.version, self.partners.instances())
+        return self._partner_cache[1]
 
     def getRootPos(self):
         return self._tree_loc
@@ -309,7 +388,7 @@ class Family(qtw.QGraphicsObject):
                 print(f'Removing partner: {char}')
                 self.scene().removeItem(char)
                 partners = [c.getData() for c in char_node.getMates()]
-                member = set(self.members.arr).intersection(partners).pop()
+                member = next(mate for mate in partners if mate in self.members)
                 partner_removal = self.removeMate(member, char)
                 # self.remove_partnership[uuid.UUID, uuid.UUID].emit(char_id, char.getID())
                 self.partners.remove(char)
@@ -327,7 +406,7 @@ class Family(qtw.QGraphicsObject):
                 print(f'Removing family head: {char}')
                 self.scene().removeItem(char)
                 partners = [c.getData() for c in char_node.getMates()]
-                member = set(self.members.arr).intersection(partners).pop()
+                member = next(mate for mate in partners if mate in self.members)
                 partner_removal = self.removeMate(member, char)
                 # self.remove_partnership[uuid.UUID, uuid.UUID].emit(char_id, char.getID())
                 self.partners.remove(char)
@@ -366,8 +445,7 @@ class Family(qtw.QGraphicsObject):
         if remaining_char != self._first_gen[0]:
             self._first_gen[0], self._first_gen[1] = self._first_gen[1], self._first_gen[0]
             old_root = self.members.search(removed_char)[0]
-            root_node = self.tree.getRoot()
-            root_node.mates = [(x, y) for (x, y) in root_node.mates if x.getData() != self._first_gen[0]]
+            self.tree.removeMate(removed_char, self._first_gen[0])
             self.tree.replaceNode(removed_char, self._first_gen[0])
             self._first_gen[0].setTreeID(self._id)
             self._first_gen[0].setParent(self)
@@ -393,7 +471,8 @@ class Family(qtw.QGraphicsObject):
         
 
     def installFilters(self):
-        self._first_gen[0].installSceneEventFilter(self)
+        if self._first_gen[0].scene():
+            self._first_gen[0].installSceneEventFilter(self)
         self.setNameDisplay(self._name_display)
         
 
@@ -421,456 +500,474 @@ class Family(qtw.QGraphicsObject):
     DESC_DROPDOWN = 125
     PARTNER_SPACING = 200
 
-    EXPAND_CONSTANT = 20 # used to stretch tree horizontally
-    OFFSET_CONSTANT = 12 # used to streth each level based on number of sibs + height
-
-
-    # Workhorse function to create graph struct from tree
-    def set_grid(self):
-        self.graph.clear()
-        q = [] 
-        fork_counter = 0
-        char_pos = 0    # counter to store traversal order: needed for save/open
-
-        bottom_x_pos = 0     
-        current_x = 0
-        current_height = 0
-        current_x_spacer = 0
-        root_relationship_node = False
-        offset_col = []
-
-        root_node = self.tree.getRoot()
-        root_char = root_node.getData()
-        root_char.setPos(self._tree_loc)
-        root_char.addYOffset(self.DESC_DROPDOWN)
-        root_id = root_char.getID()
-        root_char.setTreePos(char_pos)
-
-        # root relationships with no parent family
-        if self._display_root_partner and self._first_gen[1]: 
-            
-            num_partners = len(root_node.getMates())
-
-            start_x = int(-(0.5 * (num_partners) * self.PARTNER_SPACING))
-            midpoint = ((num_partners) * self.PARTNER_SPACING)/2
-            
-            # Add node to graph and queue
-            root_char.addXOffset(start_x)
-            self.graph.add_vertex(root_id, root_char)
-            q.insert(0, root_node)
-
-            # Create fork and add to graph
-            current_fork = f'fork{fork_counter}'
-            loc = qtc.QPointF()
-            loc.setX(root_char.x())
-            loc.setY(root_char.y() + self.DESC_DROPDOWN)
-            forkNode = Tree.Node(loc, current_height)
-            self.graph.add_vertex(current_fork, loc, False)
-            q.insert(0, forkNode)
-            # print(f'Fork0 at {loc}')
-
-            self.graph.add_edge(root_id, current_fork, self.DESC_DROPDOWN)
-            char_pos += 1
-            
-            bottom_x_pos = root_char.x() + midpoint
-            # Midpoint fork
-            middle_fork = self._id
-            loc = qtc.QPointF()
-            loc.setX(bottom_x_pos)
-            loc.setY(root_char.y() + self.DESC_DROPDOWN)
-            forkNode = Tree.Node(loc, current_height)
-            self.graph.add_vertex(middle_fork, loc, False)
-            q.insert(0, forkNode)
-            # print(f'Midpoint at {loc}')
-
-            self.graph.add_edge(middle_fork, f'fork{fork_counter}', self.FIXED_X)
-            fork_counter += 1
-
-            for index, char in enumerate(root_node.getMates()):
-                offset = ((index + 1) * self.PARTNER_SPACING)
-
-                # Add node to graph and queue
-                char.getData().setX(root_char.x() + offset)
-                char.getData().setY(root_char.y())
-                self.graph.add_vertex(char.getData().getID(), char.getData())
-
-
-                # Create fork and add to graph
-                current_fork = f'fork{fork_counter}'
-                loc = qtc.QPointF()
-                loc.setX(char.getData().x())
-                loc.setY(char.getData().y() + self.DESC_DROPDOWN)
-                forkNode = Tree.Node(loc, current_height)
-                self.graph.add_vertex(current_fork, loc, False)
-                q.insert(0, forkNode)
-                # print(f'Fork1 at {loc}')
-                self.graph.add_edge(char.getData().getID(), current_fork, self.DESC_DROPDOWN)
-                self.graph.add_edge(middle_fork, current_fork, self.FIXED_X)
-                fork_counter += 1
-                root_relationship_node = True
-
-        elif self._explode and self._first_gen[1]:
-            self.graph.add_vertex(self._id, root_char)
-            q.insert(0, self.tree.getRoot())
-            root_relationship_node = True
 
+    # Workhorse function to place the tree's characters and connectors. With a 
+    # LayoutPool, a full layout of a large tree is computed by a worker and only
+    # placed once it is handed back to receive_layout(); returns whether the
+    # characters have been placed
+    def set_grid(self, pool=None):
+        config = LayoutConfig(self.FIXED_X, self.FIXED_Y, self.DESC_DROPDOWN, self.PARTNER_SPACING, 
+                                self._tree_loc.x(), self._tree_loc.y(), self._explode, 
+                                bool(self._display_root_partner and self._first_gen[1]))
+        changed, restructured = self.tree.popChanges()
+        changed.update(self._collapse_changed)
+        self._collapse_changed = set()
+        scope = self.layoutScope()
+        if scope != self._layout_scope:
+            if self.rescope(scope, config, bool(changed or restructured)):
+                return True
+            restructured = True
+        if (restructured or self._layout is None or self._layout_job is not None 
+                or config != self._layout.config):
+            job = self.layout_job(config)
+            if self.restore_layout(job):
+                return True
+            if pool is not None and len(job.nodes) >= pool.MIN_MEMBERS:
+                self._layout_job = job
+                pool.submit(job)
+                return False
+            self.finish_layout(job)
         else:
-            self.graph.add_vertex(root_id, root_char)
-            q.insert(0, self.tree.getRoot())
-
-
-        char_pos += 1 
-        # current_height += 1
-
-        while q != []: 
-            count = len(q) 
-            while count != 0: 
-                count -= 1
-                temp_node = q[-1] 
-
-                # print(f'{q.pop()}')
-                q.pop()
-
-                if isinstance(temp_node.getData(), Character):
-                    offset_col.append(temp_node)
-                
-                if temp_node.getChildren() != []:
-                    parent_char = temp_node.getData()
-                    
-                    if temp_node is root_node and root_relationship_node:
-                        parent_id = self._id
-                        parent_x = self.graph.get_vertex(parent_id).get_data().x()
-
-                    
-                    elif self._explode and temp_node.mates:
-                        # TODO: Only processes first partnership
-                        parent_id = temp_node.getPartnerships()[0][1]
-                        parent_x = self.graph.get_vertex(parent_id).get_data().x()
-                        # print(f'Parent: {parent_id} @ {parent_x}')
-                    
-                    
-                    else:
-                        parent_id = parent_char.getID()
-                        parent_x = parent_char.x()
-    
-                    
-                    
-                    num_children = len(temp_node.getChildren()) 
-                    current_height = temp_node.getHeight() + 1
-                    
-                    ratio_mult = - ((0.5) * (num_children - 1))
-
-                    # Create fork for current descendants
-                    current_fork = f'fork{fork_counter}'
-                    loc = qtc.QPointF()
-                    loc.setY(current_height * self.FIXED_Y + self._tree_loc.y())
-
-                    forkNode = Tree.Node(loc, current_height)
-                    self.graph.add_vertex(current_fork, loc, False)
-
-                    self.graph.add_edge(parent_id, current_fork, self.FIXED_Y)
-                    loc.setX(parent_x)
-                    q.insert(0, forkNode)
-                    fork_counter += 1
-
-                    current_x_spacer = self.calcXSpacer(current_height, num_children)
-
-                    for index, child_node in enumerate(temp_node.getChildren()):
-                        newFork = f'fork{fork_counter}'
-                        loc = qtc.QPointF()
-                        
-                        current_x = (ratio_mult * current_x_spacer) + parent_x
-
+            self.layout_changed(changed)
+            if len(self._layout_nodes) > 2 * len(self._layout_index):
+                self.compact_layout()
+            else:
+                self.apply_layout()
+        return True
 
-                        loc.setY(current_height * self.FIXED_Y + self._tree_loc.y())
-                        loc.setX(current_x)
-                    
-                        # Create Fork node and add to grid
-                        forkNode = Tree.Node(loc, current_height)
-                        self.graph.add_vertex(newFork, loc, False)
-                        q.insert(0, forkNode)
-                        previous_fork = f'fork{fork_counter-1}'
-                        fork_counter += 1
-
-                        # Set child and add to grid
-                        child_char = child_node.getData()
-                        self.graph.add_vertex(child_char.getID(), child_char)
-                        child_char.setX(current_x)
-                        child_char.setY((current_height * self.FIXED_Y) + self._tree_loc.y())
-                        child_char.addYOffset(self.DESC_DROPDOWN)
-                        q.insert(0, child_node)
-
-                        # Connect child to fork
-                        self.graph.add_edge(newFork, child_char.getID(), self.DESC_DROPDOWN)
-                        child_char.setTreePos(char_pos)
-                        child_char.setParentID(parent_id)
-
-                        if num_children % 2 != 0 and index == num_children // 2:
-                            self.graph.add_edge(current_fork, newFork, self.FIXED_Y)
-                            
-                        else:
-                            if index == num_children / 2 - 1:
-                                # ratio_mult += 1  # "skipping" 0 
-                                self.graph.add_edge(newFork, current_fork, self.DESC_DROPDOWN)
-                            
-                            elif index == num_children / 2:
-                                self.graph.add_edge(newFork, current_fork, self.DESC_DROPDOWN)
-
-                        if index != 0:
-                            self.graph.add_edge(newFork, previous_fork, self.DESC_DROPDOWN)
-                        
-                        ratio_mult += 1
-                        char_pos += 1
-                        
-                    
-                        if self._explode and child_node.getMates() != []:
-                            num_partners = len(child_node.getMates())
-                            start_x = 0
-                            midpoint = ((num_partners) * self.PARTNER_SPACING)/2
-                            bottom_x_pos = child_char.x() + midpoint
-
-                            # Midpoint fork
-                            # TODO: Only processes first partnership
-                            middle_fork = child_node.getPartnerships()[0][1]
-                            loc = qtc.QPointF()
-                            loc.setX(bottom_x_pos)
-                            loc.setY(child_char.y())
-                            # print(f'Middle Fork: {middle_fork} @ {loc}')
-                            forkNode = Tree.Node(loc, current_height)
-                            self.graph.add_vertex(middle_fork, loc, False)
-
-                            q.insert(0, forkNode)
-                            self.graph.add_edge(middle_fork, child_char.getID(), self.PARTNER_SPACING)
-
-                            for index, char in enumerate(child_node.getMates()):
-                                offset = start_x + ((index + 1) * self.PARTNER_SPACING)
-
-                                 # Add node to graph and queue
-                                char.getData().setX(current_x)
-                                char.getData().setY(child_char.y())
-                                char.getData().addXOffset(offset)
-                                self.graph.add_vertex(char.getData().getID(), char.getData())
-                                # q.insert(0, char)
-                                # char_pos += 1
-                                self.graph.add_edge(char.getData().getID(), middle_fork, self.PARTNER_SPACING)
-
-
-        # Only need to offset if large enough fam
-        if self._size > 2:
-            # Preprocess post-order list generated from above
-            offset_col = list(reversed(sorted(offset_col, key=lambda x: x.position, reverse=True)))
-
-            pivots = [i for i in range(1, len(offset_col)) if offset_col[i].height!=offset_col[i-1].height]
-            pivots.insert(0, 0)
-
-            offset_col = [list(reversed(offset_col[pivots[i-1]:pivots[i]])) 
-                                if offset_col[pivots[i]].position==Tree.TreePos.RIGHT 
-                                else offset_col[pivots[i-1]:pivots[i]] for i in range(1, len(pivots))]
-            offset_col = [item for sublist in offset_col for item in sublist]
-
-            # Second walk to calculate offsets
-            offset_dict = defaultdict(lambda: 0)
-            current_orientation = -1 # -1 denotes left side of tree, 1 represents right
-            parent_offset = 0
-            current_height = 0
-            level_offset = 0
-            for parent, sibs_iter in groupby(offset_col, key=lambda x: x.parents[0]):
-                sibs = list(sibs_iter)
-
-                num_sibs = len(sibs)
-                if num_sibs == 1 and sibs[0] == root_node:
-                    continue
-                if parent == root_node:
-                    continue
+    def layout_job(self, config):
+        root_node = self.tree.getRoot()
+        nodes = [root_node]
+        index = {root_node: 0}
+
+        # Number the tree breadth first and measure each character
+        children = []
+        for node in nodes:
+            kids = self.layoutChildren(node)
+            children.append(list(range(len(nodes), len(nodes) + len(kids))))
+            for child in kids:
+                index[child] = len(nodes)
+                nodes.append(child)
+        pixmaps = [node.data.current_pixmap for node in nodes]
+        width, mate_widths = zip(*[self.measureNode(node) for node in nodes])
+        return LayoutJob(self, nodes, index, pixmaps, (config, children, width, mate_widths))
+
+    def rescope(self, scope, config, pending):
+        # Focusing lays out only the neighbourhood, so the whole family's 
+        # layout is put aside and placed again when the focus ends, unless
+        # the tree or its folds have changed since. Returns whether it was
+        unscoped, self._unscoped = self._unscoped, None
+        if (self._layout_scope is None and self._layout is not None 
+                and self._layout_job is None and not pending):
+            self._unscoped = ((self.tree.getVersion(), frozenset(self._collapsed)), self._layout_nodes, 
+                                self._layout_index, self._layout_pixmaps, self._layout)
+        self._layout_scope = scope
+        if scope is not None or unscoped is None or pending:
+            return False
+        key, nodes, index, pixmaps, layout = unscoped
+        if key != (self.tree.getVersion(), frozenset(self._collapsed)) or layout.config != config:
+            return False
+        self._layout_job = None
+        self._layout_nodes = nodes
+        self._layout_index = index
+        self._layout_pixmaps = pixmaps
+        self._layout = layout
+        self.layout_changed(())
+        # everyone was placed for the focus since, not just what changed
+        layout.moved = layout.arranged = list(layout.tree.order)
+        self._layout_added = [nodes[v] for v in layout.moved]
+        self.apply_layout()
+        return True
 
-                calc_offset = (self.calcXOffset(parent.getHeight()+1, num_sibs))
+    def restore_layout(self, job):
+        # Reuse the layout saved with the story when nothing it depends on changed
+        saved = self._saved_layout
+        if saved is None:
+            return False
+        self._saved_layout = None
+        if (saved['structure_hash'] != job.structureHash() or saved['prefs_hash'] != job.prefsHash()
+                or len(saved['x']) != len(job.nodes)):
+            return False
+        self.finish_layout(job, buildLayout(*job.args, saved['x']))
+        return True
 
-                if current_height != sibs[0].getHeight():
-                    current_height = sibs[0].getHeight()
-                    level_offset = 0
+    def layoutRecord(self):
+        # Entry for the story's layouts table (see restore_layout). Saving never
+        # lays the family out: None while a pooled job is out, while focused 
+        # on a neighbourhood or when the tree has nodes the current layout 
+        # hasn't placed yet
+        if self._layout is None or self._layout_job is not None or self._layout_scope is not None:
+            return None
+        job = self.layout_job(self._layout.config)
+        rows = [self._layout_index.get(node) for node in job.nodes]
+        if None in rows:
+            return None
+        x = self._layout.x[rows]
+        return {
+            'fam_id': self._id,
+            'structure_hash': job.structureHash(),
+            'prefs_hash': job.prefsHash(),
+            'x': x.tolist() }
+
+    def setSavedLayout(self, record):
+        self._saved_layout = record
+
+    def receive_layout(self, job, layout):
+        # Result of a pooled job; dropped when a later set_grid has superseded it
+        if job is not self._layout_job:
+            return False
+        self.finish_layout(job, layout)
+        return True
 
-                if sibs[0].position == Tree.TreePos.LEFT:
-                    if current_orientation > 0:
-                        current_orientation = -1
-                        level_offset = 0
-                    calc_offset *= -1
-                
+    def finish_layout(self, job, layout=None):
+        self._layout_job = None
+        self._layout_nodes = self._layout_added = job.nodes
+        self._layout_index = job.index
+        self._layout_pixmaps = job.pixmaps
+        self._layout = layout if layout is not None else buildLayout(*job.args)
+        self.apply_layout()
+
+    def layout_changed(self, changed):
+        layout = self._layout
+        nodes = self._layout_nodes
+        index = self._layout_index
+        self._layout_added = added = []
+
+        # Re-read the children of every node the tree reports as changed
+        changed = list(changed)
+        for node in changed:
+            v = index.get(node)
+            if v is None:   # removed, or numbered below when its parent is reached
+                continue
+            if isinstance(node.data, FoldedCharacter):  # forgotten with the collapsed node
+                continue
+            kids = []
+            for child in self.layoutChildren(node):
+                if (w := index.get(child)) is None:
+                    w = index[child] = layout.addNode(*self.measureNode(child))
+                    nodes.append(child)
+                    added.append(child)
+                    self._layout_pixmaps.append(child.data.current_pixmap)
+                    changed.append(child)
+                kids.append(w)
+            for w in set(layout.tree.children[v]).difference(kids):
+                self.forgetNode(w)
+            layout.setNode(v, kids, *self.measureNode(node))
+
+        # Character sizes (a new pixmap) and partners can change without the 
+        # tree (new children were measured as they were numbered above)
+        pixmaps = self._layout_pixmaps
+        for v in layout.tree.order:
+            node = nodes[v]
+            if index.get(node) != v:
+                continue
+            if node.data.current_pixmap is not pixmaps[v] or (node.mates and (self._explode or not v)):
+                pixmaps[v] = node.data.current_pixmap
+                layout.setNode(v, None, *self.measureNode(node))
+        layout.update()
+
+    def compact_layout(self):
+        # Folding and unfolding leave dead rows behind in the layout arrays; once 
+        # they outnumber the live ones, renumber the tree around the current x
+        job = self.layout_job(self._layout.config)
+        x = self._layout.x[[self._layout_index[node] for node in job.nodes]]
+        self.finish_layout(job, buildLayout(*job.args, x))
+
+    def forgetNode(self, v):
+        stack = [v]
+        for w in stack:
+            stack.extend(self._layout.tree.children[w])
+            node = self._layout_nodes[w]
+            if self._layout_index.get(node) == w:
+                del self._layout_index[node]
+
+    def layoutChildren(self, node):
+        if node in self._collapsed:
+            return []
+        if self._layout_scope is None:
+            return node.getChildren()
+        return [child for child in node.getChildren() if child in self._layout_scope]
+
+    def layoutScope(self):
+        # In focus mode only the neighbourhood is laid out, along with the 
+        # line of ancestors joining it to the root; the other branches are 
+        # left out the way collapsed ones are
+        if self._neighbourhood is None:
+            return None
+        neighbourhood, version, scope = self._scope
+        if neighbourhood is not self._neighbourhood or version != self.tree.getVersion():
+            scope = set()
+            for char_id in self._neighbourhood:
+                node = self.tree.getNode(char_id)
+                while node is not None and node not in scope:
+                    scope.add(node)
+                    node = node.parents[0]  # a mate's is the member they're with
+            self._scope = (self._neighbourhood, self.tree.getVersion(), scope)
+        return scope
+
+    def measureNode(self, node):
+        return node.data.getWidth(), [mate.data.getWidth() for (mate, _id) in node.mates]
+
+    def shownMates(self, node):
+        if node is self.tree.getRoot():
+            return node.getMates() if self._layout.config.root_partners else []
+        return node.getMates() if self._explode else []
+
+    def apply_layout(self):
+        # Hand the computed geometry to the graphics items in one go
+        self._paint_index = None
+        layout = self._layout
+        nodes = self._layout_nodes
+        x = layout.x.tolist()
+        y = layout.y.tolist()
+        spacing = layout.config.partner_spacing
+        for v in layout.moved:
+            node = nodes[v]
+            node.data.setPos(x[v], y[v])
+            if node.mates:
+                for count, mate in enumerate(self.shownMates(node), 1):
+                    mate.data.setPos(x[v] + count * spacing, y[v])
+
+        # counter to store traversal order: needed for save/open
+        offset = 1 if layout.config.root_partners else 0
+        for node in self._layout_added:
+            v = self._layout_index[node]
+            node.data.setTreePos(v + offset if v else 0)
+
+        for v in layout.arranged:
+            if kids := layout.tree.children[v]:
+                node = nodes[v]
+                if v == 0 and (layout.config.root_partners or (self._explode and self._first_gen[1])):
+                    parent_id = self._id
+                elif layout.shownMates(v):
+                    # TODO: Only processes first partnership
+                    parent_id = node.getPartnerships()[0][1]
                 else:
-                    if current_orientation < 0:
-                        current_orientation = 1
-                        level_offset = 0
-
-                new_fam = True
-                middle_child = np.ceil(num_sibs / 2) - 1
-                for index, node in enumerate(sibs):
-
-                    if new_fam:
-                        current_offset = level_offset + calc_offset
-                        new_fam = False
-
-                    children_offset = offset_dict[node]
-                    offset_dict[node] += current_offset
-                    
-                    subtree = []
-                    node.getSubTree(subtree)
-                    for child in subtree:
-                        offset_dict[child] += current_offset
-
-                    current_offset += children_offset
-
-                    if index == middle_child:
-                        parent_offset += offset_dict[node]
-
-                if parent and parent != root_node:
-                    offset_dict[parent] = parent_offset
-                parent_offset = 0
-                level_offset = (current_offset - level_offset)
-
-                
-            # Final walk to apply offsets
-            for node, offset in reversed(offset_dict.items()):
-                # print(f'Giving {node} an offset of {offset}')
-                node.getData().addXOffset(offset)
-                for mate in node.getMates():
-                    mate.getData().addXOffset(offset)
-
-            self.offset_grid()
-
-
-    def calcXSpacer(self, height, num_kids): 
-        return int((self.FIXED_X) / (height * num_kids) * self.EXPAND_CONSTANT)
-
-    def calcXOffset(self, height, num_sibs):
-        # return int((8 * descendants + 4 * num_sibs) / np.square(height)) * self.OFFSET_CONSTANT
-        return int(((num_sibs)) * self.OFFSET_CONSTANT) + (self.FIXED_X / height * (num_sibs))
-
-    # def applyOffsets(self, node, parent_offset):
-    #     if node is None:
-    #         return
-    #     num_kids = len(node.getChildren())
-    #     # middle_child = False
-        
-    #     # if num_kids > 1 and num_kids % 2 != 0:
-    #     #     middle_child = True
-    #     midline = num_kids // 2
-    #     ratio_mult = - ((0.5) * (num_kids - 1))
-    #     for index, child in enumerate(node.getChildren()):
-    #         # if middle_child and index == midline:
-    #         #         #print(f"I'm the middle child!: {child} with parent offset: {parent_offset}")
-    #         #         child.getData().addXOffset(parent_offset)
-    #         #         self.applyOffsets(child, parent_offset)
-    #         #         continue
-    #         descs = child.getNumDescendants()
-    #         # offset = (self.calcXOffset(descs, child.getHeight(), num_kids) * ratio_mult) + parent_offset
-    #         # if index < midline:
-    #         #     offset *= -1
-    #         for partner in child.getMates():
-    #             partner.getData().addXOffset(offset)
-    #         child.getData().addXOffset(offset)
-    #         #print(f'I"m: {child} and I have {descs} descendants and am applying this offset: {offset}')
-    #         ratio_mult += 1
-    #         self.applyOffsets(child, offset)
-    
-    def offset_grid(self):
-        mid_points = set()
-        root_node = self.tree.getRoot()
-        if root_node.getPartnerships():
-            mid_points.add(self._id)
-        for v in self.graph:
-            if v.is_valid(): # Character
-                for w in v.get_connections():
-                    if not w.is_valid() and w.get_id() not in mid_points: # Line
-                        if (v.get_weight(w) == self.PARTNER_SPACING):
-                            mid = self.calcPartnerMidpoint(w)
-                            w.get_data().setX(mid)
-                            mid_points.add(w.get_id())
-                        else:
-                            w.get_data().setX(v.get_data().x())
-            else: # Line
-                for w in v.get_connections():
-                    if not w.is_valid(): # Line
-                        if isinstance(w.get_id(), uuid.UUID) and w.get_id() not in mid_points:
-                            v.get_data().setX(w.get_data().x())
-                        elif w.get_data().y() != v.get_data().y():
-                            w.get_data().setX(v.get_data().x())
-                        
-
-
-    # WARNING: ONLY CALCS FIRST PARTNERSHIP
-    def calcPartnerMidpoint(self, mid):
-        chars = [x for x in mid.get_connections() if x.is_valid()]
-        char1 = chars[0].get_data()
-        char2 = chars[1].get_data()
-
-        min_x = min(char1.x(), char2.x())
-        del_x = abs(char1.x() - char2.x())
-        return min_x + (del_x / 2)
+                    parent_id = node.data.getID()
+                for w in kids:
+                    nodes[w].data.setParentID(parent_id)
+
+        # Only rebuild the lines whose rows changed since the last layout
+        segments = layout.segments
+        slots = self._line_slots
+        old = self._segments
+        if old.shape[1:] != segments.shape[1:] or len(old) > len(segments):
+            old = old[:0]
+            slots.clear()
+        self._segments = segments
+        old = old.reshape(-1, 4)
+        segments = segments.reshape(-1, 4)
+        kept = segments[:len(old)]
+        same = ((kept == old) | (np.isnan(kept) & np.isnan(old))).all(axis=1)
+        changed = np.concatenate((np.flatnonzero(~same), np.arange(len(old), len(segments))))
+        slots.extend([None] * (len(segments) - len(slots)))
+        for row, segment in zip(changed.tolist(), segments[changed].tolist()):
+            slots[row] = None if segment[0] != segment[0] else qtc.QLineF(*segment)
+        rows = np.flatnonzero(~np.isnan(segments[:, 0]))
+        self._line_rows = rows
+        self._line_array = segments[rows]
+        self._lines = [slots[row] for row in rows.tolist()]
 
 
     def build_tree(self):
         self.prepareGeometryChange()
+        self._shape = None
+        self._paint_index = None
 
-        # NOTE: Only place where pos is used to retrieve Vertex
-        if not self._display_root_partner and self._explode and self._first_gen[1]: 
-            root_vertex = self.graph.get_vertex(self._id) # represents the root node
-
+        if self._neighbourhood is None:
+            self.current_lines.extend(self._lines)
+            self.current_line_array = np.concatenate((self.current_line_array, self._line_array))
         else:
-            root_vertex = self.graph.get_vertex(self._first_gen[0].getID()) # represents the root node
+            keep = self.neighbourhoodLines()
+            self.current_lines.extend(line for line, kept in zip(self._lines, keep.tolist()) if kept)
+            self.current_line_array = np.concatenate((self.current_line_array, self._line_array[keep]))
 
-        visited = set()
-        paths = set(frozenset())
-        q = []
-        q.append(root_vertex)
-        visited.add(root_vertex)
+        if self._name:
+            self.name_graphic.setPlainText(self._name)
+            size = qtc.QRectF(self.font_metric.boundingRect(self._name))
+            root = self._first_gen[0]
+            self.name_graphic.setPos(root.x() - size.width() - root.getWidth(), 
+                                            root.y() - size.height())
+            
+    def build_shape(self):
         self._shape = qtg.QPainterPath()
 
-        for char in self.members:
-            if char not in self.filtered:
+        for char in self.getAllMembers():
+            if char not in self.filtered and not self.isHidden(char):
                 self._shape.addRect(char.sceneBoundingRect())
         if self._display_root_partner and self._first_gen[1]:
-            if self._first_gen not in self.filtered:
+            if self._first_gen not in self.filtered and not self.isHidden(self._first_gen[1]):
                 self._shape.addRect(self._first_gen[1].sceneBoundingRect())
         if self._explode:
-            for char in self.partners:
-                if char not in self.filtered:
+            for char in self.getPartners():
+                if char not in self.filtered and not self.isHidden(char):
                     self._shape.addRect(char.sceneBoundingRect())
 
-        while q != []:
-            s = q.pop(0)
-            for i in s.get_connections():
-                if i not in visited:
-                    q.append(i)
-                    visited.add(i)
-                 # draw lines
-                if {i, s} not in paths:
-                    if s.is_valid():
-                        if i.is_valid(): # Character -> Character
-                            line = qtc.QLineF(s.get_data().pos(), i.get_data().pos())
-                        else:   # Character -> Fork
-                            line = qtc.QLineF(s.get_data().pos(), i.get_data())
-                    else: 
-                        if i.is_valid(): # Fork -> Character
-                            line = qtc.QLineF(s.get_data(), i.get_data().pos())
-                        else: # # Fork -> Fork
-                            line = qtc.QLineF(s.get_data(), i.get_data())
-
-                    self._shape.moveTo(line.p1())
-                    self._shape.lineTo(line.p2())
-                    self.current_lines.append(line)
-                    paths.add(frozenset([i, s]))
+        for x1, y1, x2, y2 in self.current_line_array.tolist():
+            self._shape.moveTo(x1, y1)
+            self._shape.lineTo(x2, y2)
 
         if self._name:
-            self.name_graphic.setPlainText(self._name)
-            size = qtc.QRectF(self.font_metric.boundingRect(self._name))
-            root = root_vertex.get_data()
-            self.name_graphic.setPos(root.x() - size.width() - root.getWidth(), 
-                                            root.y() - size.height())
             self._shape.addRect(self.name_graphic.sceneBoundingRect())
-            
         
 
+    def setNeighbourhood(self, char_ids=None):
+        # Only the characters whose id is in char_ids stay in the scene (and 
+        # in the family's bounds), None lets everyone back
+        self._neighbourhood = char_ids
+        self.updateHidden()
+
+    def inNeighbourhood(self, char):
+        return self._neighbourhood is None or char.getID() in self._neighbourhood
+
+    def hasDescendants(self, char):
+        node = self.tree.getNode(char)
+        return node is not None and bool(node.getChildren())
+
+    def isCollapsed(self, char):
+        return self.tree.getNode(char) in self._collapsed
+
+    def setCollapsed(self, char, state, build=None):
+        # Folds away (or brings back) everyone descended from char. Folding
+        # swaps their Characters for FoldedCharacters, expanding builds them
+        # again with build(folded characters), from their records by default.
+        # Returns the Characters taken out or built; the layout is only 
+        # redone around char at the next set_grid
+        node = self.tree.getNode(char)
+        if node is None or (node in self._collapsed) == state:
+            return []
+        if state:
+            self._collapsed.add(node)
+            changed = self.foldBranch(node)
+        else:
+            self._collapsed.discard(node)
+            changed = self.unfoldBranch(node, build)
+        self._collapse_changed.add(node)
+        self.updateHidden()
+        return changed
+
+    def foldBranch(self, node):
+        folded = []
+        for child in node.iterSubTree():
+            for member in (child, *child.getMates()):
+                char = member.data
+                if isinstance(char, FoldedCharacter):   # under a collapsed descendant
+                    continue
+                self.tree.swapData(member, FoldedCharacter(char.toDict(), self._id))
+                for roster in (self.members, self.partners, self.filtered):
+                    if char in roster:
+                        roster.remove(char)
+                self._hidden.pop(id(char), None)
+                if char.parentItem() is self:
+                    if self.scene():
+                        self.scene().removeItem(char)
+                    char.setParent(None)
+                    char.setParentItem(None)
+                folded.append(char)
+        return folded
+
+    def unfoldBranch(self, node, build=None):
+        # Down to (and including) any collapsed descendants
+        if isinstance(node.data, FoldedCharacter):  # still under another collapsed node
+            return []
+        members = []
+        stack = list(node.getChildren())
+        for child in stack:
+            members.append((child, self.members))
+            members.extend((mate, self.partners) for mate in child.getMates())
+            if child not in self._collapsed:
+                stack.extend(child.getChildren())
+        members = [(member, roster) for (member, roster) in members 
+                    if isinstance(member.data, FoldedCharacter)]
+        if build is None:
+            build = lambda folded: [Character(char.toDict()) for char in folded]
+        built = build([member.data for (member, _) in members])
+
+        # shown the way the character they were folded under is
+        shown_as = node.data
+        for (member, roster), char in zip(members, built):
+            char.setTreeID(self._id)
+            if char.ruler_display_flag != shown_as.ruler_display_flag:
+                char.setRulerDisplay(shown_as.ruler_display_flag)
+            if char.current_display_mode != shown_as.current_display_mode:
+                char.setDisplayMode(shown_as.current_display_mode)
+            self.tree.swapData(member, char)
+            roster.add(char)
+            if roster is self.members or self._explode:    # partners show exploded
+                self._hidden[id(char)] = char   # put in the scene by updateHidden
+        return built
+
+    def collapsedAbove(self, char):
+        # The collapsed nodes char is folded away under, outermost first
+        node = self.tree.getNode(char)
+        above = []
+        while node is not None and isinstance(node.data, FoldedCharacter):
+            node = node.parents[0]  # a mate's is the member they're with
+            if node in self._collapsed:
+                above.append(node)
+        return above[::-1]
+
+    def isHidden(self, char):
+        return not self.inNeighbourhood(char)
+
+    def updateHidden(self):
+        # Takes the characters outside the neighbourhood out of the scene, 
+        # and puts back the ones that no longer are (or were just built)
+        neighbourhood, version = self._hidden_for
+        if neighbourhood is self._neighbourhood and version == self.tree.getVersion():
+            return
+        if self._collapsed:
+            self._collapsed.intersection_update(self.tree.getAllNodes())
+        self._hidden_for = (self._neighbourhood, self.tree.getVersion())
+        self.prepareGeometryChange()
+        self._hidden_version += 1
+        self._shape = None
+
+        hidden = self._hidden
+        self._hidden = {}
+        for key, char in hidden.items():
+            if self.isHidden(char):
+                self._hidden[key] = char
+            elif char not in self.filtered:
+                char.setParent(self)
+                char.setParentItem(self)
+                if char is self._first_gen[0] and self.scene():
+                    char.installSceneEventFilter(self)
+        if self._neighbourhood is None:
+            return
+        for char in self.getMembersAndPartners():
+            if not self.isHidden(char):
+                continue
+            if char.parentItem() is self:
+                if self.scene():
+                    self.scene().removeItem(char)
+                char.setParent(None)
+                char.setParentItem(None)
+            elif char not in self.filtered:
+                continue
+            self._hidden[id(char)] = char
+
+    def neighbourhoodLines(self):
+        # Which connector lines to keep: the drop to a character when it and
+        # its parent are both shown, the fork under it when one of its children
+        # is too, and its partner lines when it is
+        nodes = self._layout_nodes
+        shown = np.array([self.inNeighbourhood(node.data) for node in nodes], dtype=bool)
+        parent = np.asarray(self._layout.tree.parent, dtype=np.int64)
+        kid_shown = np.zeros(len(nodes), dtype=bool)
+        kids = np.flatnonzero(parent >= 0)
+        np.logical_or.at(kid_shown, parent[kids], shown[kids])
+        parent_shown = np.zeros(len(nodes), dtype=bool)
+        parent_shown[kids] = shown[parent[kids]]
+
+        node, kind = np.divmod(self._line_rows, self._segments.shape[1])
+        return shown[node] & np.where(kind == 0, parent_shown[node], 
+                                        np.where(kind < 3, kid_shown[node], True))
+
     def reset_family(self):
         self.current_lines[:] = []
+        self.current_line_array = self.current_line_array[:0]
+        self._paint_index = None
     
 
     def boundingRect(self):
@@ -879,27 +976,91 @@ class Family(qtw.QGraphicsObject):
             rect = rect.adjusted(0, 0, 0, 20)
         return rect
     
+    def paint_index(self):
+        # Rebuilt after a layout or when what is shown (or how) has changed
+        key = (Character.pixmap_version, self.members.version, self.partners.version, 
+                self.filtered.version, self._hidden_version, self._display_root_partner, 
+                self._explode, id(self._first_gen[1]))
+        if self._paint_index is None or self._paint_index[0] != key:
+            shown = lambda char: char not in self.filtered and not self.isHidden(char)
+            chars = [char for char in self.getAllMembers() if shown(char)]
+            if self._display_root_partner and self._first_gen[1]:
+                if shown(self._first_gen[1]):
+                    chars.append(self._first_gen[1])
+            if self._explode:
+                chars.extend(char for char in self.getPartners() if shown(char))
+            # descendants folded under each collapsed character, by its place in chars
+            folds = {}
+            if self._collapsed:
+                for index, char in enumerate(chars):
+                    if (node := self.tree.getNode(char)) in self._collapsed:
+                        folds[index] = node.getNumDescendants() - 1
+            self._paint_index = (key, chars, GridIndex([char.paintedRect() for char in chars]), 
+                                    list(self.current_lines), GridIndex(self.current_line_array), folds)
+        return self._paint_index
+
+    def paint_glyphs(self):
+        # (rect, colour) standing in for each character of the paint index
+        key, chars = self._paint_index[:2]
+        if self._glyphs[0] != key:
+            self._glyphs = (key, [char.glyph() for char in chars])
+        return self._glyphs[1]
+
     def paint(self, painter, option, widget):
-        painter.setRenderHint(qtg.QPainter.Antialiasing)
+        # Only what crosses the exposed area is drawn, so panning across a
+        # large family costs what is on screen rather than the whole family
+        _, chars, char_index, lines, line_index, folds = self.paint_index()
+        exposed = option.exposedRect
+        if painter.device() is not None:
+            # Without a view (QGraphicsScene.render) exposedRect is the whole family
+            to_item, invertible = painter.worldTransform().inverted()
+            if invertible:
+                exposed = exposed.intersected(to_item.mapRect(qtc.QRectF(painter.device().rect())))
+        margin = self.linePen.widthF()
+        visible_lines = line_index.query(exposed.left() - margin, exposed.top() - margin, 
+                                            exposed.right() + margin, exposed.bottom() + margin).tolist()
+        visible_chars = char_index.query(exposed.left(), exposed.top(), 
+                                            exposed.right(), exposed.bottom()).tolist()
+
+        # Zoomed far out portraits are a few pixels across: draw each character 
+        # as a block of its colour and the lines without antialiasing
+        detailed = option.levelOfDetailFromTransform(painter.worldTransform()) >= self.DETAIL_LOD
+        painter.setRenderHint(qtg.QPainter.Antialiasing, detailed)
         painter.setPen(self.linePen)
-        for line in self.current_lines:
-            painter.drawLine(line)
-        for char in self.members:
-            if char not in self.filtered:
-                char.paint(painter, option, widget)
-        if self._display_root_partner and self._first_gen[1]:
-            if self._first_gen[1] not in self.filtered:
-                self._first_gen[1].paint(painter, option, widget)
-        if self._explode:
-            for char in self.partners.arr:
-                if char not in self.filtered:
-                    char.paint(painter, option, widget)
+        painter.drawLines([lines[index] for index in visible_lines])
+        if detailed:
+            for index in visible_chars:
+                chars[index].paint(painter, option, widget)
+            if folds:
+                self.paint_folds(painter, [(chars[index], folds[index]) 
+                                            for index in visible_chars if index in folds])
+        else:
+            glyphs = self.paint_glyphs()
+            for index in visible_chars:
+                painter.fillRect(*glyphs[index])
         if self._name_display and self._name:
             self.name_graphic.paint(painter, option, widget)
 
 
-    
+    def paint_folds(self, painter, folded):
+        # A badge with the number of hidden descendants over the bottom of 
+        # each collapsed character
+        painter.setFont(self.foldFont)
+        painter.setBrush(self.foldBrush)
+        metrics = painter.fontMetrics()
+        for char, count in folded:
+            x1, y1, x2, y2 = char.paintedRect()
+            text = f'+{count}'
+            badge = qtc.QRectF(0, 0, metrics.horizontalAdvance(text) + metrics.height(), metrics.height())
+            badge.moveCenter(qtc.QPointF((x1 + x2) / 2, y2 - badge.height()))
+            painter.drawRoundedRect(badge, badge.height() / 2, badge.height() / 2)
+            painter.drawText(badge, qtc.Qt.AlignCenter, text)
+        painter.setBrush(qtc.Qt.NoBrush)
+
     def shape(self):
+        # Built on demand, hit testing is far rarer than relayouts
+        if self._shape is None:
+            self.build_shape()
         return self._shape
 
     def __contains__(self, x):
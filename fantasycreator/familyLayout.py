@@ -0,0 +1,186 @@
+"""
+Pure python implementation of a family tree's geometry: character positions
+and connector segments, computed without touching any graphics objects
+"""
+
+# 3rd Party
+import numpy as np
+
+# Built-in Modules
+from collections import namedtuple
+
+# User-defined Modules
+from treeLayout import TreeLayout
+
+
+# Everything besides the tree itself that decides where things go. Two layouts
+# computed with equal configs can be updated incrementally into one another.
+LayoutConfig = namedtuple('LayoutConfig', ['sibling_spacing', 'generation_spacing', 'desc_dropdown',
+                                            'partner_spacing', 'root_x', 'root_y', 'explode',
+                                            'root_partners'])
+
+
+class FamilyLayout:
+
+    # Nodes are numbered as in TreeLayout (node 0 is the root). For every node:
+    #   children[v]      child numbers, left to right
+    #   width[v]         width of the character's icon
+    #   mate_widths[v]   widths of the character's partners, in order
+    # Partners are only shown (and take up room) for the root when
+    # config.root_partners is set, and for everyone else when config.explode is.
+    #
+    # Results, valid after build() or update():
+    #   x, y             arrays of character positions, by node number
+    #   segments         (n, k, 4) array of connector lines as x1, y1, x2, y2.
+    #                    Node v owns segments[v]: the drop down to it, the drop
+    #                    to its fork row, its fork row and its partner lines, so
+    #                    they can be compared between updates. Unused rows are NaN
+    #   moved            nodes whose character (or partners) need placing again
+    #   arranged         nodes whose children were re-arranged
+
+    def __init__(self, config):
+        self.config = config
+        self.tree = TreeLayout(config.sibling_spacing)
+        self.width = []
+        self.mate_widths = []
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.segments = np.zeros((0, 3, 4))
+        self.moved = []
+        self.arranged = []
+
+    def shownMates(self, v):
+        shown = self.config.root_partners if v == 0 else self.config.explode
+        return self.mate_widths[v] if shown else ()
+
+    def extents(self, v):
+        half_width = self.width[v] / 2
+        if mates := self.shownMates(v):
+            spacing = self.config.partner_spacing
+            return (half_width, len(mates) * spacing + mates[-1] / 2, len(mates) * spacing / 2)
+        return (half_width, half_width, 0)
+
+    def build(self, children, width, mate_widths, x=None):
+        self.width = list(width)
+        self.mate_widths = [tuple(widths) for widths in mate_widths]
+        extents = [self.extents(v) for v in range(len(children))]
+        left_ext, right_ext, anchor = ([list(values) for values in zip(*extents)]
+                                            if extents else ([], [], []))
+        # Given the x of an earlier build of the same input, skip the walk
+        x = self.tree.layout(children, left_ext, right_ext, anchor, self.config.root_x, x)
+        self.finish(x)
+        self.moved = self.arranged = list(self.tree.order)
+        return self
+
+    def addNode(self, width, mate_widths=()):
+        self.width.append(width)
+        self.mate_widths.append(tuple(mate_widths))
+        return self.tree.addNode(*self.extents(len(self.width) - 1))
+
+    def setNode(self, v, children=None, width=None, mate_widths=None):
+        if width is not None:
+            self.width[v] = width
+        if mate_widths is not None:
+            self.mate_widths[v] = tuple(mate_widths)
+        extents = self.extents(v)
+        tree = self.tree
+        if extents == (tree.left_ext[v], tree.right_ext[v], tree.anchor[v]):
+            extents = None
+        if children is not None or extents is not None:
+            tree.setNode(v, children, extents)
+
+    def update(self):
+        old_x = self.x
+        x = self.tree.relayout(self.config.root_x)
+        self.arranged = list(self.tree.arranged)
+        if not self.arranged:
+            self.moved = []
+            return self
+        self.finish(x)
+        # Anything new, re-arranged or shifted along with a re-arranged node
+        moved = np.ones(len(self.x), dtype=bool)
+        moved[:len(old_x)] = self.x[:len(old_x)] != old_x
+        moved[self.arranged] = True
+        order = np.asarray(self.tree.order)
+        self.moved = order[moved[order]].tolist()
+        return self
+
+    def partnerPositions(self, v):
+        spacing = self.config.partner_spacing
+        x = self.x[v]
+        y = self.y[v]
+        return [(x + (index + 1) * spacing, y) for index in range(len(self.shownMates(v)))]
+
+    def finish(self, x):
+        config = self.config
+        tree = self.tree
+        self.x = x = np.asarray(x, dtype=np.float64)
+        depth = np.asarray(tree.depth, dtype=np.float64)
+        self.y = y = config.root_y + config.desc_dropdown + depth * config.generation_spacing
+        if not tree.order:
+            self.segments = np.zeros((0, 3, 4))
+            return
+
+        dropdown = config.desc_dropdown
+        spacing = config.partner_spacing
+        mid_x = x + np.asarray(tree.anchor, dtype=np.float64)
+        fork_y = (depth + 1) * config.generation_spacing + config.root_y
+        parent_y = y.copy()
+        order = np.asarray(tree.order)
+
+        mates = np.zeros(len(x), dtype=np.int64)
+        if config.explode:
+            mates[order] = [len(self.mate_widths[v]) for v in tree.order]
+        mates[0] = len(self.shownMates(0))
+        partnered = order[mates[order] > 0]
+        partnered = partnered[partnered != 0]
+        root_rows = 2 + 2 * mates[0] if mates[0] else 0
+        partner_rows = max(root_rows, mates[partnered].max(initial=-1) + 1)
+
+        segments = np.full((len(x), 3 + partner_rows, 4), np.nan)
+
+        # Partners, joined at their midpoint
+        for row in range(partner_rows):
+            joined = partnered[mates[partnered] > row]
+            mate_x = x[joined] + (row + 1) * spacing
+            segments[joined, 3 + row] = np.column_stack((mate_x, y[joined], mid_x[joined], y[joined]))
+            closed = partnered[mates[partnered] == row]
+            segments[closed, 3 + row] = np.column_stack((mid_x[closed], y[closed], x[closed], y[closed]))
+        if root_rows:
+            # root relationship with no parent family
+            char_x = x[0]
+            char_y = y[0]
+            drop_y = parent_y[0] = char_y + dropdown
+            lines = [(char_x, char_y, char_x, drop_y), (mid_x[0], drop_y, char_x, drop_y)]
+            for mate_x, _ in self.partnerPositions(0):
+                lines.append((mate_x, char_y, mate_x, drop_y))
+                lines.append((mid_x[0], drop_y, mate_x, drop_y))
+            segments[0, 3:3 + root_rows] = lines
+
+        # Descendants: a drop from the parent to the fork row, the row across
+        # the children, and a drop down to each child
+        kids = order[1:]
+        if len(kids):
+            parents = np.asarray(tree.parent)[kids]
+            kid_fork_y = fork_y[parents]
+            segments[kids, 0] = np.column_stack((x[kids], kid_fork_y, x[kids], kid_fork_y + dropdown))
+
+            forks = np.unique(parents)
+            segments[forks, 1] = np.column_stack((mid_x[forks], parent_y[forks], 
+                                                    mid_x[forks], fork_y[forks]))
+
+            lowest = np.full(len(x), np.inf)
+            highest = np.full(len(x), -np.inf)
+            np.minimum.at(lowest, parents, x[kids])
+            np.maximum.at(highest, parents, x[kids])
+            left = np.minimum(mid_x[forks], lowest[forks])
+            right = np.maximum(mid_x[forks], highest[forks])
+            rows = left != right
+            forks = forks[rows]
+            segments[forks, 2] = np.column_stack((left[rows], fork_y[forks], right[rows], fork_y[forks]))
+        self.segments = segments
+
+
+def buildLayout(config, children, width, mate_widths, x=None):
+    # Module level so worker processes can run it (see layoutPool.py)
+    return FamilyLayout(config).build(children, width, mate_widths, x)
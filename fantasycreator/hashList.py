@@ -1,5 +1,6 @@
 """
 Python implementation of a HashList - O(n) add/search/delete
+and of an InstanceMap - O(1) add/search/delete
 """
 
 import uuid
@@ -81,4 +82,67 @@ class HashList:
         if isinstance(x, uuid.UUID):
             return x in self.arr
         return any(x is char for char in self.arr)
-        
+
+
+
+class InstanceMap:
+
+    # Tracks every instance (originals and clones) sharing an id
+    def __init__(self):
+        self._instances = {}  # id(obj) -> obj, in insertion order
+        self._groups = {}     # obj id -> {id(obj): obj}
+        self.version = 0      # bumped on every change, for callers caching views of it
+
+    def _key(self, x):
+        if isinstance(x, uuid.UUID):
+            return x
+        get_id = getattr(x, 'getID', None)
+        return get_id() if get_id else x
+
+    def add(self, *x):
+        self.version += 1
+        for i in x:
+            self._instances[id(i)] = i
+            self._groups.setdefault(self._key(i), {})[id(i)] = i
+
+    # Removes x itself, or every instance when given an id (or the only one)
+    def remove(self, x):
+        key = self._key(x)
+        group = self._groups.get(key, None)
+        if group is None:
+            return
+        if isinstance(x, uuid.UUID) or (len(group) == 1 and id(x) not in group):
+            targets = list(group)
+        elif id(x) in group:
+            targets = [id(x)]
+        else:
+            return
+        self.version += 1
+        for i in targets:
+            del group[i]
+            del self._instances[i]
+        if not group:
+            del self._groups[key]
+
+    def search(self, x):
+        group = self._groups.get(self._key(x), None)
+        return list(group.values()) if group else []
+
+    def instances(self):
+        return list(self._instances.values())
+
+    def clear(self):
+        self.version += 1
+        self._instances.clear()
+        self._groups.clear()
+
+    def __len__(self):
+        return len(self._instances)
+
+    def __iter__(self):
+        yield from list(self._instances.values())
+
+    def __contains__(self, x):
+        if isinstance(x, uuid.UUID):
+            return x in self._groups
+        return id(x) in self._instances
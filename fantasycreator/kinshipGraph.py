@@ -0,0 +1,49 @@
+"""
+Pure python implementation of the relations between the characters of a world
+"""
+
+
+class KinshipGraph:
+
+    # Built straight from the character records, so it needs none of the
+    # families or their characters. Every character id maps to the ids of its
+    # parents, children and partners, and a neighbourhood is everyone within
+    # some number of those steps (a generation or a partnership each).
+
+    def __init__(self, records, no_parents=()):
+        self.relatives = {}
+        for record in records:
+            char_id = record['char_id']
+            relatives = self.relatives.setdefault(char_id, set())
+            for parent in (record['parent_0'], record['parent_1']):
+                if parent and parent not in no_parents:
+                    relatives.add(parent)
+                    self.relatives.setdefault(parent, set()).add(char_id)
+            for partnership in record['partnerships']:
+                relatives.add(partnership['p_id'])
+                self.relatives.setdefault(partnership['p_id'], set()).add(char_id)
+
+    def __len__(self):
+        return len(self.relatives)
+
+    def __contains__(self, char_id):
+        return char_id in self.relatives
+
+    def neighbourhood(self, char_id, radius, hops=None):
+        # {id: steps from char_id} for everyone at most `radius` steps away.
+        # Pass the result of a smaller radius as `hops` to only walk the ring
+        # added by the larger one.
+        if hops is None:
+            hops = {char_id: 0}
+        hops = dict(hops)
+        start = max(hops.values())
+        frontier = [_id for _id, steps in hops.items() if steps == start]
+        for steps in range(start + 1, radius + 1):
+            found = []
+            for _id in frontier:
+                for relative in self.relatives.get(_id, ()):
+                    if relative not in hops:
+                        hops[relative] = steps
+                        found.append(relative)
+            frontier = found
+        return hops
@@ -0,0 +1,67 @@
+"""
+Pool of worker processes that compute family layouts off the GUI thread
+"""
+
+# PyQt
+from PyQt5 import QtCore as qtc
+
+# Built-in Modules
+import os
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# User-defined Modules
+from familyLayout import buildLayout
+
+
+class LayoutPool(qtc.QObject):
+
+    layout_ready = qtc.pyqtSignal(object, object)   # job, FamilyLayout (None if the worker failed)
+    all_done = qtc.pyqtSignal()
+    _job_done = qtc.pyqtSignal(object, object)      # job, future
+
+    MIN_MEMBERS = 250   # smaller families lay out faster than they can be shipped to a worker
+
+    def __init__(self, parent=None, workers=None):
+        super(LayoutPool, self).__init__(parent)
+        self._workers = workers or os.cpu_count() or 1
+        self._executor = None
+        self._pending = set()
+        # Futures finish on the executor's thread: hop back to this one
+        self._job_done.connect(self.collect, qtc.Qt.QueuedConnection)
+
+    def executor(self):
+        if self._executor is None:
+            # Never fork the GUI process
+            self._executor = ProcessPoolExecutor(self._workers, 
+                                                    mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def submit(self, job):
+        self._pending.add(job)
+        future = self.executor().submit(buildLayout, *job.args)
+        future.add_done_callback(lambda future: self._job_done.emit(job, future))
+
+    def isBusy(self):
+        return bool(self._pending)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._pending.clear()
+
+    @qtc.pyqtSlot(object, object)
+    def collect(self, job, future):
+        if job not in self._pending:   # shut down since
+            return
+        self._pending.discard(job)
+        try:
+            layout = future.result()
+        except Exception:
+            traceback.print_exc()
+            layout = None
+        self.layout_ready.emit(job, layout)
+        if not self._pending:
+            self.all_done.emit()
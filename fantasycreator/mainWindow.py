@@ -275,6 +275,8 @@ class MainWindow(qtw.QMainWindow):
         self.database.drop_table('events')
         self.database.drop_table('locations')
         self.database.drop_table('timestamps')
+        self.database.drop_table('layouts')
+        self.database.drop_table('folds')
 
         self.preferences_db = self.database.table('preferences')
         self.character_db = self.database.table('characters')
@@ -463,6 +465,7 @@ class MainWindow(qtw.QMainWindow):
         if self.requireSaveAs:
             self.saveAsFile()
         else:
+            self.treetab.treeview.saveLayouts()
             try:
                 self.database.dump()
 
@@ -685,6 +688,7 @@ class MainWindow(qtw.QMainWindow):
         self.about_window.show()
 
     def clean_up(self):
+        self.treetab.treeview.layout_pool.shutdown()
         if self.database:
             self.database.close()
 
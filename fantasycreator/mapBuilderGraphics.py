@@ -19,6 +19,7 @@ from database import DataFormatter
 from mapBuilderObjects import GraphicCharacter, GraphicLocation, LocationView, LocationCreator
 from mapBuilderObjects import CharacterSelect, TimestampCreator, LocationSelect
 from animator import Animator
+from materializer import Materializer
 from storyTime import Time
 from flags import ANIMATION_MODE, EVENT_TYPE
 
@@ -198,6 +199,7 @@ class MapView(qtw.QGraphicsView):
             self.scene.removeItem(item)
             del item
         self.scene.canvas.current_items = []
+        Materializer.MAP_COORDS.clear()
 
     def init_loc_dialogs(self):
         loc_types = set()
@@ -1322,6 +1324,7 @@ class Canvas(qtw.QGraphicsWidget):
             del child
     
     def remove_location(self, loc_id):
+        Materializer.MAP_COORDS.remove(loc_id)
         child = self.findChild(GraphicLocation, "graphicLoc{}".format(loc_id))
         if child:
             self.scene().removeItem(child)
@@ -15,6 +15,7 @@ import uuid
 
 # User-defined Modules
 from character import PictureLineEdit, PictureEditor
+from materializer import Materializer
 from storyTime import Time, DateLineEdit, DateValidator
 from flags import EVENT_TYPE
 
@@ -309,6 +310,16 @@ class GraphicLocation(EmbeddedGraphic):
     def setID(self, _id):
         self._id = _id
         self.setObjectName('graphicLoc{}'.format(self._id))
+        self.updateMapCoords()
+    
+    def updateMapCoords(self):
+        center = self.getGraphicalRect().center()
+        Materializer.MAP_COORDS.place(self._id, center.x(), center.y())
+    
+    def mouseReleaseEvent(self, mouseEvent):
+        super(GraphicLocation, self).mouseReleaseEvent(mouseEvent)
+        if self._id:
+            self.updateMapCoords()
     
     def contextMenuEvent(self, event):
         self.setCursor(qtc.Qt.PointingHandCursor)
@@ -11,9 +11,126 @@ import numpy as np
 # Built-in Modules
 import uuid
 from threading import Lock
+from collections import namedtuple
 
 # User-defined Modules
-from storyTime import TimeConstants, Time
+from storyTime import TimeConstants, TimeConfig, Time
+
+
+# Read-only copy of everything the date <-> pixel math needs. Hot paths grab
+# one with Materializer.snapshot() and pass it along; its version can be used
+# as a cache key.
+MaterializerConfig = namedtuple('MaterializerConfig', ['version', 'time', 'day_to_pixel', 
+                                                        'days_per_month', 'months_per_year'])
+
+
+class LocationGeometry():
+
+    INITIAL_CAPACITY = 16
+
+    def __init__(self):
+        self._ids = []
+        self._index = {}
+        self._coords = np.empty((LocationGeometry.INITIAL_CAPACITY, 2), dtype=np.float64)
+    
+    def place(self, loc_id, x, y):
+        row = self._index.get(loc_id, None)
+        if row is None:
+            row = len(self._ids)
+            if row == len(self._coords):
+                grown = np.empty((2 * len(self._coords), 2), dtype=np.float64)
+                grown[:row] = self._coords[:row]
+                self._coords = grown
+            self._index[loc_id] = row
+            self._ids.append(loc_id)
+        self._coords[row] = (x, y)
+    
+    def move(self, loc_id, x, y):
+        if loc_id in self._index:
+            self._coords[self._index[loc_id]] = (x, y)
+    
+    def remove(self, loc_id):
+        row = self._index.pop(loc_id, None)
+        if row is None:
+            return
+        last = len(self._ids) - 1
+        if row != last:
+            # Keep the rows packed by moving the last location into the hole
+            moved_id = self._ids[last]
+            self._ids[row] = moved_id
+            self._coords[row] = self._coords[last]
+            self._index[moved_id] = row
+        self._ids.pop()
+    
+    def clear(self):
+        self._ids.clear()
+        self._index.clear()
+    
+    def getIDs(self):
+        return list(self._ids)
+    
+    def getCoords(self, loc_id=None):
+        if loc_id is None:
+            return self._coords[:len(self._ids)]
+        if loc_id in self._index:
+            return tuple(self._coords[self._index[loc_id]])
+        return None
+    
+    def offset(self, loc1_id, loc2_id):
+        try:
+            x, y = self._coords[self._index[loc2_id]] - self._coords[self._index[loc1_id]]
+        except KeyError:
+            return None
+        return (float(x), float(y))
+    
+    def distance(self, loc1_id, loc2_id):
+        if (offset := self.offset(loc1_id, loc2_id)) is None:
+            return None
+        return float(np.hypot(*offset))
+    
+    def distanceMatrix(self, loc_ids=None):
+        if loc_ids is None:
+            loc_ids = self.getIDs()
+            points = self.getCoords()
+        else:
+            points = self._coords[[self._index[loc_id] for loc_id in loc_ids]]
+        deltas = points[:, np.newaxis, :] - points[np.newaxis, :, :]
+        return loc_ids, np.hypot(deltas[..., 0], deltas[..., 1])
+    
+    def nearestToPoints(self, points, k=1):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        coords = self.getCoords()
+        k = min(k, len(coords))
+        if not k:
+            return np.empty((len(points), 0), dtype=np.int64), np.empty((len(points), 0))
+        deltas = points[:, np.newaxis, :] - coords[np.newaxis, :, :]
+        dists = np.hypot(deltas[..., 0], deltas[..., 1])
+        if k < len(coords):
+            rows = np.argpartition(dists, k - 1, axis=1)[:, :k]
+        else:
+            rows = np.tile(np.arange(len(coords)), (len(points), 1))
+        row_dists = np.take_along_axis(dists, rows, axis=1)
+        order = np.argsort(row_dists, axis=1, kind='stable')
+        return np.take_along_axis(rows, order, axis=1), np.take_along_axis(row_dists, order, axis=1)
+    
+    def nearest(self, target, k=1):
+        # Target is either an (x, y) point or a location id (which is left out of 
+        # its own result); None for an id that hasn't been placed
+        if isinstance(target, (tuple, list, np.ndarray)):
+            rows, dists = self.nearestToPoints(target, k)
+            return [(self._ids[row], float(dist)) for row, dist in zip(rows[0], dists[0])]
+        if target not in self._index:
+            return None
+        rows, dists = self.nearestToPoints(self._coords[self._index[target]], k + 1)
+        found = [(self._ids[row], float(dist)) for row, dist in zip(rows[0], dists[0])
+                    if self._ids[row] != target]
+        return found[:k]
+    
+    def __len__(self):
+        return len(self._ids)
+    
+    def __contains__(self, loc_id):
+        return loc_id in self._index
 
 
 class Materializer():
@@ -25,15 +142,20 @@ class Materializer():
     TIMELINE_COORDS_BOUNDS = (0, 0, 8500, 3000)
     TIMELINE_AXIS_PADDING = 25
     MAP_COORDS_BOUNDS = (0, 0, 10000, 10000)
-    MAP_COORDS = {}
+    MAP_COORDS = LocationGeometry()
 
     TOTAL_TIME_PIXELS = 8500
     TOTAL_DAYS = 3042000
+    DAYS_PER_MONTH = 30
+    MONTHS_PER_YEAR = 12
 
     DAY_TO_PIXEL = 0.002794214
     MONTH_TO_PIXEL = 0.145299128
     YEAR_TO_PIXEL = 9.44444332
 
+    CONFIG = MaterializerConfig(0, TimeConfig(0, 0, 0, 0, 0, 0, 0), DAY_TO_PIXEL, 
+                                DAYS_PER_MONTH, MONTHS_PER_YEAR)
+
     mutex = Lock()
 
     def build(params):
@@ -55,62 +177,101 @@ class Materializer():
 
     def updateConstants():
         Materializer.mutex.acquire()
-        Materializer.TOTAL_DAYS = ((TimeConstants.MAX_DAY - TimeConstants.MIN_DAY) *  
-                        (TimeConstants.MAX_MONTH - TimeConstants.MIN_MONTH) *  
-                        (TimeConstants.MAX_YEAR - TimeConstants.MIN_YEAR))
+        time_config = TimeConstants.snapshot()
+        Materializer.DAYS_PER_MONTH = time_config.max_day - time_config.min_day + 1
+        Materializer.MONTHS_PER_YEAR = time_config.max_month - time_config.min_month + 1
+        Materializer.TOTAL_DAYS = (Materializer.DAYS_PER_MONTH * Materializer.MONTHS_PER_YEAR *
+                        (time_config.max_year - time_config.min_year + 1))
         
 
         Materializer.TOTAL_TIME_PIXELS = (Materializer.TIMELINE_COORDS_BOUNDS[2] 
                                     - Materializer.TIMELINE_COORDS_BOUNDS[0])
         
         Materializer.DAY_TO_PIXEL = Materializer.TOTAL_TIME_PIXELS / Materializer.TOTAL_DAYS
-        Materializer.MONTH_TO_PIXEL = Materializer.DAY_TO_PIXEL * (TimeConstants.MAX_DAY - TimeConstants.MIN_DAY)
-        Materializer.YEAR_TO_PIXEL = (Materializer.MONTH_TO_PIXEL * 
-                                    (TimeConstants.MAX_MONTH - TimeConstants.MIN_MONTH))
+        Materializer.MONTH_TO_PIXEL = Materializer.DAY_TO_PIXEL * Materializer.DAYS_PER_MONTH
+        Materializer.YEAR_TO_PIXEL = Materializer.MONTH_TO_PIXEL * Materializer.MONTHS_PER_YEAR
+        Materializer.CONFIG = MaterializerConfig(Materializer.CONFIG.version + 1, time_config, 
+                                                Materializer.DAY_TO_PIXEL, Materializer.DAYS_PER_MONTH,
+                                                Materializer.MONTHS_PER_YEAR)
         Materializer.mutex.release()
 
+    def snapshot():
+        return Materializer.CONFIG
+
 
-    def mapTime(self, time):
-        # if self.validateTime(year, month, day):
-        return (time.getDay() * Materializer.DAY_TO_PIXEL + 
-                        time.getMonth() * Materializer.MONTH_TO_PIXEL + 
-                        (time.getYear() - TimeConstants.MIN_YEAR) * 
-                        Materializer.YEAR_TO_PIXEL)
+    # Dates are converted through a day ordinal (days since MIN_YEAR/MIN_MONTH/MIN_DAY)
+    # so that x -> date -> x is exact once x is rounded to the nearest day
+    def mapTime(self, time, config=None):
+        config = config or Materializer.CONFIG
+        ordinal = ((time.getDay() - config.time.min_day) + 
+                    (time.getMonth() - config.time.min_month) * config.days_per_month + 
+                    (time.getYear() - config.time.min_year) * 
+                    config.days_per_month * config.months_per_year)
+        return ordinal * config.day_to_pixel
     
-    def mapTimeRange(self, time1, time2):
-        pt_1 = self.mapTime(time1)
-        pt_2 = self.mapTime(time2)
+    def mapTimeRange(self, time1, time2, config=None):
+        config = config or Materializer.CONFIG
+        pt_1 = self.mapTime(time1, config)
+        pt_2 = self.mapTime(time2, config)
         return abs(pt_1 - pt_2)
 
     def mapLocation(self, loc_dict, x, y):
-        Materializer.MAP_COORDS[loc_dict['location_id']] = (x, y)
+        Materializer.MAP_COORDS.place(loc_dict['location_id'], x, y)
 
 
-    def mapToTime(self, x):
-        # if (x < Materializer.TIMELINE_COORDS_BOUNDS[0] 
-        #         or x > Materializer.TIMELINE_COORDS_BOUNDS[2]):
-        #     return
-        year, remainder = divmod(x, Materializer.YEAR_TO_PIXEL)
-        # if remainder:
-        #     year += 1
-        month, remainder = divmod(remainder, Materializer.MONTH_TO_PIXEL)
-        # if remainder:
-            # month += 1
-        day = np.ceil(remainder / Materializer.DAY_TO_PIXEL)
-        year, month, day = int(year), int(month), int(day)
-        year += TimeConstants.MIN_YEAR
-        return Time(year=year, month=month, day=day)
+    def mapToTime(self, x, config=None):
+        config = config or Materializer.CONFIG
+        ordinal = round(x / config.day_to_pixel)
+        year, remainder = divmod(ordinal, config.days_per_month * config.months_per_year)
+        month, day = divmod(remainder, config.days_per_month)
+        return Time(year=int(year) + config.time.min_year, 
+                    month=int(month) + config.time.min_month, 
+                    day=int(day) + config.time.min_day)
+    
+    def mapDates(self, years, months, days, config=None):
+        config = config or Materializer.CONFIG
+        years = np.asarray(years, dtype=np.int64)
+        months = np.asarray(months, dtype=np.int64)
+        days = np.asarray(days, dtype=np.int64)
+        ordinals = ((days - config.time.min_day) + 
+                    (months - config.time.min_month) * config.days_per_month + 
+                    (years - config.time.min_year) * 
+                    config.days_per_month * config.months_per_year)
+        return ordinals * config.day_to_pixel
+    
+    def mapTimes(self, times, config=None):
+        dates = np.array([(time.getYear(), time.getMonth(), time.getDay()) for time in times], 
+                            dtype=np.int64).reshape(-1, 3)
+        return self.mapDates(dates[:, 0], dates[:, 1], dates[:, 2], config)
     
+    def mapToDates(self, xs, config=None):
+        config = config or Materializer.CONFIG
+        ordinals = np.rint(np.asarray(xs, dtype=np.float64) / config.day_to_pixel).astype(np.int64)
+        years, remainder = np.divmod(ordinals, config.days_per_month * config.months_per_year)
+        months, days = np.divmod(remainder, config.days_per_month)
+        return (years + config.time.min_year, 
+                months + config.time.min_month, 
+                days + config.time.min_day)
+    
+    def mapToTimes(self, xs, config=None):
+        years, months, days = self.mapToDates(xs, config)
+        return [Time(year=int(year), month=int(month), day=int(day)) 
+                    for year, month, day in zip(years, months, days)]
+    
+    def mapTimeRanges(self, starts, ends, config=None):
+        config = config or Materializer.CONFIG
+        start_xs = self.mapTimes(starts, config)
+        end_xs = self.mapTimes(ends, config)
+        return start_xs, np.abs(end_xs - start_xs)
 
 
     # def getStoryDistance(self, loc1_id, loc2_id)
 
     def getGraphicDistance(self, loc1_id, loc2_id):
-        try:
-            x, y = np.subtract(Materializer.MAP_COORDS[loc2_id] 
-                                - Materializer.MAP_COORDS[loc1_id])
-        except:
-            return
-        return (x, y)
-
-
+        return Materializer.MAP_COORDS.offset(loc1_id, loc2_id)
+    
+    def getDistanceMatrix(self, loc_ids=None):
+        return Materializer.MAP_COORDS.distanceMatrix(loc_ids)
+    
+    def getNearestLocations(self, target, k=1):
+        return Materializer.MAP_COORDS.nearest(target, k)
@@ -0,0 +1,83 @@
+"""
+Pure python/numpy implementation of a uniform grid index over rectangles
+"""
+
+# 3rd Party
+import numpy as np
+
+
+class GridIndex:
+
+    # Rectangles are given as rows of x1, y1, x2, y2 (either corner first,
+    # rows with a NaN are left out) and bucketed into every CELL sized square
+    # they overlap. A query only checks the rectangles bucketed under it, or
+    # all of them when it covers more squares than there are rectangles.
+    # Results are returned in row order, so they can be drawn in that order.
+
+    CELL = 1000
+
+    def __init__(self, rects, cell=CELL):
+        rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+        self.cell = cell
+        self.left = np.fmin(rects[:, 0], rects[:, 2])
+        self.right = np.fmax(rects[:, 0], rects[:, 2])
+        self.top = np.fmin(rects[:, 1], rects[:, 3])
+        self.bottom = np.fmax(rects[:, 1], rects[:, 3])
+        self.valid = np.flatnonzero(~np.isnan(rects).any(axis=1))
+        if not len(self.valid):
+            self.keys = self.items = np.zeros(0, dtype=np.int64)
+            return
+
+        valid = self.valid
+        col_0 = np.floor(self.left[valid] / cell).astype(np.int64)
+        col_1 = np.floor(self.right[valid] / cell).astype(np.int64)
+        row_0 = np.floor(self.top[valid] / cell).astype(np.int64)
+        row_1 = np.floor(self.bottom[valid] / cell).astype(np.int64)
+        self.min_col = col_0.min()
+        self.max_col = col_1.max()
+        self.min_row = row_0.min()
+        self.max_row = row_1.max()
+
+        # One (cell, rectangle) pair for every cell a rectangle overlaps
+        num_cols = col_1 - col_0 + 1
+        counts = num_cols * (row_1 - row_0 + 1)
+        items = np.repeat(valid, counts)
+        step = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        num_cols = np.repeat(num_cols, counts)
+        cols = np.repeat(col_0, counts) + step % num_cols
+        rows = np.repeat(row_0, counts) + step // num_cols
+        keys = self.cellKeys(rows, cols)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.items = items[order]
+
+    def __len__(self):
+        return len(self.valid)
+
+    def cellKeys(self, rows, cols):
+        return (rows - self.min_row) * (self.max_col - self.min_col + 1) + (cols - self.min_col)
+
+    def query(self, x1, y1, x2, y2):
+        if not len(self.valid):
+            return self.valid
+        cell = self.cell
+        col_0 = max(int(np.floor(x1 / cell)), self.min_col)
+        col_1 = min(int(np.floor(x2 / cell)), self.max_col)
+        row_0 = max(int(np.floor(y1 / cell)), self.min_row)
+        row_1 = min(int(np.floor(y2 / cell)), self.max_row)
+        if col_0 > col_1 or row_0 > row_1:
+            return self.valid[:0]
+
+        if (col_1 - col_0 + 1) * (row_1 - row_0 + 1) > len(self.valid):
+            found = self.valid
+        else:
+            rows, cols = np.mgrid[row_0:row_1 + 1, col_0:col_1 + 1]
+            keys = self.cellKeys(rows.ravel(), cols.ravel())
+            starts = np.searchsorted(self.keys, keys, 'left')
+            counts = np.searchsorted(self.keys, keys, 'right') - starts
+            step = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            found = np.unique(self.items[np.repeat(starts, counts) + step])
+
+        hit = ((self.left[found] <= x2) & (self.right[found] >= x1)
+                    & (self.top[found] <= y2) & (self.bottom[found] >= y1))
+        return found[hit]
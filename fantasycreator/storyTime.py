@@ -6,6 +6,13 @@ from PyQt5 import QtGui as qtg
 # Built-in Modules
 import re
 from threading import Lock
+from collections import namedtuple
+
+
+# Read-only copy of the time constants. A new one is published (by a single
+# assignment) on every update, so readers can hold on to it without locking.
+TimeConfig = namedtuple('TimeConfig', ['version', 'min_day', 'max_day', 'min_month', 'max_month', 
+                                        'min_year', 'max_year'])
 
 
 class TimeConstants():
@@ -45,6 +52,8 @@ class TimeConstants():
 
     PREV_TIME_TRANSFORM = None
 
+    CONFIG = TimeConfig(0, 0, 0, 0, 0, 0, 0)
+
     mutex = Lock()
 
     def init(params):
@@ -93,8 +102,15 @@ class TimeConstants():
         TIME_FRMT = r'(\d{1,%s} *[•,] *\d{1,%s} *[•,] *\d{1,%s})' % (TimeConstants.ONE_FRMT, 
                                                         TimeConstants.TWO_FRMT, 
                                                         TimeConstants.THREE_FRMT)
+        TimeConstants.CONFIG = TimeConfig(TimeConstants.CONFIG.version + 1,
+                                        TimeConstants.MIN_DAY, TimeConstants.MAX_DAY,
+                                        TimeConstants.MIN_MONTH, TimeConstants.MAX_MONTH,
+                                        TimeConstants.MIN_YEAR, TimeConstants.MAX_YEAR)
         TimeConstants.mutex.release()
 
+    def snapshot():
+        return TimeConstants.CONFIG
+
     def setOrder(order_dict):
         TimeConstants.mutex.acquire()
         TimeConstants.PREV_TIME_TRANSFORM = dict(TimeConstants.INDEXED_ORDER)
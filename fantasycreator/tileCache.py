@@ -0,0 +1,161 @@
+"""
+Offscreen tile cache for navigating a QGraphicsView over a large scene
+"""
+
+# PyQt
+from PyQt5 import QtGui as qtg
+from PyQt5 import QtCore as qtc
+
+# Built-in Modules
+import math
+import time
+from collections import OrderedDict
+
+
+class TileCache(qtc.QObject):
+
+    # The scene is cut into TILE x TILE pixel squares at every zoom level the
+    # view is shown at. Missing tiles around the view are rendered a few at a
+    # time from the event loop, and while the view is being panned or zoomed
+    # (see navigate) it is painted from them whenever all it needs are ready.
+    # A change in the scene drops only the tiles it touches, at every zoom
+    # level. Tiles add up to at most LIMIT bytes, least recently used go first.
+
+    TILE = 512
+    LIMIT = 96 * 2**20
+    BUDGET = 0.008      # seconds of rendering per pass through the event loop
+    SETTLE = 150        # ms after the last pan or zoom step that navigation ends
+
+    def __init__(self, view, scene):
+        super(TileCache, self).__init__(view)
+        self.view = view
+        self.scene = scene
+        self.tiles = OrderedDict()      # (scale, col, row) -> QImage
+        self.size = 0
+        self.pending = []
+        self.navigating = False
+
+        self.render_timer = qtc.QTimer(self)
+        self.render_timer.setInterval(0)
+        self.render_timer.timeout.connect(self.render_pending)
+        self.settle_timer = qtc.QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(self.SETTLE)
+        self.settle_timer.timeout.connect(self.settle)
+        self.scene.changed.connect(self.invalidate)
+
+    def close(self):
+        self.render_timer.stop()
+        self.settle_timer.stop()
+        self.scene.changed.disconnect(self.invalidate)
+        self.clear()
+
+    def clear(self):
+        self.tiles.clear()
+        self.pending.clear()
+        self.size = 0
+
+    ## Navigation ##
+
+    def navigate(self):
+        # Called for every pan or zoom step
+        self.navigating = True
+        self.settle_timer.start()
+        self.schedule()
+
+    def settle(self):
+        # Back to painting the scene itself
+        self.navigating = False
+        self.view.viewport().update()
+        self.schedule()
+
+    def paint(self):
+        # Paints the viewport from tiles, returns False if it couldn't
+        if not self.navigating:
+            return False
+        transform = self.view.viewportTransform()
+        if transform.m12() or transform.m21() or transform.m11() != transform.m22():
+            return False
+        keys = self.visibleTiles(transform)
+        if any(key not in self.tiles for key in keys):
+            self.schedule()
+            return False
+
+        tile = self.TILE
+        painter = qtg.QPainter(self.view.viewport())
+        for key in keys:
+            self.tiles.move_to_end(key)
+            _, col, row = key
+            painter.drawImage(qtc.QPointF(round(transform.dx() + col * tile),
+                                            round(transform.dy() + row * tile)), self.tiles[key])
+        painter.end()
+        return True
+
+    def visibleTiles(self, transform, margin=0):
+        tile = self.TILE
+        scale = round(transform.m11(), 6)   # zooming in and back out needn't come back exactly
+        viewport = self.view.viewport().rect()
+        first_col = math.floor(-transform.dx() / tile) - margin
+        last_col = math.floor((viewport.width() - 1 - transform.dx()) / tile) + margin
+        first_row = math.floor(-transform.dy() / tile) - margin
+        last_row = math.floor((viewport.height() - 1 - transform.dy()) / tile) + margin
+        return [(scale, col, row) for row in range(first_row, last_row + 1)
+                                    for col in range(first_col, last_col + 1)]
+
+    ## Rendering ##
+
+    def schedule(self):
+        # The view's own tiles first, then a ring around them
+        transform = self.view.viewportTransform()
+        visible = self.visibleTiles(transform)
+        ring = [key for key in self.visibleTiles(transform, margin=1) if key not in visible]
+        self.pending = [key for key in visible + ring if key not in self.tiles]
+        if self.pending:
+            self.render_timer.start()
+
+    def render_pending(self):
+        start = time.perf_counter()
+        while self.pending and time.perf_counter() - start < self.BUDGET:
+            key = self.pending.pop(0)
+            if key not in self.tiles:
+                self.renderTile(key)
+        if not self.pending:
+            self.render_timer.stop()
+
+    def renderTile(self, key):
+        scale, col, row = key
+        tile = self.TILE
+        image = qtg.QImage(tile, tile, qtg.QImage.Format_ARGB32_Premultiplied)
+        viewport = self.view.viewport()
+        image.fill(viewport.palette().color(viewport.backgroundRole()))
+        painter = qtg.QPainter(image)
+        painter.setRenderHints(self.view.renderHints())
+        source = qtc.QRectF(col * tile / scale, row * tile / scale, tile / scale, tile / scale)
+        self.scene.render(painter, qtc.QRectF(image.rect()), source, qtc.Qt.IgnoreAspectRatio)
+        painter.end()
+
+        self.tiles[key] = image
+        self.size += image.sizeInBytes()
+        while self.size > self.LIMIT and len(self.tiles) > 1:
+            _, old = self.tiles.popitem(last=False)
+            self.size -= old.sizeInBytes()
+        return image
+
+    @qtc.pyqtSlot('QList<QRectF>')
+    def invalidate(self, regions):
+        # Drop the tiles under anything that changed in the scene
+        if not regions or not self.tiles:
+            return
+        tile = self.TILE
+        dropped = []
+        for key in self.tiles:
+            scale, col, row = key
+            # antialiased edges can spill a pixel past an item's rect
+            rect = qtc.QRectF((col * tile - 2) / scale, (row * tile - 2) / scale,
+                                (tile + 4) / scale, (tile + 4) / scale)
+            if any(rect.intersects(region) for region in regions):
+                dropped.append(key)
+        for key in dropped:
+            self.size -= self.tiles.pop(key).sizeInBytes()
+        if dropped and not self.navigating:
+            self.schedule()
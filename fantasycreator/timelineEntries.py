@@ -4,6 +4,9 @@ from PyQt5 import QtWidgets as qtw
 from PyQt5 import QtCore as qtc
 from PyQt5 import QtGui as qtg
 
+# 3rd Party
+import numpy as np
+
 # Built-in Modules
 import uuid
 
@@ -146,13 +149,17 @@ class TimelineEntry(qtw.QGraphicsWidget):
 
 class TimelineCharEntry(TimelineEntry):
 
-    def setTimeInterval(self, start_date, end_date):
+    def setTimeInterval(self, start_date, end_date, span=None):
         self.start = start_date
         self.end = end_date
         self.prepareGeometryChange()
         # self.interval = self.materializer.getTimeDifference(end_date, start_date)
         self.interval = end_date - start_date
-        width = self.materializer.mapTimeRange(end_date, start_date)
+        if span:
+            start_x, width = span
+        else:
+            start_x = self.materializer.mapTime(start_date)
+            width = self.materializer.mapTimeRange(end_date, start_date)
         self.display_rect = qtc.QRectF(0, 0, width, self.ENTRY_HEIGHT)
 
         start_proxy = qtw.QGraphicsProxyWidget(self)
@@ -196,7 +203,7 @@ class TimelineCharEntry(TimelineEntry):
             self.pen = qtg.QPen(qtg.QColor('white'), 2)
             self.offset = 0
 
-        self.setX(self.materializer.mapTime(start_date))
+        self.setX(start_x)
         # self.setTime(start_date)
 
     def contextMenuEvent(self, event):
@@ -301,13 +308,17 @@ class TimelineEventEntry(TimelineEntry):
         self._shape.lineTo(self.display_rect.bottomLeft())
        
 
-    def setTimeInterval(self, start_date, end_date):
+    def setTimeInterval(self, start_date, end_date, span=None):
         self.start = start_date
         self.end = end_date
 
         # self.interval = self.materializer.getTimeDifference(end_date, start_date)
         self.interval = self.end - self.start
-        width = self.materializer.mapTimeRange(self.end, self.start)
+        if span:
+            start_x, width = span
+        else:
+            start_x = self.materializer.mapTime(start_date)
+            width = self.materializer.mapTimeRange(self.end, self.start)
         self.display_rect = qtc.QRectF(0, 0, width, self.ENTRY_HEIGHT)
 
         start_proxy = qtw.QGraphicsProxyWidget(self)
@@ -364,7 +375,7 @@ class TimelineEventEntry(TimelineEntry):
             start_proxy.setPos(start_proxy.x(), start_proxy.y() - self.name_proxy.preferredHeight())
         
         self.buildShape()
-        self.setX(self.materializer.mapTime(start_date))
+        self.setX(start_x)
         # self.setTime(start_date)
 
     def updateInterval(self, start_date=None, end_date=None):
@@ -475,24 +486,22 @@ class MainTimelineAxis(qtw.QGraphicsObject):
         self.interval_lines = {}
         # self.drawIntervals()
 
-    def drawIntervals(self):
+    def drawIntervals(self, config=None):
         start_x = self.display_rect.x()
         top_y = self.display_rect.top() - 10
         bottom_y = self.display_rect.bottom() + 10
         line_spacer = self.display_rect.width() / self.num_intervals
         year_spacer = int(self.interval.getYear() / self.num_intervals)
 
-        for x in range(1, self.num_intervals):
-            # line = qtc.QLineF(start_x + (x * line_spacer), top_y, start_x + (x * line_spacer), bottom_y)
-            # self.interval_lines[int(self.min_date[0] + (x * year_spacer))] = line
-            # current_date = self.materializer.getTimeSummation(self.min_date, [(x * year_spacer), 0, 0])
-            current_date = self.min_date + Time(day=0, month=0, year=x*year_spacer)
-            
-            target_pt = qtc.QPointF(self.materializer.mapTime(current_date), 0)
-            target_x = self.mapFromParent(target_pt).x()
-            # target_x = target_pt.x()
+        years = self.min_date.getYear() + np.arange(1, self.num_intervals) * year_spacer
+        tick_xs = self.materializer.mapDates(years, 
+                                        np.full(years.shape, self.min_date.getMonth()),
+                                        np.full(years.shape, self.min_date.getDay()),
+                                        config)
+        for year, tick_x in zip(years, tick_xs):
+            target_x = self.mapFromParent(qtc.QPointF(tick_x, 0)).x()
             line = qtc.QLineF(target_x, top_y, target_x, bottom_y)
-            self.interval_lines[current_date.getYear()] = line
+            self.interval_lines[int(year)] = line
 
 
     def setMinDate(self, date):
@@ -11,7 +11,7 @@ from tinydb import where
 import uuid
 
 # User-defined Modules
-from hashList import HashList
+from hashList import InstanceMap
 from character import CharacterView, CharacterCreator
 from timelineEntries import TimelineCharEntry, MainTimelineAxis, TimelineEntry
 from timelineEntries import TimelineEventEntry, EntryView, EventCreator
@@ -48,10 +48,10 @@ class TimelineView(qtw.QGraphicsView):
     MIN_ZOOM = -8
     MAX_ZOOM = 8
 
-    CharacterList = HashList() # Stores all CHARACTER ENTRY objects
+    CharacterList = InstanceMap() # Stores all CHARACTER ENTRY objects
     CharacterOrder = {}
     FamilyColors = {}
-    EventList = HashList() # Stores all EVENT ENTRY objects
+    EventList = InstanceMap() # Stores all EVENT ENTRY objects
 
     def __init__(self, parent=None):
         print('Initializing timeline...')
@@ -92,14 +92,15 @@ class TimelineView(qtw.QGraphicsView):
         min_date.addYears(self.TIMELINE_PADDING)
         max_date.addYears(-self.TIMELINE_PADDING)
 
-        TimelineEntry.MAIN_AXIS_MAX = self.materializer.mapTime(max_date)
-        TimelineEntry.MAIN_AXIS_MIN = self.materializer.mapTime(min_date)
+        config = Materializer.snapshot()
+        TimelineEntry.MAIN_AXIS_MAX = self.materializer.mapTime(max_date, config)
+        TimelineEntry.MAIN_AXIS_MIN = self.materializer.mapTime(min_date, config)
 
         self.main_axis = MainTimelineAxis(min_date, max_date)
 
         self.scene.add_axis(self.main_axis)
-        self.main_axis.setX(self.materializer.mapTime(min_date))
-        self.main_axis.drawIntervals()
+        self.main_axis.setX(self.materializer.mapTime(min_date, config))
+        self.main_axis.drawIntervals(config)
 
         self.build_timeline()
 
@@ -112,7 +113,12 @@ class TimelineView(qtw.QGraphicsView):
         known_families = [fam['fam_id'] for fam in self.families_db.all()]
         TimelineView.FamilyColors = dict(zip(known_families, TimelineEntry.COLORS))
         ordered_chars = sorted(self.character_db.all(), key=lambda x: x['timeline_ord'])
-        for index, char in enumerate(self.character_db):
+        config = Materializer.snapshot()
+        char_records = self.character_db.all()
+        start_xs, widths = self.materializer.mapTimeRanges([char['birth'] for char in char_records],
+                                                            [char['death'] for char in char_records], 
+                                                            config)
+        for index, char in enumerate(char_records):
             birth = char['birth']
             death = char['death']
             if char['partnerships']:
@@ -137,12 +143,16 @@ class TimelineView(qtw.QGraphicsView):
             char_entry.add_view.connect(self.add_character_view)
             char_entry.shift_entry.connect(self.shiftCharEntry)
             self.scene.addEntryToScene(char_entry)
-            char_entry.setTimeInterval(birth, death)
+            char_entry.setTimeInterval(birth, death, (start_xs[index], widths[index]))
             TimelineView.CharacterOrder[index] = char_entry
             TimelineView.CharacterList.add(char_entry)
         
         TimelineView.EVENT_AXIS = TimelineView.START_ENTRY_AXIS - (MainTimelineAxis.AXIS_HEIGHT + (1.35 * y_spacing))
-        for index, event in enumerate(self.events_db):
+        event_records = self.events_db.all()
+        start_xs, widths = self.materializer.mapTimeRanges([event['start'] for event in event_records],
+                                                            [event['end'] for event in event_records], 
+                                                            config)
+        for index, event in enumerate(event_records):
             start = event['start']
             end = event['end']
             event_entry = TimelineEventEntry(event['event_id'], event['event_name'])
@@ -152,7 +162,7 @@ class TimelineView(qtw.QGraphicsView):
             event_entry.add_view.connect(self.add_event_view)
             event_entry.del_entry.connect(self.deleteEvent)
             self.scene.addEntryToScene(event_entry)
-            event_entry.setTimeInterval(start, end)
+            event_entry.setTimeInterval(start, end, (start_xs[index], widths[index]))
             TimelineView.EventList.add(event_entry)
         
 
@@ -229,14 +239,15 @@ class TimelineView(qtw.QGraphicsView):
         min_date.addYears(self.TIMELINE_PADDING)
         max_date.addYears(-self.TIMELINE_PADDING)
 
-        TimelineEntry.MAIN_AXIS_MAX = self.materializer.mapTime(max_date)
-        TimelineEntry.MAIN_AXIS_MIN = self.materializer.mapTime(min_date)
+        config = Materializer.snapshot()
+        TimelineEntry.MAIN_AXIS_MAX = self.materializer.mapTime(max_date, config)
+        TimelineEntry.MAIN_AXIS_MIN = self.materializer.mapTime(min_date, config)
 
         self.main_axis = MainTimelineAxis(min_date, max_date)
 
         self.scene.add_axis(self.main_axis)
-        self.main_axis.setX(self.materializer.mapTime(min_date))
-        self.main_axis.drawIntervals()
+        self.main_axis.setX(self.materializer.mapTime(min_date, config))
+        self.main_axis.drawIntervals(config)
 
         for entry in TimelineView.CharacterList:
             entry.shiftClocks(reorder)
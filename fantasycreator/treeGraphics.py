@@ -9,8 +9,8 @@ from PyQt5 import QtCore as qtc
 import sys
 import uuid
 import re
+import time
 import numpy as np
-from itertools import groupby
 from fractions import Fraction
 from collections import deque 
 
@@ -20,10 +20,14 @@ from tinydb import where
 # User-defined Modules
 from flags import *
 from family import Family
-from graphStruct import Graph
-from hashList import HashList
+from hashList import InstanceMap
+from layoutPool import LayoutPool
+from worldPacking import ShelfPacker
+from tileCache import TileCache
+from treeMiniMap import TreeMiniMap
+from kinshipGraph import KinshipGraph
 from database import DataFormatter
-from character import Character, CharacterView, CharacterCreator, UserLineInput, PictureEditor
+from character import Character, FoldedCharacter, CharacterView, CharacterCreator, UserLineInput, PictureEditor
 
 # External resources
 import resources
@@ -43,10 +47,12 @@ class TreeView(qtw.QGraphicsView):
 
     zoomChanged = qtc.pyqtSignal(int)
     setCharDel = qtc.pyqtSignal(bool)
+    move_minimap = qtc.pyqtSignal(qtg.QPolygonF)
+    focusChanged = qtc.pyqtSignal(bool)
 
 
     MasterFamilies = {}
-    CharacterList = HashList() # Stores all CHARACTER objects
+    CharacterList = InstanceMap() # Stores all CHARACTER objects
 
     #TODO: FIX THESE -> need a better location 
     CURRENT_FAMILY_FLAGS = set()
@@ -58,6 +64,9 @@ class TreeView(qtw.QGraphicsView):
 
     MIN_ZOOM = -8
     MAX_ZOOM = 8
+    FAMILY_SPACING = 300 # between packed families
+    USE_TILE_CACHE = False # paint from prerendered tiles while panning/zooming
+    FOCUS_RADIUS = 2 # generations/partnerships shown around a focused character
 
     def __init__(self, parent=None, size=None):
         super(TreeView, self).__init__(parent)
@@ -93,13 +102,49 @@ class TreeView(qtw.QGraphicsView):
         self.last_mouse = None
         self.previous_families = set()
 
+        self.packer = ShelfPacker(self.FAMILY_SPACING)
+        self.focus_packer = ShelfPacker(self.FAMILY_SPACING)
+        self.packed_boxes = {}          # packer -> the boxes it last placed, see setTreeSpacing
+        self.moved_families = set()     # ids of families the user dragged into place
+
+        # Focus mode: (char_id, radius, {char_id: steps}) and the families they're in
+        self.focus = None
+        self.focus_families = set()
+        self.focus_center = None     # character to centre on once the focus is placed
+        self.kinship = None
+
+        # Large families are laid out concurrently, off the GUI thread
+        self.layout_pool = LayoutPool(self)
+        self.layout_pool.layout_ready.connect(self.place_family)
+        self.layout_pool.all_done.connect(self.families_placed)
+
+        self.tile_cache = None
+        self.setTileCaching(self.USE_TILE_CACHE)
+
+        ## MiniMap
+        self.minimap = TreeMiniMap(self.scene, self)
+        self.visible_area = qtg.QPolygonF()     # last sent to the minimap
+        self.move_minimap.connect(self.minimap.controlView)
+        self.minimap.jump.connect(self.jumpTo)
+
+        # The focus mode's relations are re-read from the database after any edit
+        for signal in (self.addedChars, self.removedChars, self.updatedChars):
+            signal.connect(self.forgetKinship)
+
+        layout = qtw.QVBoxLayout()
+        layout.setAlignment(qtc.Qt.AlignTop | qtc.Qt.AlignRight)
+        layout.addWidget(self.minimap)
+        self.setLayout(layout)
+
  
     ## Auxiliary Methods ##
 
     def init_tree_view(self):
         print('Building tree...')
         self.assembleTrees()
+        saved_layouts = {record['fam_id']: record for record in self.layouts_db}
         for fam_id, family in TreeView.MasterFamilies.items():
+            family.setSavedLayout(saved_layouts.get(fam_id))
             family.setParent(self)
             family.edit_char.connect(self.add_character_edit)
             family.add_descendant.connect(lambda x: self.createCharacter(CHAR_TYPE.DESCENDANT, x))
@@ -108,17 +153,19 @@ class TreeView(qtw.QGraphicsView):
             family.remove_partnership.connect(self.divorceProctor)
             family.add_parent.connect(self.addParent)
             family.delete_fam.connect(self.delete_family)
+            family.focus_char.connect(self.setFocusMode)
+            family.collapse_char.connect(self.toggleCollapse)
+            family.tree_moved.connect(self.family_moved)
             
             # if fam_id in TreeView.CURRENT_FAMILIES: #WARNING: not good place for constant
-            family.set_grid()
-            family.build_tree()
+            if family.set_grid(self.layout_pool):
+                family.build_tree()
             self.scene.add_family_to_scene(family)
-            self.addedChars.emit([char.getID() for char in family.getAllMembers()])
+            self.addedChars.emit([char.getID() for char in family.getAllMembers()] + family.getFoldedIDs())
             TreeView.CharacterList.add(*family.getMembersAndPartners())
         
-        self.setTreeSpacing()
-        self.scene.update()
-        self.viewport().update()
+        if not self.layout_pool.isBusy():
+            self.families_placed()
     
     def init_char_dialogs(self):
         sexes = set()
@@ -153,32 +200,52 @@ class TreeView(qtw.QGraphicsView):
 
 
     def assembleTrees(self):
-        for char_dict in self.character_db:
-            graphic_char = Character(char_dict)
-
+        # Every table is read once into id maps up front, so assembly stays 
+        # linear in the number of characters and partnerships
+        timings = []
+        start = time.perf_counter()
+        characters = self.character_db.all()
+        # reversed: the first record with an id wins, as with Table.get
+        char_records = {char_dict['char_id']: char_dict for char_dict in reversed(characters)}
+        fam_records = {fam_dict['fam_id']: fam_dict for fam_dict in reversed(self.families_db.all())}
+        meta_records = self.meta_db.all()
+        no_parents = (meta_records[0]['NULL_ID'], meta_records[0]['TERM_ID']) if meta_records else ()
+        # characters collapsed when the story was saved, and everyone below them
+        collapsed = {record['fam_id']: record['char_ids'] for record in self.folds_db}
+        folded_ids = {fam_id: set(char_ids) for fam_id, char_ids in collapsed.items()}
+        timings.append(('read tables', time.perf_counter() - start))
+
+        start = time.perf_counter()
+        for char_dict in characters:
             rom_fam_ids = [x['rom_id'] for x in char_dict['partnerships']]
             blood_fam_id = char_dict['fam_id']
 
+            # Folded away in its family: only built once expanded (parents come first)
+            if char_dict['parent_0'] in folded_ids.get(blood_fam_id, ()):
+                folded_ids[blood_fam_id].add(char_dict['char_id'])
+                graphic_char = FoldedCharacter(char_dict)
+            else:
+                graphic_char = Character(char_dict)
+
             # Create romance family
             for rom_fam_id in rom_fam_ids:
-                if rom_fam_id and self.families_db.contains(where('fam_id') == rom_fam_id):
+                if rom_fam_id and rom_fam_id in fam_records:
                     
-                    if rom_fam_id not in TreeView.MasterFamilies.keys():
-                        graphic_char.setTreeID(rom_fam_id)
-                        TreeView.MasterFamilies[rom_fam_id] = Family([graphic_char], rom_fam_id)
+                    if rom_fam_id not in TreeView.MasterFamilies:
+                        head = graphic_char if isinstance(graphic_char, Character) else Character(char_dict)
+                        head.setTreeID(rom_fam_id)
+                        TreeView.MasterFamilies[rom_fam_id] = Family([head], rom_fam_id)
                     
                     if graphic_char not in TreeView.MasterFamilies[rom_fam_id].getFirstGen():
-                        root_char = TreeView.MasterFamilies[rom_fam_id].getRoot()
                         TreeView.MasterFamilies[rom_fam_id].setFirstGen(1, graphic_char, rom_fam_id)
                 
             # Create blood family
-            if blood_fam_id and self.families_db.contains(where('fam_id') == blood_fam_id):
-                if blood_fam_id not in TreeView.MasterFamilies.keys(): #NOTE: Assume sorted order
+            if blood_fam_id and blood_fam_id in fam_records:
+                if blood_fam_id not in TreeView.MasterFamilies: #NOTE: Assume sorted order
                     graphic_char.setTreeID(blood_fam_id)
                     TreeView.MasterFamilies[blood_fam_id] = Family([graphic_char], blood_fam_id)
 
-
-            if char_dict['parent_0'] == self.meta_db.all()[0]['NULL_ID'] or char_dict['parent_0'] == self.meta_db.all()[0]['TERM_ID']:
+            if char_dict['parent_0'] in no_parents:
                 continue
 
             if char_dict['parent_0']:
@@ -186,46 +253,52 @@ class TreeView(qtw.QGraphicsView):
 
             if char_dict['parent_1']:
                 TreeView.MasterFamilies[blood_fam_id].addChildRelationship(graphic_char, char_dict['parent_1'])
+        timings.append(('build families', time.perf_counter() - start))
+
+        start = time.perf_counter()
+        self.connectFamilies(characters, char_records)
+        timings.append(('connect partners', time.perf_counter() - start))
 
+        for fam_id, char_ids in collapsed.items():
+            if fam_id in TreeView.MasterFamilies:
+                for char_id in char_ids:
+                    TreeView.MasterFamilies[fam_id].setCollapsed(char_id, True)
+
+        start = time.perf_counter()
         for f_id, fam in TreeView.MasterFamilies.items():
-            fam_record = self.families_db.get(where('fam_id') == f_id)
+            fam_record = fam_records.get(f_id)
             if fam_record:
                 fam.setName(fam_record['fam_name'])
                 fam.setType(fam_record['fam_type'])
+        timings.append(('name families', time.perf_counter() - start))
 
-        self.connectFamilies()
-
-        # for fam in TreeView.MasterFamilies.values():
-        #     print(f'\nFam: {fam.getID()}')
-        #     for char in fam.getMembersAndPartners():
-        #         print(char, char.getTreeID())
-
-        # self.treetab.build_tree(TreeView.MasterFamilies, self.database, self.size())
+        self.assembly_timings = timings # per phase, reported by dev/benchmarks.py
   
     
-    def connectFamilies(self):
-        couples_record = self.character_db.search((where('partnerships') != []))
-        relationships = [x['partnerships'] for x in couples_record]
-        relationships = [couple for couples in relationships for couple in couples]
-        relationships.sort(key=lambda x: x['rom_id'])
-
-        for rom_id, couple in groupby(relationships, key=lambda x:x['rom_id']):
-            couple = tuple(couple)
+    def connectFamilies(self, characters, char_records):
+        # Both halves of each partnership, grouped by relationship
+        couples = {}
+        for char_dict in characters:
+            for couple in char_dict['partnerships']:
+                couples.setdefault(couple['rom_id'], []).append(couple)
+
+        for rom_id in sorted(couples):
+            couple = couples[rom_id]
             partner1 = couple[0]
             partner2 = couple[1]
 
-            fam1_id = self.character_db.get(where('char_id') == partner2['p_id'])['fam_id']
-            if fam1_id not in TreeView.MasterFamilies.keys():
+            fam1_id = char_records[partner2['p_id']]['fam_id']
+            if fam1_id not in TreeView.MasterFamilies:
                 fam1_id = rom_id
             
-            fam2_id = self.character_db.get(where('char_id') == partner1['p_id'])['fam_id']
-            if fam1_id not in TreeView.MasterFamilies.keys():
+            fam2_id = char_records[partner1['p_id']]['fam_id']
+            if fam1_id not in TreeView.MasterFamilies:
                 fam2_id = rom_id
 
             graphics_p1 = TreeView.MasterFamilies[fam1_id].getMember(partner2['p_id'])
             graphics_p2 = TreeView.MasterFamilies[fam2_id].getMember(partner1['p_id'])
 
-            if rom_id in TreeView.MasterFamilies.keys():
+            if rom_id in TreeView.MasterFamilies:
                 if graphics_p2.getData() in graphics_p1.getMates():
                     TreeView.MasterFamilies[fam1_id].addMate(graphics_p2.getData(), rom_id, graphics_p1.getData())
                 else:
@@ -245,6 +318,8 @@ class TreeView(qtw.QGraphicsView):
         self.families_db = database.table('families')
         self.kingdoms_db = database.table('kingdoms')
         self.preferences_db = database.table('preferences')
+        self.layouts_db = database.table('layouts')
+        self.folds_db = database.table('folds')
         self.entry_formatter = DataFormatter()
 
         for family in self.families_db:
@@ -253,22 +328,87 @@ class TreeView(qtw.QGraphicsView):
             self.CURRENT_KINGDOMS.add(kingdom['kingdom_id'])
         
     def setTreeSpacing(self):
-        fam_sizes = [(k, v.boundingRect()) for k,v in TreeView.MasterFamilies.items()]
-        fam_sizes.sort(key=lambda x: x[1].width(), reverse=True)
-        root_y = 0
-        root_x = 0
-        x_offset = 0
-        count = 0
-        for fam_id, size in fam_sizes:
-            root_loc = qtc.QPoint(root_x, root_y)
-            TreeView.MasterFamilies[fam_id].setPos(root_loc)
-            x_offset = np.power(-1, count) * (abs(x_offset) + size.width()*(2/3))
-            root_x = x_offset
-            count += 1
+        # Pack the families' bounding boxes into shelves. Only done again once a 
+        # family is added, removed or changes shape; the tallest family stays 
+        # where it is, the rest are placed around it and any the user has 
+        # dragged are left where they were put
+        families = list(TreeView.MasterFamilies.values())
+        packer, other = self.packer, self.focus_packer
+        if self.focus is not None:
+            families = [family for family in families if family.getID() in self.focus_families]
+            packer, other = other, packer
+        if not families:
+            return
+        rects = [family.boundingRect() for family in families]
+        boxes = {family.getID(): rect.getRect() for family, rect in zip(families, rects)}
+        if self.packed_boxes.get(packer) == boxes:
+            return
+        self.packed_boxes[packer] = boxes
+        self.packed_boxes.pop(other, None)  # its families may have been moved by this one
+        x, y = packer.pack([str(family.getID()) for family in families], 
+                                [rect.width() for rect in rects], [rect.height() for rect in rects])
+        tallest = packer.order[0]
+        anchor = families[tallest].mapToScene(rects[tallest].topLeft())
+        anchor -= qtc.QPointF(x[tallest], y[tallest])
+        for family, rect, box_x, box_y in zip(families, rects, x.tolist(), y.tolist()):
+            if family.getID() not in self.moved_families:
+                family.setPos(box_x - rect.x() + anchor.x(), box_y - rect.y() + anchor.y())
 
+    @qtc.pyqtSlot()
+    def family_moved(self):
+        self.moved_families.add(self.sender().getID())
+
+
+    def saveLayouts(self):
+        # Stored with the story so an unchanged family needn't be laid out on
+        # open, and its collapsed branches are not built until expanded
+        records = [record for family in TreeView.MasterFamilies.values() 
+                                if (record := family.layoutRecord()) is not None]
+        self.layouts_db.truncate()
+        self.layouts_db.insert_multiple(records)
+        folds = [{'fam_id': fam_id, 'char_ids': char_ids} for fam_id, family in TreeView.MasterFamilies.items()
+                    if (char_ids := family.getCollapsedIDs())]
+        self.folds_db.truncate()
+        self.folds_db.insert_multiple(folds)
+
+    @qtc.pyqtSlot(object, object)
+    def place_family(self, job, layout):
+        if job.family.receive_layout(job, layout):
+            job.family.build_tree()
+            job.family.update()
+
+    @qtc.pyqtSlot()
+    def families_placed(self):
+        # Every family has its layout: called by init_tree_view and update_tree
+        # when none went to the pool, otherwise once the pool's jobs are all done
+        self.setTreeSpacing()
+        if self.focus_center is not None:
+            self.centerOnCharacter(self.focus_center)
+        self.scene.update()
+        self.viewport().update()
+
+
+    def setTileCaching(self, state):
+        if state and self.tile_cache is None:
+            self.tile_cache = TileCache(self, self.scene)
+        elif not state and self.tile_cache is not None:
+            self.tile_cache.close()
+            self.tile_cache = None
+
+    @qtc.pyqtSlot(qtc.QPointF)
+    def jumpTo(self, point):
+        self.centerOn(point)
+        if self.tile_cache is not None:
+            self.tile_cache.navigate()
 
     def updatePreferences(self):
         if pref_record := self.preferences_db.get(where('tab') == 'tree'):
+            if (val := pref_record.get('tile_cache', None)) is not None:
+                self.setTileCaching(val)
+            if (val := pref_record.get('minimap', None)) is not None:
+                self.minimap.setVisible(val)
+            if val := pref_record.get('portrait_budget', None): # MiB of character pixmaps
+                Character.pixmap_cache.setLimit(val * 2**20)
             if val := pref_record.get('generation_spacing', None):
                 Family.FIXED_Y = val
             if val := pref_record.get('sibling_spacing', None):
@@ -301,10 +441,12 @@ class TreeView(qtw.QGraphicsView):
 
     def update_tree(self):
         self.scene.reset_scene()
+        neighbourhood = self.focus[2] if self.focus is not None else None
         for fam_id, family in TreeView.MasterFamilies.items():
-            if fam_id in TreeView.CURRENT_FAMILIES: #WARNING: not good place for constant
-                family.set_grid()  
-                family.build_tree()
+            if fam_id in TreeView.CURRENT_FAMILIES and (neighbourhood is None or fam_id in self.focus_families):
+                family.setNeighbourhood(neighbourhood)
+                if family.set_grid(self.layout_pool):
+                    family.build_tree()
                 if family not in self.scene.current_families:
                     # family.initFirstGen()
                     family.setParent(self)
@@ -316,6 +458,8 @@ class TreeView(qtw.QGraphicsView):
                     # self.removedChars.emit([char.getID() for char in family.getAllMembers()])
                     self.scene.remove_family_from_scene(family) 
                     family.setParent(None)
+        if not self.layout_pool.isBusy():
+            self.families_placed()
         self.scene.update()
         self.viewport().update()
         # self.fitWithBorder()
@@ -328,6 +472,130 @@ class TreeView(qtw.QGraphicsView):
         
 
     
+    ## Focus Mode ##
+
+    @qtc.pyqtSlot(uuid.UUID)
+    def setFocusMode(self, char_id, radius=None):
+        # Only the characters within `radius` generations or partnerships of 
+        # char_id stay in the scene, and only the families holding them. 
+        # Growing the radius of the same focus only walks the new ring
+        radius = self.FOCUS_RADIUS if radius is None else radius
+        if self.kinship is None:
+            meta_records = self.meta_db.all()
+            no_parents = (meta_records[0]['NULL_ID'], meta_records[0]['TERM_ID']) if meta_records else ()
+            self.kinship = KinshipGraph(self.character_db.all(), no_parents)
+        if self.focus is not None and self.focus[0] == char_id and radius >= self.focus[1]:
+            hops = self.kinship.neighbourhood(char_id, radius, self.focus[2])
+        else:
+            hops = self.kinship.neighbourhood(char_id, radius)
+        self.focus = (char_id, radius, hops)
+        self.focus_families = {graphic_char.getTreeID() for _id in hops 
+                                    for graphic_char in TreeView.CharacterList.search(_id)}
+        self.focus_center = char_id
+        self.update_tree()
+        self.focusChanged.emit(True)
+
+    @qtc.pyqtSlot(list)
+    def forgetKinship(self, char_ids=None):
+        self.kinship = None
+
+    @qtc.pyqtSlot(int)
+    def setFocusRadius(self, radius):
+        self.FOCUS_RADIUS = radius
+        if self.focus is not None:
+            self.setFocusMode(self.focus[0], radius)
+
+    @qtc.pyqtSlot()
+    def endFocusMode(self):
+        if self.focus is None:
+            return
+        self.focus_center = self.focus[0]
+        self.focus = None
+        self.focus_families = set()
+        self.kinship = None
+        self.update_tree()
+        self.focusChanged.emit(False)
+
+    @qtc.pyqtSlot(bool)
+    def toggle_focus(self, state):
+        if not state:
+            self.endFocusMode()
+            return
+        selected = [item for item in self.scene.selectedItems() if isinstance(item, Character)]
+        if selected:
+            self.setFocusMode(selected[0].getID())
+        else:
+            self.temp_statusbar_msg.emit('Select a character to focus on', 2000)
+            self.focusChanged.emit(self.focus is not None)
+
+    def centerOnCharacter(self, char_id):
+        self.focus_center = None
+        for graphic_char in TreeView.CharacterList.search(char_id):
+            if graphic_char.scene() is self.scene:
+                self.centerOn(graphic_char)
+                if self.tile_cache is not None:
+                    self.tile_cache.navigate()
+                break
+
+    ## Collapsing ##
+
+    @qtc.pyqtSlot(uuid.UUID)
+    def toggleCollapse(self, char_id):
+        # Folds (or unfolds) the character's descendants, keeping it where it 
+        # is on screen while its family is laid out around the change
+        for graphic_char in TreeView.CharacterList.search(char_id):
+            family = TreeView.MasterFamilies.get(graphic_char.getTreeID())
+            if family is not None and family.hasDescendants(graphic_char):
+                break
+        else:
+            return
+        before = self.mapFromScene(graphic_char.scenePos())
+        self.setCollapsed(family, char_id, not family.isCollapsed(graphic_char))
+        self.update_tree()
+        offset = self.mapFromScene(graphic_char.scenePos()) - before
+        self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() + offset.x())
+        self.verticalScrollBar().setValue(self.verticalScrollBar().value() + offset.y())
+
+    def setCollapsed(self, family, char_id, state):
+        # Folded characters leave the CharacterList, expanded ones are built
+        # from their current records (edits while folded only reach those)
+        if state:
+            heads = {id(fam.getFirstGen()[0]): fam for fam in TreeView.MasterFamilies.values()}
+            for graphic_char in family.setCollapsed(char_id, True):
+                if id(graphic_char) in heads:   # still heading its romance family
+                    heads[id(graphic_char)].initFirstGen()
+                elif graphic_char in TreeView.CharacterList:
+                    TreeView.CharacterList.remove(graphic_char)
+            return
+
+        records = {}
+        def build(folded):
+            ids = {char.getID() for char in folded}
+            records.update((record['char_id'], record) for record in 
+                            self.character_db.search(where('char_id').test(lambda char_id: char_id in ids)))
+            return [Character(records.get(char.getID(), char.toDict())) for char in folded]
+        built = family.setCollapsed(char_id, False, build)
+        TreeView.CharacterList.add(*built)
+
+        # and left out if their kingdom is
+        filtered_kingdoms = {kingdom['kingdom_id'] for kingdom in self.kingdoms_db} - self.CURRENT_KINGDOMS
+        for graphic_char in built:
+            if records.get(graphic_char.getID(), {}).get('kingdom_id') in filtered_kingdoms:
+                family.filtered.add(graphic_char)
+                if graphic_char.scene():
+                    self.scene.removeItem(graphic_char)
+                graphic_char.setParent(None)
+                graphic_char.setParentItem(None)
+
+    def revealCharacter(self, char_id, expand=False):
+        # Edits work on every Character of char_id: expand whatever it is 
+        # folded away under first (and char_id itself with expand)
+        for family in TreeView.MasterFamilies.values():
+            for node in family.collapsedAbove(char_id):
+                self.setCollapsed(family, node.data.getID(), False)
+            if expand and family.isCollapsed(char_id):
+                self.setCollapsed(family, char_id, False)
+
     def toggle_char_selecting(self):
         self.selecting_char = False
         self.temp_statusbar_msg.emit('', 100) # temporary way to clear message
@@ -465,6 +733,7 @@ class TreeView(qtw.QGraphicsView):
                 else:
                     return
             
+            self.revealCharacter(parent_id, expand=True)
             parent_dict = self.character_db.get(where('char_id') == parent_id)
             parent_char_instances = TreeView.CharacterList.search(parent_id)
             parent_ids = []
@@ -486,6 +755,7 @@ class TreeView(qtw.QGraphicsView):
                         other_parent_dict = self.character_db.get(where('char_id') == parent_dict['partnerships'][0]['p_id'])
                         char_dict['parent_1'] = other_parent_dict['char_id']
 
+                        self.revealCharacter(other_parent_dict['char_id'], expand=True)
                         other_parent_instances = TreeView.CharacterList.search(other_parent_dict['char_id'])
                         for instance in other_parent_instances:
                             other_parent_ids.append(instance.getTreeID())
@@ -536,6 +806,7 @@ class TreeView(qtw.QGraphicsView):
 
         elif char_type == CHAR_TYPE.PARTNER:
             if isinstance(parent, uuid.UUID):
+                self.revealCharacter(parent)
                 existing_char = TreeView.CharacterList.search(parent)[0]
             elif isinstance(parent, list): # assume to be selectionList
                 existing_char = parent[0] # get first character
@@ -548,6 +819,7 @@ class TreeView(qtw.QGraphicsView):
                 else:
                     return
             existing_dict = self.character_db.get(where('char_id') == existing_char.getID())
+            self.revealCharacter(existing_char.getID())
             
             fam_name = char_dict['family']
             kingdom_id = self.get_kingdom(kingdom_name=char_dict['kingdom'])
@@ -725,6 +997,9 @@ class TreeView(qtw.QGraphicsView):
         new_family.add_partner.connect(self.createPartnership)
         new_family.add_parent.connect(self.addParent)
         new_family.remove_partnership.connect(self.divorceProctor)
+        new_family.focus_char.connect(self.setFocusMode)
+        new_family.collapse_char.connect(self.toggleCollapse)
+        new_family.tree_moved.connect(self.family_moved)
 
         self.scene.add_family_to_scene(new_family)
         new_family.set_grid()
@@ -807,10 +1082,13 @@ class TreeView(qtw.QGraphicsView):
 
 
     def matchMaker(self, char_1_id, char_2=None):
+        self.forgetKinship()
         if not char_2:
             char_2 = self.requestCharacter("Please select a partner")
             if not isinstance(char_2, Character):
                 return
+        self.revealCharacter(char_1_id)
+        self.revealCharacter(char_2.getID())
         char_1 = TreeView.CharacterList.search(char_1_id)
         if not char_1:
             return
@@ -893,7 +1171,11 @@ class TreeView(qtw.QGraphicsView):
     @qtc.pyqtSlot(uuid.UUID)
     @qtc.pyqtSlot(uuid.UUID, uuid.UUID)
     def divorceProctor(self, char1_id, char2_id=None):
+        self.forgetKinship()
         char_record = self.character_db.get(where('char_id') == char1_id)
+        for char_id in [char1_id, char2_id] + [couple['p_id'] for couple in char_record['partnerships']]:
+            if char_id:
+                self.revealCharacter(char_id)
         if char2_id:
             partner_record = self.character_db.get(where('char_id') == char2_id)
         else:
@@ -965,6 +1247,7 @@ class TreeView(qtw.QGraphicsView):
 
     @qtc.pyqtSlot(dict, uuid.UUID)
     def buildParent(self, parent_dict, child_id):
+        self.revealCharacter(child_id)
         existing_dict = self.character_db.get(where('char_id') == child_id)
         parent_dict['fam_id'] = existing_dict['fam_id']
         parent_dict['parent_0'] = existing_dict['parent_0']
@@ -1023,6 +1306,7 @@ class TreeView(qtw.QGraphicsView):
         if fam_id not in self.MasterFamilies.keys():
             fam_id = self.character_db.get(where('char_id') == char_id)['partnerships'][0]['rom_id']
         # TreeView.MasterFamilies[fam_id].delete_character(char_id)
+        self.revealCharacter(char_id)
         for _id, fam in TreeView.MasterFamilies.items():
             fam.delete_character(char_id)
 
@@ -1031,6 +1315,7 @@ class TreeView(qtw.QGraphicsView):
         char_removal = True
         partner_removal = False
         first_gen = False
+        self.revealCharacter(char_id)
         char_instances = tuple(TreeView.CharacterList.search(char_id))
         for instance in char_instances:
             # print(f'{instance.getTreeID()} --> {instance.getName()}')
@@ -1154,9 +1439,11 @@ class TreeView(qtw.QGraphicsView):
             if filter_state:
                 for char in filtered_chars:
                     for graphic_char in TreeView.CharacterList.search(char['char_id']):
-                        TreeView.MasterFamilies[graphic_char.getTreeID()].filtered.remove(graphic_char)
-                        graphic_char.setParent(TreeView.MasterFamilies[graphic_char.getTreeID()])
-                        graphic_char.setParentItem(TreeView.MasterFamilies[graphic_char.getTreeID()])
+                        family = TreeView.MasterFamilies[graphic_char.getTreeID()]
+                        family.filtered.remove(graphic_char)
+                        if not family.isHidden(graphic_char):
+                            graphic_char.setParent(family)
+                            graphic_char.setParentItem(family)
             else:
                 for char in filtered_chars:
                     for graphic_char in TreeView.CharacterList.search(char['char_id']):
@@ -1297,6 +1584,15 @@ class TreeView(qtw.QGraphicsView):
 
     ## Override Built-In Event Slots ##
 
+    def paintEvent(self, event):
+        visible_area = self.mapToScene(self.viewport().rect())
+        if visible_area != self.visible_area:   # scrolled, zoomed or resized since
+            self.visible_area = visible_area
+            self.move_minimap.emit(visible_area)
+        if self.tile_cache is not None and self.tile_cache.paint():
+            return
+        super(TreeView, self).paintEvent(event)
+
     def resizeEvent(self, event):                
         self.fitWithBorder()
         super(TreeView, self).resizeEvent(event)
@@ -1364,6 +1660,8 @@ class TreeView(qtw.QGraphicsView):
         newPos = self.mapToScene(center_pos)
         delta = newPos - oldPos
         self.translate(delta.x(), delta.y())
+        if self.tile_cache is not None:
+            self.tile_cache.navigate()
 
         
     def mousePressEvent(self, event):
@@ -1410,6 +1708,8 @@ class TreeView(qtw.QGraphicsView):
                     self.verticalScrollBar().value() - (event.y() - self._panStartY))
                 self._panStartX = event.x()
                 self._panStartY = event.y()
+                if self.tile_cache is not None:
+                    self.tile_cache.navigate()
                 event.accept()
         super(TreeView, self).mouseMoveEvent(event)
 
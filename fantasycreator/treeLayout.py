@@ -0,0 +1,246 @@
+"""
+Pure python implementation of a tidy tree layout
+(Walker's algorithm in the linear-time form given by Buchheim, Junger and Leipert)
+"""
+
+class TreeLayout:
+
+    # Nodes are numbered 0..n-1 with node 0 the root. For every node:
+    #   children[v]      list of child numbers, left to right
+    #   left_ext[v]      distance from the node's x to its left edge
+    #   right_ext[v]     distance from the node's x to its right edge (incl. partners)
+    #   anchor[v]        offset from the node's x to the point its children centre under
+    # Children hang centred under their parent's anchor and neighbouring nodes on
+    # a level are kept at least `spacing` apart, edge to edge.
+    #
+    # After a full layout() the walk state is kept, so that when a few nodes
+    # change (setNode/addNode) relayout() only re-places the children of those
+    # nodes and of their ancestors. The arrangement of a node's children never
+    # depends on anything outside its subtree, and the contour threads written
+    # while arranging them are logged so they can be undone first.
+    #
+    # layout() can also be handed the x of an earlier layout of the same input,
+    # in which case the walk itself is put off until the first relayout().
+
+    def __init__(self, spacing):
+        self.spacing = spacing
+        self.layout([], [], [], [])
+
+    def layout(self, children, left_ext, right_ext, anchor, root_x=0, x=None):
+        num_nodes = len(children)
+        self.children = children
+        self.left_ext = left_ext
+        self.right_ext = right_ext
+        self.anchor = anchor
+
+        self.prelim = [0.0] * num_nodes
+        self.mod = [0.0] * num_nodes
+        self.shift = [0.0] * num_nodes
+        self.change = [0.0] * num_nodes
+        self.thread = [-1] * num_nodes
+        self.ancestor = list(range(num_nodes))
+        self.stamp = [-1] * num_nodes   # which arrangement last set ancestor[v]
+        self.number = [0] * num_nodes
+        self.parent = [-1] * num_nodes
+        self.depth = [0] * num_nodes
+        self.midpoint = [0.0] * num_nodes
+        self.log = {}       # node -> thread/mod writes made while arranging its children
+        self.dirty = set()
+        self.arranged = set()   # nodes re-placed by the last relayout()
+        self.runs = 0
+        self.walked = x is None
+        self.x = []
+        self.order = []
+        if not num_nodes:
+            return self.x
+
+        for v in self.preorder():
+            for index, w in enumerate(children[v]):
+                self.parent[w] = v
+                self.number[w] = index + 1
+                self.depth[w] = self.depth[v] + 1
+        if not self.walked:
+            self.x = list(x)
+            return self.x
+        return self.first_walk(root_x)
+
+    def first_walk(self, root_x):
+        # Post-order: place each node's children relative to each other, then
+        # record where the node sits over them
+        self.walked = True
+        for v in reversed(self.preorder()):
+            if self.children[v]:
+                self.arrange(v)
+        return self.second_walk(root_x)
+
+    def addNode(self, left_ext, right_ext, anchor):
+        self.children.append([])
+        self.left_ext.append(left_ext)
+        self.right_ext.append(right_ext)
+        self.anchor.append(anchor)
+        for values, default in ((self.prelim, 0.0), (self.mod, 0.0), (self.shift, 0.0),
+                                (self.change, 0.0), (self.thread, -1), (self.stamp, -1),
+                                (self.number, 0), (self.parent, -1), (self.depth, 0),
+                                (self.midpoint, 0.0)):
+            values.append(default)
+        v = len(self.children) - 1
+        self.ancestor.append(v)
+        self.dirty.add(v)
+        return v
+
+    def setNode(self, v, children=None, extents=None):
+        if children is not None:
+            self.children[v] = children
+            for index, w in enumerate(children):
+                self.parent[w] = v
+                self.number[w] = index + 1
+                self.depth[w] = self.depth[v] + 1
+        if extents is not None:
+            self.left_ext[v], self.right_ext[v], self.anchor[v] = extents
+        self.dirty.add(v)
+
+    def relayout(self, root_x=0):
+        # Every dirty node and its ancestors get their children re-arranged
+        path = set()
+        for v in self.dirty:
+            while v >= 0 and v not in path:
+                path.add(v)
+                v = self.parent[v]
+        self.dirty.clear()
+        self.arranged = path
+        if not path:
+            return self.x
+        if not self.walked:
+            return self.first_walk(root_x)
+
+        # Undo top-down (ancestors wrote last), then redo bottom-up
+        path = sorted(path, key=self.depth.__getitem__)
+        for v in path:
+            for values, w, old in reversed(self.log.pop(v, ())):
+                values[w] = old
+        for v in reversed(path):
+            if self.children[v]:
+                self.arrange(v)
+        return self.second_walk(root_x)
+
+    def preorder(self):
+        self.order = order = [0]
+        children = self.children
+        for v in order:
+            order.extend(children[v])
+        return order
+
+    def arrange(self, v):
+        children = self.children
+        left_ext = self.left_ext
+        right_ext = self.right_ext
+        prelim = self.prelim
+        mod = self.mod
+        shift = self.shift
+        change = self.change
+        thread = self.thread
+        ancestor = self.ancestor
+        stamp = self.stamp
+        number = self.number
+        midpoint = self.midpoint
+        spacing = self.spacing
+        self.runs += 1
+        run = self.runs
+        log = self.log[v] = []
+
+        def next_left(v):
+            kids = children[v]
+            return kids[0] if kids else thread[v]
+
+        def next_right(v):
+            kids = children[v]
+            return kids[-1] if kids else thread[v]
+
+        def apportion(v, default_ancestor):
+            siblings = kids
+            w = siblings[number[v] - 2]
+            vip = vop = v
+            vim = w
+            vom = siblings[0]
+            sip = mod[vip]
+            sop = mod[vop]
+            sim = mod[vim]
+            som = mod[vom]
+            nr = next_right(vim)
+            nl = next_left(vip)
+            while nr >= 0 and nl >= 0:
+                vim = nr
+                vip = nl
+                vom = next_left(vom)
+                vop = next_right(vop)
+                ancestor[vop] = v
+                stamp[vop] = run
+                gap = ((prelim[vim] + sim + right_ext[vim] + spacing + left_ext[vip])
+                            - (prelim[vip] + sip))
+                if gap > 0:
+                    wm = ancestor[vim] if stamp[vim] == run else default_ancestor
+                    subtrees = number[v] - number[wm]
+                    change[v] -= gap / subtrees
+                    shift[v] += gap
+                    change[wm] += gap / subtrees
+                    prelim[v] += gap
+                    mod[v] += gap
+                    sip += gap
+                    sop += gap
+                sim += mod[vim]
+                sip += mod[vip]
+                som += mod[vom]
+                sop += mod[vop]
+                nr = next_right(vim)
+                nl = next_left(vip)
+            if nr >= 0 and next_right(vop) < 0:
+                log.append((thread, vop, thread[vop]))
+                log.append((mod, vop, mod[vop]))
+                thread[vop] = nr
+                mod[vop] += sim - sop
+            if nl >= 0 and next_left(vom) < 0:
+                log.append((thread, vom, thread[vom]))
+                log.append((mod, vom, mod[vom]))
+                thread[vom] = nl
+                mod[vom] += sip - som
+                default_ancestor = v
+            return default_ancestor
+
+        kids = children[v]
+        default_ancestor = kids[0]
+        for index, w in enumerate(kids):
+            shift[w] = change[w] = 0.0
+            if index:
+                left_sib = kids[index - 1]
+                prelim[w] = (prelim[left_sib] + right_ext[left_sib] + spacing + left_ext[w])
+                mod[w] = prelim[w] - midpoint[w] if children[w] else 0.0
+                default_ancestor = apportion(w, default_ancestor)
+            else:
+                prelim[w] = midpoint[w] if children[w] else 0.0
+                mod[w] = 0.0
+        # Execute the shifts collected by apportion
+        total_shift = 0.0
+        total_change = 0.0
+        for w in reversed(kids):
+            prelim[w] += total_shift
+            mod[w] += total_shift
+            total_change += change[w]
+            total_shift += shift[w] + total_change
+        midpoint[v] = (prelim[kids[0]] + prelim[kids[-1]]) / 2 - self.anchor[v]
+
+    def second_walk(self, root_x):
+        # Pre-order: accumulate the modifiers
+        prelim = self.prelim
+        mod = self.mod
+        children = self.children
+        prelim[0] = self.midpoint[0] if children[0] else 0.0
+        x = self.x = [0.0] * len(children)
+        mod_sum = [0.0] * len(children)
+        offset = root_x - (prelim[0] + self.anchor[0])
+        for v in self.preorder():
+            m = mod_sum[v]
+            x[v] = prelim[v] + m + offset
+            m += mod[v]
+            for w in children[v]:
+                mod_sum[w] = m
+        return x
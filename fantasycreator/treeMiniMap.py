@@ -0,0 +1,182 @@
+"""
+Overview of the whole tree world, drawn from a cached thumbnail
+"""
+
+# PyQt
+from PyQt5 import QtWidgets as qtw
+from PyQt5 import QtGui as qtg
+from PyQt5 import QtCore as qtc
+
+
+class TreeMiniMap(qtw.QWidget):
+
+    # The families' combined bounds (plus BORDER) are rendered once into a
+    # thumbnail the size of the widget. After that only what changed in the
+    # scene is rendered again, clipped to its own part of the thumbnail, and
+    # the whole thumbnail is only redrawn when the world outgrows it or shrinks
+    # to less than SHRINK of it. The view's visible area is drawn on top, and
+    # clicking or dragging on the map centres the view on that point.
+
+    WIDTH = 200
+    HEIGHT = 120
+    BORDER = 100
+    DELAY = 100     # ms to collect changes for before rendering them
+    MAX_REGIONS = 16
+    SHRINK = 0.5
+
+    jump = qtc.pyqtSignal(qtc.QPointF)
+
+    def __init__(self, scene, parent=None):
+        super(TreeMiniMap, self).__init__(parent)
+        self.setSizePolicy(qtw.QSizePolicy.Fixed, qtw.QSizePolicy.Fixed)
+        self.setFixedSize(TreeMiniMap.WIDTH, TreeMiniMap.HEIGHT)
+        self.setCursor(qtc.Qt.PointingHandCursor)
+        self.scene = scene
+        self.brush = qtg.QBrush(qtg.QColor(252, 221, 160, 128))
+        self.pen = qtg.QPen(qtg.QColor(120, 90, 40), 1)
+
+        self.thumbnail = qtg.QImage(self.size(), qtg.QImage.Format_ARGB32_Premultiplied)
+        self.thumbnail.fill(qtc.Qt.transparent)
+        self.world = qtc.QRectF()
+        self.to_thumb = qtg.QTransform()
+        self.from_thumb = qtg.QTransform()
+        self.rect_view = qtg.QPolygonF()
+        self.dirty = []
+
+        self.render_timer = qtc.QTimer(self)
+        self.render_timer.setSingleShot(True)
+        self.render_timer.setInterval(self.DELAY)
+        self.render_timer.timeout.connect(self.refresh)
+        # Only connected while shown: a slot on QGraphicsScene.changed stops the 
+        # views from updating items directly, for the whole scene
+        self.following = False
+
+    ## Custom Slots ##
+
+    @qtc.pyqtSlot('QList<QRectF>')
+    def sceneChanged(self, regions):
+        self.dirty.extend(regions)
+        self.render_timer.start()
+
+    @qtc.pyqtSlot(qtg.QPolygonF)
+    def controlView(self, poly):
+        self.rect_view = poly
+        self.update()
+
+    @qtc.pyqtSlot()
+    def refresh(self):
+        # Bring the thumbnail up to date with the scene
+        world = self.worldRect()
+        if self.needsResize(world):
+            self.renderAll(world)
+        elif self.dirty:
+            regions = self.dirty
+            if len(regions) > self.MAX_REGIONS:
+                united = qtc.QRectF()
+                for region in regions:
+                    united = united.united(region)
+                regions = [united]
+            for region in regions:
+                self.renderRegion(region)
+        self.dirty = []
+        self.update()
+
+    ## Rendering ##
+
+    def worldRect(self):
+        world = qtc.QRectF()
+        for fam in self.scene.current_families:
+            world = world.united(fam.sceneBoundingRect())
+        if world.isNull():
+            return world
+        return world.adjusted(-self.BORDER, -self.BORDER, self.BORDER, self.BORDER)
+
+    def needsResize(self, world):
+        if world.isNull() or self.world.isNull():
+            return world != self.world
+        if not self.world.contains(world):
+            return True
+        area = world.width() * world.height()
+        return area < self.SHRINK * self.world.width() * self.world.height()
+
+    def renderAll(self, world):
+        self.world = world
+        self.thumbnail.fill(qtc.Qt.transparent)
+        if world.isNull():
+            self.to_thumb = self.from_thumb = qtg.QTransform()
+            return
+        scale = min(self.width() / world.width(), self.height() / world.height())
+        self.to_thumb = qtg.QTransform()
+        self.to_thumb.translate((self.width() - world.width() * scale) / 2,
+                                (self.height() - world.height() * scale) / 2)
+        self.to_thumb.scale(scale, scale)
+        self.to_thumb.translate(-world.x(), -world.y())
+        self.from_thumb = self.to_thumb.inverted()[0]
+        self.renderRegion(world)
+
+    def renderRegion(self, region):
+        # Whole thumbnail pixels only, so the edges of a region blend in
+        target = self.to_thumb.mapRect(region).toAlignedRect().adjusted(-1, -1, 1, 1)
+        target = target.intersected(self.to_thumb.mapRect(self.world).toAlignedRect())
+        if target.isEmpty():
+            return
+        painter = qtg.QPainter(self.thumbnail)
+        painter.setRenderHints(qtg.QPainter.Antialiasing | qtg.QPainter.SmoothPixmapTransform)
+        painter.setClipRect(target)
+        painter.setCompositionMode(qtg.QPainter.CompositionMode_Source)
+        painter.fillRect(target, qtc.Qt.transparent)
+        painter.setCompositionMode(qtg.QPainter.CompositionMode_SourceOver)
+
+        # The background and the families under the region, painted directly
+        # rather than through QGraphicsScene.render, which visits every item
+        region = self.from_thumb.mapRect(qtc.QRectF(target))
+        painter.setTransform(self.to_thumb)
+        painter.drawPixmap(self.scene.bg.pos(), self.scene.bg.pixmap())
+        option = qtw.QStyleOptionGraphicsItem()
+        for fam in sorted(self.scene.current_families, key=lambda fam: fam.zValue()):
+            if not fam.isVisible() or not fam.sceneBoundingRect().intersects(region):
+                continue
+            option.exposedRect = fam.mapRectFromScene(region).intersected(fam.boundingRect())
+            painter.setTransform(fam.sceneTransform() * self.to_thumb)
+            fam.paint(painter, option, None)
+        painter.end()
+
+    ## Override Built-In Event Slots ##
+
+    def showEvent(self, event):
+        # Changes aren't followed while hidden
+        if not self.following:
+            self.scene.changed.connect(self.sceneChanged)
+            self.following = True
+        self.world = qtc.QRectF()
+        self.refresh()
+        super(TreeMiniMap, self).showEvent(event)
+
+    def hideEvent(self, event):
+        if self.following:
+            self.scene.changed.disconnect(self.sceneChanged)
+            self.following = False
+        self.render_timer.stop()
+        self.dirty = []
+        super(TreeMiniMap, self).hideEvent(event)
+
+    def paintEvent(self, event):
+        painter = qtg.QPainter(self)
+        painter.drawImage(0, 0, self.thumbnail)
+        painter.setPen(self.pen)
+        painter.setBrush(qtc.Qt.NoBrush)
+        painter.drawRect(qtc.QRectF(self.rect()).adjusted(0.5, 0.5, -0.5, -0.5))
+        if not self.world.isNull():
+            painter.setBrush(self.brush)
+            painter.drawPolygon(self.to_thumb.map(self.rect_view))
+        painter.end()
+
+    def mousePressEvent(self, event):
+        if event.button() == qtc.Qt.LeftButton and not self.world.isNull():
+            self.jump.emit(self.from_thumb.map(qtc.QPointF(event.pos())))
+        event.accept()
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & qtc.Qt.LeftButton and not self.world.isNull():
+            self.jump.emit(self.from_thumb.map(qtc.QPointF(event.pos())))
+        event.accept()
@@ -83,36 +83,55 @@ class Tree:
 
         def getNumDescendants(self):
             count = 1
-            for child in self.children:
-                count += child.getNumDescendants()
+            for _ in self.iterSubTree():
+                count += 1
             return count
         
-        def getExtendedSubTree(self, nodeList):
-            for child in self.children:
-                nodeList.extend([mate for (mate, _id) in child.mates])
-                if child.children:
-                    child.getExtendedSubTree(nodeList)
-                    nodeList.append(child)                
+        def iterSubTree(self):
+            # Post-order walk of the descendants (a node follows its own subtree)
+            stack = [(None, iter(self.children))]
+            while stack:
+                parent, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    stack.pop()
+                    if parent is not None:
+                        yield parent
+                elif child.children:
+                    stack.append((child, iter(child.children)))
                 else:
-                    nodeList.append(child)
-            nodeList.extend([mate for (mate, _id) in self.mates])
+                    yield child
         
-        def getSubTree(self, nodeList):
-            for child in self.children:
+        def iterExtendedSubTree(self):
+            # Same walk as iterSubTree, with each descendant's mates ahead of it
+            stack = [(None, iter(self.children))]
+            while stack:
+                parent, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    stack.pop()
+                    if parent is not None:
+                        yield parent
+                    continue
+                for (mate, _id) in child.mates:
+                    yield mate
                 if child.children:
-                    child.getSubTree(nodeList)
-                    nodeList.append(child)
+                    stack.append((child, iter(child.children)))
                 else:
-                    nodeList.append(child)
+                    yield child
+            for (mate, _id) in self.mates:
+                yield mate
+        
+        def getExtendedSubTree(self, nodeList):
+            nodeList.extend(self.iterExtendedSubTree())
+        
+        def getSubTree(self, nodeList):
+            nodeList.extend(self.iterSubTree())
         
 
         def offsetSubTreeHeight(self, offset):
-            for child in self.children:
-                if child.children:
-                    child.offsetSubTreeHeight(offset)
-                    child.offsetHeight(offset)
-                else:
-                    child.offsetHeight(offset)
+            for child in self.iterSubTree():
+                child.offsetHeight(offset)
 
         
         def __str__(self):
@@ -126,6 +145,38 @@ class Tree:
     def __init__(self, root):
         self.root = self.Node(root, self.TreePos.MIDDLE)
         self.Nodes = []
+        # data -> Node lookups for tree members and for their mates
+        self._index = {root: self.root}
+        self._mate_index = {}
+        # Traversal results, dropped whenever the tree changes
+        self._version = 0
+        self._traversals = {}
+        # Nodes whose children or mates changed since the last popChanges(),
+        # or a flag when the shape of the tree changed wholesale
+        self._changed = set()
+        self._restructured = True
+    
+    def _invalidate(self, *changed):
+        self._version += 1
+        self._traversals.clear()
+        if changed:
+            self._changed.update(changed)
+        else:
+            self._restructured = True
+    
+    def popChanges(self):
+        changes = (self._changed, self._restructured)
+        self._changed = set()
+        self._restructured = False
+        return changes
+    
+    def _cached(self, key, walk):
+        if (result := self._traversals.get(key)) is None:
+            result = self._traversals[key] = tuple(walk())
+        return result
+    
+    def getVersion(self):
+        return self._version
 
     def addNode(self, obj, node=None):
         if node == None:
@@ -148,7 +199,10 @@ class Tree:
         else:
             pos = node.position
         
-        node.addNode(self.Node(obj, pos, node.getHeight() + 1, node))
+        new_node = self.Node(obj, pos, node.getHeight() + 1, node)
+        node.addNode(new_node)
+        self._index[obj] = new_node
+        self._invalidate(node)
     
     def addMate(self, obj, r_id, node=None):
         if node == None:
@@ -156,16 +210,20 @@ class Tree:
         mate = self.Node(obj, node.position, node.getHeight(), node)
         node.addMate(mate, r_id)
         mate.addMate(node, r_id)
+        self._mate_index[obj] = mate
+        self._invalidate(node)
     
     def addParent(self, obj, node=None):
         if node == None:
             node = self.root
             self.root = self.Node(obj, self.TreePos.MIDDLE)
+            self._index[obj] = self.root
             node.parents[0] = self.root
             self.root.addNode(node)
             self.root.offsetSubTreeHeight(1)
         else:
             new_node = self.Node(obj, node.position, node.getHeight(), node.parents[0])
+            self._index[obj] = new_node
             grand_parent = node.parents[0]
             new_node.children = grand_parent.getChildren()
             grand_parent.children = [] 
@@ -174,13 +232,33 @@ class Tree:
             node.parents[1] = None 
             # node.setHeight(node.getHeight() + 1)
             new_node.offsetSubTreeHeight(1)
+        self._invalidate()
 
         
 
     def replaceNode(self, obj, newData):
-        node = self.root.find(obj)
+        if obj in self._index:
+            node = self._index.pop(obj)
+            self._index[newData] = node
+        elif obj in self._mate_index:
+            node = self._mate_index.pop(obj)
+            self._mate_index[newData] = node
+        else:
+            return False
         node.data = newData
-    
+        self._invalidate(node)
+        return True
+
+    def swapData(self, node, newData):
+        # replaceNode for a node already at hand (the same data can sit in
+        # more than one node)
+        for index in (self._index, self._mate_index):
+            if index.get(node.data) is node:
+                del index[node.data]
+                index[newData] = node
+        node.data = newData
+        self._invalidate(node)
+
     def removeNode(self, obj):
         node = self.getNode(obj)
         if node.children == []:
@@ -188,6 +266,12 @@ class Tree:
                 node.parents[0].removeNode(node)
             if node.parents[1]:
                 node.parents[1].removeNode(node)
+            if self._index.get(node.data) is node:
+                del self._index[node.data]
+            for (mate, _id) in node.mates:
+                if self._mate_index.get(mate.data) is mate:
+                    del self._mate_index[mate.data]
+            self._invalidate(*(parent for parent in node.parents if parent))
             del node
             return True
         else:
@@ -199,7 +283,9 @@ class Tree:
             return False
         if node.mates != 0:
             node.mates = [(x, y) for (x, y) in node.mates if x.getData() != partner]
+            self._mate_index.pop(partner, None)
             del partner
+            self._invalidate(node)
             return True
         else:
             return False
@@ -207,84 +293,79 @@ class Tree:
 
     def setRoot(self, new_root):
         self.root = new_root
+        # Only what hangs off the new root can be looked up from here on
+        self._index = {}
+        self._mate_index = {}
+        for node in (new_root, *new_root.iterSubTree()):
+            self._index[node.data] = node
+            for (mate, _id) in node.mates:
+                self._mate_index[mate.data] = mate
+        self._invalidate()
     
     def getRoot(self):
         return self.root
     
     def getNode(self, obj):
-        return self.root.find(obj)
+        if (node := self._index.get(obj)) is not None:
+            return node
+        return self._mate_index.get(obj)
+    
+    def hasNode(self, obj):
+        return obj in self._index or obj in self._mate_index
     
     def get_depth(self):
         return self.get_max_depth(self.root)
 
     def get_max_depth(self, root):
-        height = 0
-        if root is None:
-            return height 
-        if root.getChildren() is None:
-            return 1
-        for child in root.getChildren():
-            height = max(height, self.get_max_depth(child))
-        return height + 1
+        return len(self._cached(('levels', root), lambda: self.iterLevels(root)))
     
     def get_width(self):
         return self.get_max_width(self.root)
     
     def get_max_width(self, root): 
-        if root is None: 
-            return 0
-        q = [] 
-        maxWidth = 0
-        q.insert(0,root) 
-
-        while q != []: 
-            count = len(q) 
-            maxWidth = max(count, maxWidth) 
-            
-            while count != 0: 
-                count -= 1
-                temp = q[-1]   
-                q.pop()
-                if temp.getChildren() is not None:
-                    for child in temp.getChildren():
-                        q.insert(0, child)
-        return maxWidth
+        levels = self._cached(('levels', root), lambda: self.iterLevels(root))
+        return max((len(level) for level in levels), default=0)
+    
+    def iterLevels(self, root):
+        if root is None:
+            return
+        level = (root,)
+        while level:
+            yield level
+            level = tuple(child for node in level for child in node.getChildren())
 
-    def getAllNodes(self):
-        self.Nodes = []
-        self.Nodes.append(self.root)
+    def iterAllNodes(self):
+        yield self.root
+        yield from self.root.getChildren()
         for child in self.root.getChildren():
-            self.Nodes.append(child)
+            yield from child.iterSubTree()
+    
+    def iterAllNodeswMates(self):
+        yield self.root
+        yield from self.root.getChildren()
+        yield from (mate for (mate, _id) in self.root.mates)
         for child in self.root.getChildren():
-            if child.getSubTree(self.Nodes) != None:
-                child.getSubTree(self.Nodes)
+            yield from child.iterExtendedSubTree()
+
+    def getAllNodes(self):
+        self.Nodes = list(self._cached('nodes', self.iterAllNodes))
         return self.Nodes
     
     def getAllNodeswMates(self):
-        self.Nodes = []
-        self.Nodes.append(self.root)
-        for child in self.root.getChildren():
-            self.Nodes.append(child)
-        self.Nodes.extend([mate for (mate, _id) in self.root.mates])
-        for child in self.root.getChildren():
-            if child.getExtendedSubTree(self.Nodes) != None:
-                child.getExtendedSubTree(self.Nodes)
+        self.Nodes = list(self._cached('nodes_mates', self.iterAllNodeswMates))
         return self.Nodes
     
+    def getSubTreeNodes(self, node):
+        return self._cached(('subtree', node), node.iterSubTree)
+    
     def getAllDatawMates(self):
-        self.getAllNodeswMates()
-        return [x.getData() for x in self.Nodes]
+        return [x.getData() for x in self._cached('nodes_mates', self.iterAllNodeswMates)]
     
     def getAllData(self):
-        self.getAllNodes()  ### UGLY UGLY UGLY  : dont always need to call
-        return [x.getData() for x in self.Nodes]
-        #print(*self.Nodes, sep = "\n")
-        # for node in self.Nodes:
-        #     print((node[1] * '\t') + node[0].name)
-        # print('Tree Size: ' + str(len(self.Nodes)))
+        return [x.getData() for x in self._cached('nodes', self.iterAllNodes)]
+
     def getCurrentIDList(self):
-        self.getAllNodes()
-        return [x.getData().getID() for x in self.Nodes]
+        return [x.getData().getID() for x in self._cached('nodes', self.iterAllNodes)]
 
 
 # # Add a bunch of nodes
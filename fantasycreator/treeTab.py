@@ -137,6 +137,21 @@ class TreeTab(qtw.QMainWindow):
         fit_view_act = self.toolbar.addWidget(fit_view_btn)
         fit_view_btn.pressed.connect(self.treeview.fitWithBorder)
 
+        # Add focus mode controls
+        self.focus_btn = qtw.QToolButton(self)
+        self.focus_btn.setText('Focus')
+        self.focus_btn.setCheckable(True)
+        self.focus_btn.setToolTip('Only show the family around the selected character')
+        self.toolbar.addWidget(self.focus_btn)
+        self.focus_btn.toggled.connect(self.treeview.toggle_focus)
+        self.treeview.focusChanged.connect(self.handleFocusChange)
+        self.focus_radius = qtw.QSpinBox(self)
+        self.focus_radius.setRange(1, 20)
+        self.focus_radius.setValue(TreeView.FOCUS_RADIUS)
+        self.focus_radius.setToolTip('Generations/partnerships shown around the focus')
+        self.toolbar.addWidget(self.focus_radius)
+        self.focus_radius.valueChanged.connect(self.treeview.setFocusRadius)
+
         # Setup Zoom Slider
         zoomicon = qtw.QLabel()
         zoomicon.setPixmap(qtg.QPixmap(':/toolbar-icons/zoom_icon.png').scaledToHeight(16))
@@ -195,6 +210,12 @@ class TreeTab(qtw.QMainWindow):
         self.zoomslider.setValue(value)
         self.zoomslider.blockSignals(False)
 
+    @qtc.pyqtSlot(bool)
+    def handleFocusChange(self, state):
+        self.focus_btn.blockSignals(True)
+        self.focus_btn.setChecked(state)
+        self.focus_btn.blockSignals(False)
+
     @qtc.pyqtSlot(bool)
     def handlePanelViz(self, viz_state):
         if viz_state:
@@ -237,6 +258,7 @@ class TreeTab(qtw.QMainWindow):
     @qtc.pyqtSlot()
     def saveRequest(self):
         print('Saving tree...')
+        self.treeview.saveLayouts()
     
     @qtc.pyqtSlot()
     def preferenceUpdate(self):
@@ -0,0 +1,54 @@
+"""
+Pure python/numpy implementation of shelf packing for the families of a world
+"""
+
+# 3rd Party
+import numpy as np
+
+
+class ShelfPacker:
+
+    # Boxes are taken tallest first (ties broken by key, so the order only
+    # changes when a box's height does) and laid left to right along shelves
+    # of a fixed width, each new shelf starting under the tallest box of the
+    # last. The shelf width follows the boxes' total area so the world comes
+    # out roughly ASPECT wide, but is only changed once it has drifted by more
+    # than DRIFT, so a small edit moves only the boxes after it on its shelf.
+
+    ASPECT = 16 / 9
+    DRIFT = 0.25
+
+    def __init__(self, spacing):
+        self.spacing = spacing
+        self.shelf_width = None
+        self.order = []
+
+    def pack(self, keys, widths, heights):
+        # Returns the top-left corner of each box, in the order given
+        widths = np.asarray(widths, dtype=np.float64)
+        heights = np.asarray(heights, dtype=np.float64)
+        num_boxes = len(widths)
+        x = np.zeros(num_boxes)
+        y = np.zeros(num_boxes)
+        if not num_boxes:
+            self.order = []
+            return x, y
+
+        spacing = self.spacing
+        area = ((widths + spacing) * (heights + spacing)).sum()
+        target = max(np.sqrt(area * self.ASPECT), widths.max())
+        if (self.shelf_width is None or self.shelf_width < widths.max()
+                or abs(target - self.shelf_width) > self.DRIFT * self.shelf_width):
+            self.shelf_width = target
+
+        self.order = order = np.lexsort((np.asarray(keys), -heights)).tolist()
+        shelf_x = shelf_y = shelf_height = 0.0
+        for index in order:
+            if shelf_x and shelf_x + widths[index] > self.shelf_width:
+                shelf_y += shelf_height + spacing
+                shelf_x = shelf_height = 0.0
+            x[index] = shelf_x
+            y[index] = shelf_y
+            shelf_x += widths[index] + spacing
+            shelf_height = max(shelf_height, heights[index])
+        return x, y
@@ -1,2 +1,5 @@
 from fantasycreator.__main__ import main
-main()
\ No newline at end of file
+
+# Guarded: layout worker processes re-import this module
+if __name__ == '__main__':
+    main()